@@ -0,0 +1,54 @@
+"""Resolve latency of FuzzyMappingResolver with and without the trigram index
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_fuzzy_index.py --sizes 1000 10000
+
+The full difflib scan is only timed up to ``--max-scan-size`` candidates, since
+at larger sizes a single lookup takes seconds.
+"""
+
+import argparse
+import time
+
+from common import make_queries, make_slugs, percentiles, time_calls
+from flask_selfheal.resolvers import FuzzyMappingResolver
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-scan-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'size':>9} {'mode':>6} {'build_s':>8} {'p50_ms':>9} {'p99_ms':>9} {'agree':>6}"
+    )
+    for size in args.sizes:
+        slugs = make_slugs(size)
+        queries = make_queries(slugs, args.queries)
+
+        start = time.perf_counter()
+        indexed = FuzzyMappingResolver(slugs)
+        build = time.perf_counter() - start
+        stats = percentiles(time_calls(indexed.resolve, queries))
+        print(
+            f"{size:>9} {'index':>6} {build:>8.2f} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f} {'':>6}"
+        )
+
+        if size > args.max_scan_size:
+            continue
+        full_scan = FuzzyMappingResolver(slugs, use_index=False)
+        sample = queries[: max(20, args.queries // 10)]
+        stats = percentiles(time_calls(full_scan.resolve, sample))
+        agree = sum(indexed.resolve(q) == full_scan.resolve(q) for q in sample)
+        print(
+            f"{size:>9} {'scan':>6} {0:>8.2f} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f} {agree / len(sample):>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
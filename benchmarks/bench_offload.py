@@ -0,0 +1,105 @@
+"""Latency of normal pages while a burst of 404s is being healed
+
+Serves a plain page from one thread while ``--storm`` threads request
+misspelled URLs at a combined ``--rate`` per second, healed by a full-scan
+``FuzzyMappingResolver``: first scoring in the web process, then on a
+``--processes`` worker pool. Reports the normal page latency and how many
+404s were healed or shed (rejected or timed out).
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_offload.py --slugs 20000 --processes 2
+"""
+
+import argparse
+import threading
+import time
+
+from common import make_queries, make_slugs, percentiles
+from flask import Flask
+
+from flask_selfheal import FuzzyMappingResolver, SelfHeal
+
+
+def run(slugs, queries, args, processes):
+    resolver = FuzzyMappingResolver(
+        slugs,
+        use_index=False,
+        processes=processes,
+        max_pending=args.max_pending,
+        pool_timeout=args.pool_timeout,
+    )
+    app = Flask(__name__)
+
+    @app.route("/")
+    def home():
+        return "ok"
+
+    SelfHeal(app, resolvers=[resolver])
+    if resolver.pool is not None:
+        resolver.pool.resolve(queries[0])  # start the workers
+
+    stop = threading.Event()
+    healed = [0]
+
+    def storm(offset):
+        client = app.test_client()
+        interval = args.storm / args.rate
+        idx, next_at = offset, time.perf_counter()
+        while not stop.is_set():
+            response = client.get(f"/{queries[idx % len(queries)]}")
+            healed[0] += response.status_code == 301
+            idx += args.storm
+            # Requests arrive at a fixed rate, whether or not we keep up
+            next_at += interval
+            time.sleep(max(0, next_at - time.perf_counter()))
+
+    threads = [threading.Thread(target=storm, args=(i,)) for i in range(args.storm)]
+    for thread in threads:
+        thread.start()
+
+    client, timings = app.test_client(), []
+    deadline = time.perf_counter() + args.seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        client.get("/")
+        timings.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.005)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if resolver.pool is not None:
+        stats = resolver.pool.stats
+        resolver.pool.close()
+    else:
+        stats = {}
+    return percentiles(timings), healed[0], stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slugs", type=int, default=20_000)
+    parser.add_argument("--storm", type=int, default=8, help="404 client threads")
+    parser.add_argument("--rate", type=float, default=40, help="404s per second")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--pool-timeout", type=float, default=None)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    slugs = make_slugs(args.slugs)
+    queries = make_queries(slugs, 500)
+
+    print(f"{'mode':>12} {'p50_ms':>9} {'p99_ms':>9} {'healed':>7} {'shed':>6}")
+    for label, processes in (("in-process", 0), ("pool", args.processes)):
+        timings, healed, stats = run(slugs, queries, args, processes)
+        shed = stats.get("rejected", 0) + stats.get("timeouts", 0)
+        print(
+            f"{label:>12} {timings['p50_ms']:>9.3f} {timings['p99_ms']:>9.3f}"
+            f" {healed:>7} {shed:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
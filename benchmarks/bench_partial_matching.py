@@ -0,0 +1,112 @@
+"""Queries and wall time of DatabaseResolver partial matching on SQLite
+
+Compares the single-query partial matching stage against the previous
+one-query-per-substring loop, on a table of ``--rows`` product slugs.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_partial_matching.py --rows 100000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from common import make_slugs, noise, percentiles
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+
+from flask_selfheal.resolvers import DatabaseResolver
+
+
+def legacy_partial_matching(session, slug_column, path):
+    """The pre-batching implementation: one LIKE query per substring"""
+    clean_path = re.sub(r"[-_\s]+", "", path)
+    if len(clean_path) < 4:
+        return None
+    for length in range(max(4, len(clean_path) // 2), len(clean_path)):
+        for start in range(len(clean_path) - length + 1):
+            substring = clean_path[start : start + length]
+            match = (
+                session.query(slug_column)
+                .filter(slug_column.contains(substring, autoescape=True))
+                .first()
+            )
+            if match:
+                return match[0]
+    return None
+
+
+def make_paths(slugs, count, seed=2):
+    """Paths that reach the partial stage: one slug word glued to noise"""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            sku = rng.choice(slugs).rsplit("-", 1)[1]
+            paths.append(f"{sku[: rng.randint(4, len(sku))]}-{noise(rng)}")
+        else:
+            paths.append(noise(rng))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db = SQLAlchemy(app)
+
+    class Product(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        slug = db.Column(db.String, unique=True)
+
+    with app.app_context():
+        db.create_all()
+        slugs = make_slugs(args.rows)
+        db.session.execute(Product.__table__.insert(), [{"slug": s} for s in slugs])
+        db.session.commit()
+
+        resolver = DatabaseResolver(Product)
+        session, slug_column = db.session, Product.slug
+        statements = []
+        event.listen(
+            db.engine, "before_cursor_execute", lambda *a: statements.append(1)
+        )
+
+        implementations = {
+            "batched": lambda p: resolver._try_partial_matching(
+                session, slug_column, p
+            ),
+            "legacy": lambda p: legacy_partial_matching(session, slug_column, p),
+        }
+        paths = make_paths(slugs, args.queries)
+        results = {}
+
+        print(f"{'mode':>8} {'queries/resolve':>16} {'p50_ms':>9} {'p99_ms':>9}")
+        for name, func in implementations.items():
+            timings, queries, results[name] = [], [], []
+            for path in paths:
+                statements.clear()
+                start = time.perf_counter()
+                results[name].append(func(path))
+                timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(statements))
+            stats = percentiles(timings)
+            mean_queries = sum(queries) / len(queries)
+            print(
+                f"{name:>8} {mean_queries:>16.1f} "
+                f"{stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+            )
+
+        agree = sum(a == b for a, b in zip(results["batched"], results["legacy"]))
+        print(f"agreement: {agree}/{len(paths)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""End-to-end benchmark of the 404 healing path
+
+Drives ``SelfHeal.handle_404`` through the Flask test client for each resolver
+and catalog size, with a workload of typos, truncations and scanner noise.
+Reports throughput, p50/p99 latency, database queries per request and peak
+traced memory, and writes all results as JSON so runs can be compared.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_selfheal.py --sizes 1000 10000 \\
+        --output results.json --baseline previous.json
+
+Catalogs of up to a million slugs can be measured with
+``--sizes 1000 10000 100000 1000000``. Scenarios whose setup takes minutes at
+that size are skipped above their cap unless ``--all-sizes`` is given.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+from common import make_slugs, make_workload, percentiles, typo
+from flask import Flask, abort
+from flask_sqlalchemy import SQLAlchemy
+
+from flask_selfheal import (
+    AliasMappingResolver,
+    DatabaseResolver,
+    EditDistanceResolver,
+    FlaskRoutesResolver,
+    FuzzyMappingResolver,
+    LookupTableResolver,
+    Metrics,
+    SelfHeal,
+)
+from flask_selfheal.lookup import build_lookup_table
+
+
+def alias_scenario(app, slugs, workload):
+    # One old URL per slug in the catalog, plus the workload's typos, each
+    # mapped to the slug it was derived from (noise stays unmapped)
+    rng = random.Random(2)
+    aliases = {typo(slug, rng): slug for slug in slugs}
+    aliases.update((query, slug) for query, slug in workload if slug)
+    return AliasMappingResolver(aliases)
+
+
+def fuzzy_scenario(app, slugs, workload):
+    return FuzzyMappingResolver(slugs)
+
+
+def edit_distance_scenario(app, slugs, workload):
+    return EditDistanceResolver(slugs)
+
+
+def lookup_table_scenario(app, slugs, workload):
+    # Precomputed typo table in front of the fuzzy resolver it was built from
+    fuzzy = FuzzyMappingResolver(slugs)
+    filename = os.path.join(tempfile.mkdtemp(), "redirects.idx")
+    build_lookup_table(filename, [fuzzy])
+    return [LookupTableResolver(filename), fuzzy]
+
+
+def routes_scenario(app, slugs, workload):
+    for idx, slug in enumerate(slugs):
+        app.add_url_rule(f"/{slug}", f"route_{idx}", lambda: "ok")
+    return FlaskRoutesResolver()
+
+
+def database_scenario(app, slugs, workload, snapshot=False, trigram_table=None):
+    db = SQLAlchemy(app)
+
+    class Product(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        slug = db.Column(db.String, unique=True)
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Product.__table__.insert(), [{"slug": s} for s in slugs])
+        db.session.commit()
+    resolver = DatabaseResolver(
+        Product,
+        snapshot=snapshot,
+        snapshot_refresh=None,
+        trigram_table=trigram_table,
+    )
+    if trigram_table:
+        with app.app_context():
+            resolver.build_trigram_table()
+    return resolver
+
+
+# Scenario -> (factory, largest size run without --all-sizes). The typo table
+# of every slug, a million Werkzeug rules, live LIKE scans and the trigram side
+# table each take minutes to set up or serve at a million slugs.
+SCENARIOS = {
+    "alias": (alias_scenario, None),
+    "fuzzy": (fuzzy_scenario, None),
+    "edit-distance": (edit_distance_scenario, None),
+    "lookup-table": (lookup_table_scenario, 100_000),
+    "routes": (routes_scenario, 100_000),
+    "database": (database_scenario, 100_000),
+    "database-snapshot": (
+        lambda *args: database_scenario(*args, snapshot=True),
+        None,
+    ),
+    "database-trigram": (
+        lambda *args: database_scenario(*args, trigram_table="product_trigrams"),
+        100_000,
+    ),
+}
+
+
+def build_app(scenario, slugs, workload, metrics):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+
+    @app.route("/p/<slug>")
+    def product(slug):
+        abort(404)
+
+    resolvers = SCENARIOS[scenario][0](app, slugs, workload)
+    if not isinstance(resolvers, list):
+        resolvers = [resolvers]
+    SelfHeal(app, resolvers=resolvers, metrics=metrics)
+    return app
+
+
+def run_scenario(scenario, size, query_count, warmup):
+    slugs = make_slugs(size)
+    workload = make_workload(slugs, query_count)
+    queries = [query for query, _ in workload]
+    metrics = Metrics()
+
+    start = time.perf_counter()
+    app = build_app(scenario, slugs, workload, metrics)
+    client = app.test_client()
+    setup = time.perf_counter() - start
+
+    for query in queries[:warmup]:
+        client.get(f"/{query}")
+    metrics.stats.clear()
+
+    timings, healed = [], 0
+    start = time.perf_counter()
+    for query in queries:
+        request_start = time.perf_counter()
+        response = client.get(f"/{query}")
+        timings.append((time.perf_counter() - request_start) * 1000)
+        healed += response.status_code == 301
+    elapsed = time.perf_counter() - start
+
+    queries_issued = sum(
+        stats.queries
+        for (_, stage), stats in metrics.stats.items()
+        if stage == "resolve"
+    )
+    result = {
+        "scenario": scenario,
+        "size": size,
+        "requests": len(queries),
+        "setup_s": setup,
+        "throughput_rps": len(queries) / elapsed,
+        "healed_ratio": healed / len(queries),
+        "db_queries_per_request": queries_issued / len(queries),
+        **percentiles(timings),
+    }
+    return result
+
+
+def measure_peak_memory(scenario, size, query_count):
+    """Peak traced allocations (MiB) while building the app and serving 404s"""
+    slugs = make_slugs(size)
+    workload = make_workload(slugs, query_count)
+    tracemalloc.start()
+    try:
+        client = build_app(scenario, slugs, workload, None).test_client()
+        for query, _ in workload:
+            client.get(f"/{query}")
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = {(r["scenario"], r["size"]): r for r in json.load(f)["results"]}
+
+    print("\nchange vs baseline (p50 / p99 / throughput):")
+    for result in results:
+        old = baseline.get((result["scenario"], result["size"]))
+        if old is None:
+            continue
+        print(
+            f"{result['scenario']:>18} {result['size']:>8}"
+            f" {result['p50_ms'] / old['p50_ms'] - 1:>+8.0%}"
+            f" {result['p99_ms'] / old['p99_ms'] - 1:>+8.0%}"
+            f" {result['throughput_rps'] / old['throughput_rps'] - 1:>+8.0%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the peak memory pass"
+    )
+    parser.add_argument(
+        "--all-sizes",
+        action="store_true",
+        help="also run scenarios above their size cap (slow)",
+    )
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON output")
+    args = parser.parse_args()
+
+    header = f"{'scenario':>18} {'size':>8} {'rps':>9} {'p50_ms':>9} {'p99_ms':>9}"
+    print(f"{header} {'queries':>8} {'healed':>7} {'peak_mb':>8}")
+
+    results = []
+    for scenario in args.scenarios:
+        cap = SCENARIOS[scenario][1]
+        for size in args.sizes:
+            if cap is not None and size > cap and not args.all_sizes:
+                continue
+            result = run_scenario(scenario, size, args.queries, args.warmup)
+            if not args.no_memory:
+                result["peak_mb"] = measure_peak_memory(
+                    scenario, size, min(args.queries, 50)
+                )
+            results.append(result)
+            print(
+                f"{scenario:>18} {size:>8} {result['throughput_rps']:>9.1f}"
+                f" {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f}"
+                f" {result['db_queries_per_request']:>8.2f}"
+                f" {result['healed_ratio']:>7.0%}"
+                f" {result.get('peak_mb', float('nan')):>8.1f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "timestamp": time.time(),
+                    "args": vars(args),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
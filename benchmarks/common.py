@@ -0,0 +1,84 @@
+"""Shared workload helpers for the benchmark scripts in this directory"""
+
+import random
+import statistics
+import string
+import time
+
+WORDS = [
+    "cool", "awesome", "super", "gaming", "laptop", "phone", "mouse", "model",
+    "gadget", "product", "wireless", "keyboard", "monitor", "camera", "speaker",
+    "charger", "cable", "adapter", "stand", "case", "cover", "battery", "portable",
+    "smart", "watch", "tablet", "printer", "router", "headset", "desk", "lamp",
+]  # fmt: skip
+
+
+def make_slugs(count: int, seed=0) -> list[str]:
+    """Generate `count` unique product-style slugs, e.g. ``smart-lamp-AB12345``"""
+    rng = random.Random(seed)
+    slugs = set()
+    while len(slugs) < count:
+        words = "-".join(rng.sample(WORDS, rng.randint(2, 3)))
+        sku = "".join(rng.choices(string.ascii_uppercase, k=2)) + str(
+            rng.randint(10000, 99999)
+        )
+        slugs.add(f"{words}-{sku}")
+    return sorted(slugs)
+
+
+def typo(slug: str, rng: random.Random) -> str:
+    """Apply one random typo: deletion, transposition, substitution or truncation"""
+    i = rng.randrange(1, len(slug) - 1)
+    kind = rng.choice(["delete", "transpose", "substitute", "truncate"])
+    if kind == "delete":
+        return slug[:i] + slug[i + 1 :]
+    if kind == "transpose":
+        return slug[: i - 1] + slug[i] + slug[i - 1] + slug[i + 1 :]
+    if kind == "substitute":
+        return slug[:i] + rng.choice(string.ascii_lowercase) + slug[i + 1 :]
+    return slug[: max(4, len(slug) - rng.randint(1, 4))]
+
+
+def noise(rng: random.Random) -> str:
+    """Random scanner-style path that should not heal to anything"""
+    return "".join(rng.choices(string.ascii_lowercase + "./_", k=rng.randint(6, 24)))
+
+
+def make_workload(
+    slugs: list[str], count: int, noise_ratio=0.2, seed=1
+) -> list[tuple[str, str | None]]:
+    """Build a 404 workload of ``(query, source slug)`` pairs: mostly typos of
+    real slugs, plus some noise (with no source)"""
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(count):
+        if rng.random() < noise_ratio:
+            workload.append((noise(rng), None))
+        else:
+            slug = rng.choice(slugs)
+            workload.append((typo(slug, rng), slug))
+    return workload
+
+
+def make_queries(slugs: list[str], count: int, noise_ratio=0.2, seed=1) -> list[str]:
+    """Build a 404 workload: mostly typos of real slugs, plus some noise"""
+    return [query for query, _ in make_workload(slugs, count, noise_ratio, seed)]
+
+
+def time_calls(func, inputs) -> list[float]:
+    """Call `func` once per input and return each latency in milliseconds"""
+    timings = []
+    for value in inputs:
+        start = time.perf_counter()
+        func(value)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentiles(timings: list[float]) -> dict[str, float]:
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "p50_ms": cuts[49],
+        "p99_ms": cuts[98],
+        "mean_ms": statistics.fmean(timings),
+    }
@@ -1,7 +1,7 @@
 from flask import Flask, redirect, url_for, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_selfheal import SelfHeal
-from flask_selfheal.resolvers import DatabaseResolver
+from flask_selfheal.resolvers import DatabaseResolver, FlaskRoutesResolver
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
@@ -48,30 +48,14 @@ product_resolver = DatabaseResolver(
 )
 
 
-# Custom SelfHeal class that extracts slug from /product/<slug> paths
-class ProductSelfHeal(SelfHeal):
-    def handle_404(self, e):
-        from flask import request, redirect, url_for
-
-        path = request.path.strip("/")
-
-        # Extract slug from /product/<slug> paths
-        if path.startswith("product/"):
-            slug_part = path[8:]  # Remove "product/" prefix
-        else:
-            slug_part = path
-
-        for resolver in self.resolvers:
-            target = resolver.resolve(slug_part)
-            if target:
-                redirect_url = url_for("product_detail", slug=target)
-                return redirect(redirect_url, code=301)
-
-        return f"404 Not Found: {path}", 404
-
-
-# Initialize SelfHeal with custom handler
-selfheal = ProductSelfHeal(app, resolvers=[product_resolver])
+# Heal /product/<slug> paths: the "product" segment is corrected against the
+# app's routes, and the slug is handed to the product resolver
+selfheal = SelfHeal(
+    app,
+    resolvers=[
+        FlaskRoutesResolver(endpoint_resolvers={"product_detail": product_resolver})
+    ],
+)
 
 
 @app.route("/product/<slug>")
@@ -1,17 +1,37 @@
-from .selfheal import SelfHeal
+from .selfheal import SelfHeal, Section
+from .metrics import Metrics
+from .admission import AdmissionControl
+from .bloom import NegativeFilter
+from .warmer import Warmer
+from .hitlog import HitLog
+from .cache import BaseCache, ResolutionCache, SQLiteCache, RedisCache
 from .resolvers import (
     BaseResolver,
     FuzzyMappingResolver,
     DatabaseResolver,
+    EditDistanceResolver,
     FlaskRoutesResolver,
     AliasMappingResolver,
+    LookupTableResolver,
 )
 
 __all__ = [
     "SelfHeal",
+    "Section",
+    "Metrics",
+    "AdmissionControl",
+    "NegativeFilter",
+    "Warmer",
+    "HitLog",
+    "BaseCache",
+    "ResolutionCache",
+    "SQLiteCache",
+    "RedisCache",
     "BaseResolver",
     "FuzzyMappingResolver",
     "DatabaseResolver",
+    "EditDistanceResolver",
     "FlaskRoutesResolver",
     "AliasMappingResolver",
+    "LookupTableResolver",
 ]
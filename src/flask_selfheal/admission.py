@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+import re
+
+from flask import request
+
+#: Paths made of anything else are not worth healing
+DEFAULT_ALLOWED = re.compile(r"[\w\-.~/]+")
+
+#: Extensions (and dotfiles) requested by vulnerability scanners
+DEFAULT_DENIED_EXTENSIONS = (
+    ".php",
+    ".asp",
+    ".aspx",
+    ".jsp",
+    ".cgi",
+    ".env",
+    ".git",
+    ".ini",
+    ".sql",
+    ".bak",
+)
+
+
+def _remote_addr() -> str | None:
+    return request.remote_addr
+
+
+class AdmissionControl:
+    """Decides which 404s are worth running through the resolver chain
+
+    Vulnerability scanners request thousands of random paths per second,
+    and without limits each one runs every resolver. Pass an instance to
+    :class:`~flask_selfheal.SelfHeal` to answer these with a plain 404 right
+    away. A path is rejected when:
+
+    - it is longer than `max_length` (reason ``"length"``)
+    - it contains characters not matched by `allowed` (``"characters"``)
+    - any of its segments ends in one of `denied_extensions`, e.g.
+      ``index.php``, ``/.env`` or ``/.git/config`` (``"extension"``)
+    - its client has used up its token bucket of `burst` heals, refilled at
+      `rate` per second (``"rate"``)
+    - `max_concurrent` resolutions are already in flight (``"concurrency"``)
+
+    Counts of admitted and rejected paths are kept in :attr:`stats`.
+
+    :param max_length: maximum path length
+    :param allowed: compiled regex a path must fully match
+    :param denied_extensions: lowercase endings of path segments that are
+        never healed
+    :param rate: heals per second allowed per client (``None`` for no limit)
+    :param burst: size of each client's token bucket (defaults to `rate`)
+    :param max_concurrent: maximum resolutions in flight (``None`` for no limit)
+    :param client_key: callable returning the current client's identifier
+        (defaults to ``request.remote_addr``; use Werkzeug's ``ProxyFix``
+        behind a proxy)
+    :param max_clients: number of client buckets kept, least recently seen
+        clients are forgotten first
+    """
+
+    def __init__(
+        self,
+        max_length=200,
+        allowed=DEFAULT_ALLOWED,
+        denied_extensions=DEFAULT_DENIED_EXTENSIONS,
+        rate=None,
+        burst=None,
+        max_concurrent=None,
+        client_key=None,
+        max_clients=10_000,
+    ):
+        self.max_length = max_length
+        self.allowed = allowed
+        self.denied_extensions = tuple(denied_extensions)
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self.max_concurrent = max_concurrent
+        self.client_key = client_key or _remote_addr
+        self.max_clients = max_clients
+
+        self.admitted = 0
+        self.rejected: dict[str, int] = {}
+
+        self._buckets = OrderedDict()
+        self._lock = Lock()
+        self._slots = BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    @property
+    def stats(self) -> dict[str, int]:
+        rejected = dict(self.rejected)
+        return {
+            "admitted": self.admitted,
+            "rejected": sum(rejected.values()),
+            **{f"rejected_{reason}": count for reason, count in rejected.items()},
+        }
+
+    def _check_path(self, path: str) -> str | None:
+        """Reason to reject `path` without looking at the client, if any"""
+        if len(path) > self.max_length:
+            return "length"
+        if self.allowed is not None and not self.allowed.fullmatch(path):
+            return "characters"
+        denied = self.denied_extensions
+        for name in path.lower().split("/"):
+            if "." in name and name[name.rfind(".") :] in denied:
+                return "extension"
+        return None
+
+    def _take_token(self, client) -> bool:
+        now = monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            admitted = tokens >= 1
+            self._buckets[client] = (tokens - admitted, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return admitted
+
+    def _reject(self, reason: str) -> bool:
+        with self._lock:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return False
+
+    def acquire(self, path: str) -> bool:
+        """Whether `path` may be healed now; call :meth:`release` once done
+        if it may"""
+        reason = self._check_path(path)
+        if reason is not None:
+            return self._reject(reason)
+        if self.rate is not None and not self._take_token(self.client_key()):
+            return self._reject("rate")
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            return self._reject("concurrency")
+
+        with self._lock:
+            self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        if self._slots is not None:
+            self._slots.release()
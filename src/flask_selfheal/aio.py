@@ -0,0 +1,210 @@
+from time import perf_counter
+import asyncio
+
+from .cache import MISS
+from .metrics import resolver_name
+from .resolvers import DatabaseResolver
+from .selfheal import SelfHeal
+
+
+class AsyncBaseResolver:
+    """Base class for all asyncio-native resolvers"""
+
+    async def resolve(self, path: str) -> str | None:
+        raise NotImplementedError
+
+    async def resolve_many(self, paths) -> list[str | None]:
+        return [await self.resolve(path) for path in paths]
+
+    def warm(self) -> None:
+        """Build or rebuild anything otherwise built on first use (see
+        :meth:`BaseResolver.warm <flask_selfheal.resolvers.BaseResolver.warm>`)"""
+
+    def known_slugs(self):
+        """Every slug this resolver can resolve to, if it knows them up front"""
+        return ()
+
+
+class AsyncDatabaseResolver(AsyncBaseResolver, DatabaseResolver):
+    """Database-backed resolver using SQLAlchemy's ``AsyncSession``
+
+    Runs the same matching stages as :class:`~flask_selfheal.DatabaseResolver`,
+    without blocking the event loop while the database works.
+
+    For example:
+    ```
+    engine = create_async_engine("sqlite+aiosqlite:///app.db")
+    resolver = AsyncDatabaseResolver(Article, async_sessionmaker(engine))
+    ```
+
+    Snapshot mode is not available here; a
+    :class:`~flask_selfheal.DatabaseResolver` with ``snapshot=True`` does no
+    I/O once loaded and can be used directly instead.
+
+    :param model: SQLAlchemy model
+    :param session_factory: callable returning a new ``AsyncSession``, e.g. an
+        ``async_sessionmaker``
+    :param kwargs: matching options, as for :class:`~flask_selfheal.DatabaseResolver`
+    """
+
+    # The hooks of DatabaseResolver rather than the no-ops above
+    warm = DatabaseResolver.warm
+    known_slugs = DatabaseResolver.known_slugs
+
+    def __init__(self, model, session_factory, **kwargs):
+        if kwargs.get("snapshot"):
+            raise ValueError("AsyncDatabaseResolver does not support snapshot mode")
+        super().__init__(model, **kwargs)
+        self.session_factory = session_factory
+
+    async def resolve(self, path: str) -> str | None:
+        # Handle empty or very short paths
+        if not path or len(path.strip()) < 2:
+            return None
+
+        async with self.session_factory() as session:
+            return await session.run_sync(self._resolve_with_session, path)
+
+    async def resolve_many(self, paths) -> list[str | None]:
+        paths = list(paths)
+        async with self.session_factory() as session:
+            targets = await session.run_sync(self._resolve_many_with_session, paths)
+        return [targets[path] for path in paths]
+
+
+class AsyncSelfHeal(SelfHeal):
+    """
+    Self-healing URL middleware for async Flask apps.
+
+    Works like :class:`~flask_selfheal.SelfHeal`, but its 404 handler is a
+    coroutine that awaits :class:`AsyncBaseResolver` instances and runs
+    regular (sync) resolvers in a worker thread, so neither blocks the event
+    loop. Requires ``flask[async]``.
+
+    Other frameworks (e.g. Quart) can call :meth:`resolve` from their own
+    404 handler.
+
+    With `parallel`, async resolvers run as concurrent tasks and sync ones on
+    the thread pool, under the same rules as in ``SelfHeal``. The `deadline`
+    applies whether or not `parallel` is set: async resolvers still running
+    then are cancelled, sync ones keep their thread until done.
+    """
+
+    async def handle_404(self, e):
+        path = self._request_path()
+        target = None
+        if self._admit(path):
+            try:
+                target = await self.resolve(path)
+            finally:
+                self._release()
+        return self._respond(path, target)
+
+    async def resolve(self, path: str) -> str | None:
+        """Run `path` through the resolver chain (or the cache, if configured)"""
+        # Dict and bloom filter lookups, not worth a thread
+        target = self._promoted(path)
+        if target:
+            return target
+        if self.cache is not None:
+            target = await self._cache_call(self._cache_lookup, path)
+            if target is not MISS:
+                return target
+        if self._known_miss(path):
+            return None
+
+        resolvers, key = self._chain(path)
+        resolve = self._resolve_parallel if self.parallel else self._resolve_sequential
+        try:
+            target, complete = await asyncio.wait_for(
+                resolve(resolvers, key), self.deadline
+            )
+        except TimeoutError:
+            # Out of time: nothing is known about this path, so don't cache
+            return None
+        if not complete:
+            return target
+
+        await self._cache_call(self._remember, path, target)
+        return target
+
+    async def _resolve_sequential(self, resolvers, path: str):
+        for resolver in resolvers:
+            if isinstance(resolver, AsyncBaseResolver):
+                target = await self._call_async_resolver(resolver, path)
+            else:
+                # Context variables (and so Flask's app context) are copied
+                target = await asyncio.to_thread(self._call_resolver, resolver, path)
+            if target:
+                return target, True
+        return None, True
+
+    async def _resolve_parallel(self, resolvers, path: str):
+        """Race all resolvers, returning ``(target, complete)`` (see
+        :meth:`SelfHeal._resolve_parallel`)"""
+        tasks = []
+        for resolver in resolvers:
+            if isinstance(resolver, AsyncBaseResolver):
+                task = asyncio.ensure_future(self._call_async_resolver(resolver, path))
+            else:
+                future = self._submit(resolver, path, len(resolvers))
+                task = None if future is None else asyncio.wrap_future(future)
+            tasks.append(task)
+
+        complete = True
+        try:
+            for task in tasks:
+                if task is None:
+                    complete = False
+                    continue
+                target = await task
+                if target:
+                    return target, complete
+            return None, complete
+        finally:
+            for task in tasks:
+                if task is not None:
+                    task.cancel()
+
+    async def _cache_call(self, func, *args):
+        """Call `func`, in a worker thread if the cache may block on I/O"""
+        if self.cache is not None and self.cache.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def resolve_many(self, paths) -> list[str | None]:
+        """Run all `paths` through the resolver chain in bulk (see
+        :meth:`SelfHeal.resolve_many <flask_selfheal.SelfHeal.resolve_many>`)"""
+        paths = list(paths)
+        targets = {}
+        for resolvers, keys in self._group_by_chain(paths):
+            found = await self._resolve_chain_many(resolvers, keys.values())
+            targets.update(zip(keys, found))
+        return [targets[path] for path in paths]
+
+    async def _resolve_chain_many(self, resolvers, paths) -> list[str | None]:
+        paths = list(paths)
+        targets = dict.fromkeys(paths)
+        pending = list(targets)
+        for resolver in resolvers:
+            if not pending:
+                break
+            if isinstance(resolver, AsyncBaseResolver):
+                found = await resolver.resolve_many(pending)
+            else:
+                found = await asyncio.to_thread(resolver.resolve_many, pending)
+            pending = self._collect(targets, pending, found)
+        return [targets[path] for path in paths]
+
+    async def _call_async_resolver(self, resolver, path: str) -> str | None:
+        if self.metrics is None:
+            return await resolver.resolve(path)
+        token = self.metrics.activate()
+        start = perf_counter()
+        try:
+            target = await resolver.resolve(path)
+        finally:
+            self.metrics.deactivate(token)
+        elapsed = perf_counter() - start
+        self.metrics.observe(resolver_name(resolver), "resolve", elapsed, target)
+        return target
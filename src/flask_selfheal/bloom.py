@@ -0,0 +1,133 @@
+from hashlib import blake2b
+from threading import Lock
+from time import monotonic
+import math
+
+
+class BloomFilter:
+    """Fixed-size set of strings that may report false positives
+
+    Sized so that after `capacity` additions, a string never added is
+    reported as present with probability `error_rate`. That takes about
+    1.2 bytes per entry at 1%, and 1.8 bytes at 0.1%.
+
+    :param capacity: expected number of entries
+    :param error_rate: false positive rate at `capacity` entries
+    """
+
+    def __init__(self, capacity: int, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _positions(self, value: str):
+        digest = blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, value: str) -> bool:
+        bits = self._bits
+        return all(bits[i >> 3] & (1 << (i & 7)) for i in self._positions(value))
+
+    def add(self, value: str) -> None:
+        bits = self._bits
+        for i in self._positions(value):
+            bits[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+
+class NegativeFilter:
+    """Remembers paths the resolver chain found no match for
+
+    Pass an instance to :class:`~flask_selfheal.SelfHeal` to answer repeated
+    hopeless 404s without running the resolvers, for a byte or two per path
+    (see :class:`BloomFilter`). Unlike a negative cache entry, a path can be
+    reported as remembered by mistake, at about `error_rate`.
+
+    Paths are added to the current generation of two. Once it holds
+    `capacity` paths, or after `max_age` seconds, the older generation is
+    dropped and a new one started, so every path is forgotten after at most
+    two generations, and slugs added since can heal it again. Call
+    :meth:`clear` to forget all paths at once.
+
+    :param capacity: paths per generation
+    :param error_rate: false positive rate of a full generation
+    :param max_age: seconds a generation is used for (``None`` to only
+        rotate when full)
+    """
+
+    def __init__(self, capacity=100_000, error_rate=0.01, max_age=3600):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_age = max_age
+
+        self.hits = 0
+        self.misses = 0
+        self.rotations = 0
+
+        self._lock = Lock()
+        self.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        current, previous = self._generations
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rotations": self.rotations,
+            "size": len(current) + len(previous),
+            "bytes": len(current._bits) + len(previous._bits),
+        }
+
+    def _new_generation(self) -> BloomFilter:
+        self._started = monotonic()
+        return BloomFilter(self.capacity, self.error_rate)
+
+    def _expired(self, generations=1) -> bool:
+        if self.max_age is None:
+            return False
+        return monotonic() - self._started > generations * self.max_age
+
+    def _rotate_if_due(self) -> None:
+        # Checked again under the lock, as another thread may have rotated
+        with self._lock:
+            current = self._generations[0]
+            if self._expired(2):
+                # Idle for so long that both generations are stale
+                self._generations = (self._new_generation(), self._new_generation())
+            elif self._expired() or len(current) >= self.capacity:
+                self._generations = (self._new_generation(), current)
+            else:
+                return
+            self.rotations += 1
+
+    def __contains__(self, path: str) -> bool:
+        if self._expired():
+            self._rotate_if_due()
+        # Rotation swaps the tuple as a whole, so this reads a consistent pair
+        current, previous = self._generations
+        found = path in current or path in previous
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def add(self, path: str) -> None:
+        if len(self._generations[0]) >= self.capacity or self._expired():
+            self._rotate_if_due()
+        with self._lock:
+            self._generations[0].add(path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations = (self._new_generation(), self._new_generation())
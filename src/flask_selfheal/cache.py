@@ -0,0 +1,293 @@
+from collections import OrderedDict
+from threading import Lock, local
+from time import monotonic, time
+import os
+import sqlite3
+
+#: Returned by :meth:`BaseCache.get` when nothing is cached for a path
+MISS = object()
+
+
+class BaseCache:
+    """Base class for all resolution cache backends
+
+    A backend maps a request path to the target slug the resolver chain
+    produced for it, or to ``None`` when the chain found no match.
+    """
+
+    #: Whether :meth:`get` and :meth:`set` may wait on I/O, in which case
+    #: :class:`~flask_selfheal.AsyncSelfHeal` calls them in a worker thread
+    blocking = True
+
+    hits = 0
+    misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get(self, path: str):
+        """Return the cached target for `path`, ``None`` for a cached
+        negative result, or :data:`MISS` if nothing valid is cached"""
+        raise NotImplementedError
+
+    def set(self, path: str, target: str | None) -> None:
+        """Cache the resolution of `path` (``None`` for no match)"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class ResolutionCache(BaseCache):
+    """Bounded in-process cache of resolver chain results
+
+    Caches both successful resolutions (path -> target slug) and negative
+    results (path -> ``None``), so repeated broken URLs skip the resolver
+    chain entirely. Entries are evicted least-recently-used first once the
+    cache is full, and expire after their TTL.
+
+    Positive and negative results are kept in separate LRUs, so a flood of
+    random scanner paths can only evict other negative results and never the
+    warm positive entries.
+
+    :param max_size: maximum number of cached positive resolutions
+    :param ttl: seconds a positive resolution stays valid (``None`` for no expiry)
+    :param negative_ttl: seconds a negative result stays valid (``None`` for no expiry)
+    :param negative_max_size: maximum number of cached negative results
+        (defaults to `max_size`)
+    """
+
+    blocking = False
+
+    def __init__(
+        self, max_size=1024, ttl=3600, negative_ttl=300, negative_max_size=None
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.negative_max_size = (
+            max_size if negative_max_size is None else negative_max_size
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._positive = OrderedDict()
+        self._negative = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._positive) + len(self._negative)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+    def get(self, path: str):
+        now = monotonic()
+        with self._lock:
+            for entries in (self._positive, self._negative):
+                entry = entries.get(path)
+                if entry is None:
+                    continue
+                target, expires = entry
+                if expires is not None and expires <= now:
+                    del entries[path]
+                    break
+                entries.move_to_end(path)
+                self.hits += 1
+                return target
+
+            self.misses += 1
+            return MISS
+
+    def set(self, path: str, target: str | None) -> None:
+        if target is None:
+            entries, ttl = self._negative, self.negative_ttl
+            max_size = self.negative_max_size
+        else:
+            entries, ttl = self._positive, self.ttl
+            max_size = self.max_size
+        if max_size <= 0:
+            return
+
+        expires = None if ttl is None else monotonic() + ttl
+        with self._lock:
+            # A path is only ever cached as either positive or negative
+            self._positive.pop(path, None)
+            self._negative.pop(path, None)
+
+            entries[path] = (target, expires)
+            while len(entries) > max_size:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._positive.clear()
+            self._negative.clear()
+
+
+class SQLiteCache(BaseCache):
+    """Resolution cache stored in a SQLite file shared by all local workers
+
+    Every worker process on a host can point at the same file, so a path is
+    resolved once and the result is read by all workers. The database runs in
+    WAL mode so readers never block each other.
+
+    :param filename: path of the SQLite database file
+    :param ttl: seconds a positive resolution stays valid (``None`` for no expiry)
+    :param negative_ttl: seconds a negative result stays valid (``None`` for no expiry)
+    :param max_size: maximum number of rows kept; expired and soonest-to-expire
+        rows are pruned once it is exceeded
+    :param prune_interval: number of writes between size checks
+    """
+
+    def __init__(
+        self,
+        filename,
+        ttl=3600,
+        negative_ttl=300,
+        max_size=100_000,
+        prune_interval=1000,
+    ):
+        self.filename = os.fspath(filename)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.prune_interval = prune_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = local()
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS selfheal_cache ("
+                "path TEXT PRIMARY KEY, target TEXT, expires REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross threads or survive a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.filename, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, path: str):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT target FROM selfheal_cache "
+                "WHERE path = ? AND (expires IS NULL OR expires > ?)",
+                (path, time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            self.misses += 1
+            return MISS
+        self.hits += 1
+        return row[0]
+
+    def set(self, path: str, target: str | None) -> None:
+        ttl = self.ttl if target else self.negative_ttl
+        expires = None if ttl is None else time() + ttl
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO selfheal_cache VALUES (?, ?, ?)",
+                (path, target, expires),
+            )
+
+        self._writes += 1
+        if self._writes % self.prune_interval == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete expired rows, then the soonest-to-expire rows over `max_size`"""
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM selfheal_cache WHERE expires <= ?",
+                (time(),),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM selfheal_cache").fetchone()
+            if count > self.max_size:
+                conn.execute(
+                    "DELETE FROM selfheal_cache WHERE rowid IN ("
+                    "SELECT rowid FROM selfheal_cache "
+                    "ORDER BY expires IS NULL, expires LIMIT ?)",
+                    (count - self.max_size,),
+                )
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM selfheal_cache")
+
+
+class RedisCache(BaseCache):
+    """Resolution cache stored in Redis, shared by workers across hosts
+
+    Works with any client exposing the ``redis-py`` methods ``get``,
+    ``set(..., ex=...)``, ``scan_iter`` and ``delete``. If no client is given,
+    one is created from `url` (this requires the ``redis`` package).
+
+    :param client: Redis client instance
+    :param url: Redis URL used to create a client when `client` is not given
+    :param prefix: prefix for all cache keys
+    :param ttl: seconds a positive resolution stays valid (``None`` for no expiry)
+    :param negative_ttl: seconds a negative result stays valid (``None`` for no expiry)
+    """
+
+    def __init__(
+        self,
+        client=None,
+        url="redis://localhost:6379/0",
+        prefix="selfheal:",
+        ttl=3600,
+        negative_ttl=300,
+    ):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError(
+                    "RedisCache requires the 'redis' package when no client is "
+                    "given (pip install flask-selfheal[redis])"
+                ) from e
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str):
+        value = self.client.get(self.prefix + path)
+        if value is None:
+            self.misses += 1
+            return MISS
+        self.hits += 1
+        if isinstance(value, bytes):
+            value = value.decode()
+        # Negative results are stored as an empty string
+        return value or None
+
+    def set(self, path: str, target: str | None) -> None:
+        ttl = self.ttl if target else self.negative_ttl
+        self.client.set(self.prefix + path, target or "", ex=ttl)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
@@ -0,0 +1,140 @@
+from inspect import isawaitable
+from itertools import islice
+from urllib.parse import unquote, urlsplit
+import asyncio
+import csv
+
+from flask import current_app
+from flask.cli import AppGroup
+import click
+
+from .lookup import build_lookup_table, read_alias_file, write_lookup_table
+
+cli = AppGroup("selfheal", help="Self-healing URL tools.")
+
+
+@cli.command("build-index")
+@click.argument("output", type=click.Path(dir_okay=False))
+def build_index(output):
+    """Precompute a redirect table for LookupTableResolver.
+
+    Writes the likely typos of every slug known to the app's SelfHeal
+    resolvers, including those of its sections, to OUTPUT.
+    """
+    selfheal = current_app.extensions["selfheal"]
+    resolvers = list(selfheal.resolvers)
+    for section in selfheal.sections:
+        resolvers.extend(section.resolvers)
+    if not resolvers:
+        raise click.UsageError("SelfHeal has no resolvers to build an index from")
+    count = build_lookup_table(output, resolvers)
+    click.echo(f"Wrote {count} entries to {output}")
+
+
+@cli.command("build-aliases")
+@click.argument("input", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.option(
+    "--format",
+    type=click.Choice(["csv", "jsonl", "json"]),
+    default=None,
+    help="Format of INPUT (defaults to its extension).",
+)
+@click.option(
+    "--chunk-size",
+    default=1_000_000,
+    show_default=True,
+    help="Number of entries sorted in memory at once.",
+)
+def build_aliases(input, output, format, chunk_size):
+    """Convert an alias map to a lookup table for LookupTableResolver.
+
+    INPUT maps old paths to targets, as CSV rows, JSON Lines or a JSON
+    object. It is streamed and sorted in chunks, so memory use does not grow
+    with its size.
+    """
+    try:
+        count = write_lookup_table(output, read_alias_file(input, format), chunk_size)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from None
+    click.echo(f"Wrote {count} entries to {output}")
+
+
+@cli.command("compact-hits")
+@click.option(
+    "--min-hits",
+    type=int,
+    default=None,
+    help="Heals before a path is promoted (defaults to the HitLog's min_hits).",
+)
+@click.option(
+    "--no-revalidate",
+    is_flag=True,
+    help="Keep promoted aliases without resolving them again.",
+)
+def compact_hits(min_hits, no_revalidate):
+    """Promote often healed paths from the hit log to static aliases.
+
+    Every alias is resolved again, so aliases whose target moved are updated
+    and those whose target is gone are removed.
+    """
+    selfheal = current_app.extensions["selfheal"]
+    if selfheal.hit_log is None:
+        raise click.UsageError("SelfHeal has no hit_log configured")
+
+    def revalidate(paths):
+        targets = selfheal.resolve_many(paths)
+        if isawaitable(targets):
+            targets = asyncio.run(targets)
+        return targets
+
+    promoted = selfheal.hit_log.compact(
+        min_hits, revalidate=None if no_revalidate else revalidate
+    )
+    click.echo(f"Promoted {promoted} paths to {selfheal.hit_log.aliases_filename}")
+
+
+@cli.command("resolve-file")
+@click.argument("input", type=click.File("r"))
+@click.argument("output", type=click.File("w"))
+@click.option(
+    "--batch-size",
+    default=1000,
+    show_default=True,
+    help="Number of lines resolved together.",
+)
+@click.option(
+    "--unresolved",
+    is_flag=True,
+    help="Also write paths that did not heal, with an empty target.",
+)
+def resolve_file(input, output, batch_size, unresolved):
+    """Heal every path in INPUT and write path,target CSV rows to OUTPUT.
+
+    INPUT has one path or URL per line (e.g. extracted from an access log).
+    It is read in batches, so memory use does not grow with its size. Use
+    "-" for stdin or stdout.
+    """
+    selfheal = current_app.extensions["selfheal"]
+    writer = csv.writer(output)
+    lines = (line.strip() for line in input)
+    total = healed = 0
+
+    while batch := list(islice(lines, batch_size)):
+        paths = list(
+            # Decoded like request paths, so "/caf%C3%A9" heals as it would live
+            dict.fromkeys(
+                unquote(urlsplit(line).path).strip("/") for line in batch if line
+            )
+        )
+        targets = selfheal.resolve_many(paths)
+        if isawaitable(targets):
+            targets = asyncio.run(targets)
+
+        for path, target in zip(paths, targets):
+            total += 1
+            healed += bool(target)
+            if target or unresolved:
+                writer.writerow([path, target or ""])
+
+    click.echo(f"Healed {healed} of {total} paths", err=True)
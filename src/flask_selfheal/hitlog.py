@@ -0,0 +1,271 @@
+from collections import Counter
+from contextlib import contextmanager
+from threading import Event, Lock, Thread
+import atexit
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .resolvers import AliasMappingResolver
+
+
+@contextmanager
+def _file_lock(filename: str, exclusive: bool):
+    """Hold an advisory lock on `filename` (a no-op without ``fcntl``)"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+class PromotedAliasResolver(AliasMappingResolver):
+    """The aliases promoted by a :class:`HitLog`, reloaded when its alias
+    file changes (see :meth:`warm`)"""
+
+    def __init__(self, hit_log: "HitLog"):
+        super().__init__({})
+        self.hit_log = hit_log
+        self._mtime = None
+        self.warm()
+
+    def warm(self) -> None:
+        """Reload the alias file if another process compacted the log"""
+        try:
+            mtime = os.stat(self.hit_log.aliases_filename).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            self._mtime = mtime
+            # Swapped in whole, so lookups never see a partial mapping
+            self.alias_map = self.hit_log.load_aliases()
+
+
+class HitLog:
+    """Append-only log of the paths :class:`~flask_selfheal.SelfHeal` healed
+
+    Each redirect served is buffered in memory and appended to `filename` in
+    batches by a background thread, so requests never wait for the disk.
+    Every batch is a single append, so several worker processes can share
+    one log.
+
+    :meth:`compact` (or ``flask selfheal compact-hits``) promotes the paths
+    healed at least `min_hits` times to `aliases_filename`, a JSON object
+    usable with :class:`~flask_selfheal.AliasMappingResolver`. ``SelfHeal``
+    looks those up before running its resolvers, so a hot fuzzy heal becomes
+    a dict lookup. Appends and compactions from any process are serialized
+    with a ``fcntl`` lock on `filename` + ``.lock``; where ``fcntl`` is
+    missing (Windows), only compact from one process at a time.
+
+    A promoted alias is served even after its target is gone, until it is
+    revalidated by :meth:`compact` (which the command does by default). To
+    remove one by hand, delete its entry from `aliases_filename`; processes
+    reload the file once it changes (see :meth:`PromotedAliasResolver.warm`).
+
+    :param filename: path of the log file
+    :param aliases_filename: path of the promoted aliases file (defaults to
+        `filename` with ``.aliases.json`` appended)
+    :param min_hits: number of heals before a path is promoted
+    :param flush_interval: seconds between writes of the buffer
+    :param buffer_size: number of buffered heals that triggers a write
+        before `flush_interval` has passed
+    """
+
+    def __init__(
+        self,
+        filename,
+        aliases_filename=None,
+        min_hits=3,
+        flush_interval=1.0,
+        buffer_size=1000,
+    ):
+        self.filename = os.fspath(filename)
+        self.aliases_filename = aliases_filename or f"{self.filename}.aliases.json"
+        self.min_hits = min_hits
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+        self._buffer: list[str] = []
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wakeup = Event()
+        self._thread = None
+        self._pid = None
+        self.resolver = PromotedAliasResolver(self)
+        atexit.register(self.flush)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "promoted": len(self.resolver.alias_map),
+        }
+
+    def record(self, path: str, target: str) -> None:
+        """Buffer one heal of `path` to `target`"""
+        if "\t" in path or "\n" in path or "\t" in target or "\n" in target:
+            # Cannot be written to the log (and not worth promoting)
+            self.dropped += 1
+            return
+        with self._lock:
+            self._buffer.append(f"{path}\t{target}\n")
+            self.recorded += 1
+            full = len(self._buffer) >= self.buffer_size
+        if self._thread is None or self._pid != os.getpid():
+            self._start()
+        if full:
+            self._wakeup.set()
+
+    def _start(self) -> None:
+        # Threads do not survive a fork, so each process starts its own
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._thread = Thread(target=self._run, name="selfheal-hitlog", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered heals to the log now"""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            with self._flush_lock:
+                self._append("".join(lines))
+                self.written += len(lines)
+
+    def _append(self, data: str) -> None:
+        # One write() on an O_APPEND file is not interleaved with others, and
+        # the shared lock keeps compact() from moving the file meanwhile
+        with _file_lock(f"{self.filename}.lock", exclusive=False):
+            self._write(data)
+
+    def _write(self, data: str) -> None:
+        fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data.encode())
+        finally:
+            os.close(fd)
+
+    def counts(self, filename=None) -> Counter:
+        """Count the logged heals per ``(path, target)``"""
+        counts = Counter()
+        try:
+            with open(
+                filename or self.filename, encoding="utf-8", errors="replace"
+            ) as log:
+                for line in log:
+                    fields = line.rstrip("\n").split("\t")
+                    if len(fields) == 2:
+                        counts[fields[0], fields[1]] += 1
+                    elif len(fields) == 3 and fields[2].isdigit():
+                        # Written back by compact() with its count
+                        counts[fields[0], fields[1]] += int(fields[2])
+        except FileNotFoundError:
+            pass
+        return counts
+
+    def top(self, n: int) -> list[str]:
+        """The `n` paths healed most often, most often first"""
+        hits = Counter()
+        for (path, _), count in self.counts().items():
+            hits[path] += count
+        return [path for path, _ in hits.most_common(n)]
+
+    def load_aliases(self) -> dict[str, str]:
+        """Read the promoted aliases"""
+        try:
+            with open(self.aliases_filename, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def compact(self, min_hits=None, revalidate=None) -> int:
+        """Promote paths healed at least `min_hits` times to the alias file
+
+        Each path is promoted with the target it was healed to most often.
+        The log is rewritten with the counts of the paths not promoted yet,
+        for every target. Heals logged while this runs go to a fresh log, and
+        are kept.
+
+        :param min_hits: number of heals before a path is promoted (defaults
+            to the log's `min_hits`)
+        :param revalidate: callable returning the current targets of a list
+            of paths, e.g. :meth:`SelfHeal.resolve_many
+            <flask_selfheal.SelfHeal.resolve_many>`; every alias is then
+            pointed at its current target, or dropped if there is none
+        :return: the number of aliases added or changed
+        """
+        min_hits = self.min_hits if min_hits is None else min_hits
+        self.flush()
+        lock = f"{self.filename}.lock"
+        # Appends from other processes wait until the log has been rewritten
+        with self._flush_lock, _file_lock(lock, exclusive=True):
+            # Later appends start a fresh log
+            compacting = f"{self.filename}.compacting"
+            try:
+                os.replace(self.filename, compacting)
+            except FileNotFoundError:
+                if revalidate is None:
+                    return 0
+                compacting = None
+            counts = self.counts(compacting) if compacting else Counter()
+
+            best = {}
+            for (path, target), count in counts.most_common():
+                best.setdefault(path, (target, count))
+
+            old_aliases = self.load_aliases()
+            aliases = dict(old_aliases)
+            for path, (target, count) in best.items():
+                if count >= min_hits:
+                    aliases[path] = target
+            if revalidate is not None and aliases:
+                paths = list(aliases)
+                targets = revalidate(paths)
+                aliases = {path: t for path, t in zip(paths, targets) if t}
+
+            remaining = [
+                f"{path}\t{target}\t{count}\n"
+                for (path, target), count in counts.items()
+                if path not in aliases and best[path][1] < min_hits
+            ]
+            self._write_aliases(aliases)
+            if remaining:
+                self._write("".join(remaining))
+            if compacting:
+                os.remove(compacting)
+        self.resolver.warm()
+        return sum(old_aliases.get(path) != target for path, target in aliases.items())
+
+    def _write_aliases(self, aliases: dict[str, str]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.aliases_filename))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(aliases, f, separators=(",", ":"))
+            os.replace(tmp, self.aliases_filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,564 @@
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+from itertools import chain
+import heapq
+import re
+import sys
+
+
+def trigrams(value: str) -> set[str]:
+    """Lowercased trigrams of `value`, padded so short strings have some too"""
+    padded = f"$${value.lower()}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def best_close_match(word: str, possibilities, cutoff=0.6) -> str | None:
+    """Return the single best close match for `word`, or None
+
+    Equivalent to ``get_close_matches(word, possibilities, n=1, cutoff=cutoff)``
+    (same scoring and the same tie-breaking on equal scores), but raises the
+    threshold as better matches are found so that most candidates are rejected
+    by the cheap upper bounds alone.
+    """
+    if not 0.0 <= cutoff <= 1.0:
+        raise ValueError(f"cutoff must be in [0.0, 1.0]: {cutoff!r}")
+
+    s = SequenceMatcher()
+    s.set_seq2(word)
+    best_score, best = cutoff, None
+    for x in possibilities:
+        s.set_seq1(x)
+        if (
+            s.real_quick_ratio() >= best_score
+            and s.quick_ratio() >= best_score
+            and s.ratio() >= best_score
+        ):
+            score = s.ratio()
+            if best is None or (score, x) > (best_score, best):
+                best_score, best = score, x
+    return best
+
+
+class Normalizer:
+    """Single-pass, longest-match-first text replacement
+
+    Compiled once from a ``{token: replacement}`` mapping and then applied to
+    lowercased values in one pass. At each position the longest matching
+    token wins, and replacements are never rescanned, so the result does not
+    depend on the order of the mapping.
+
+    Multi-character tokens are replaced with one precompiled regex and
+    single characters with :meth:`str.translate`, which gives the same result
+    as long as no multi-character replacement contains a single-character
+    token; otherwise everything goes through the regex.
+
+    :param replacements: dict of token -> replacement
+    """
+
+    def __init__(self, replacements: dict[str, str]):
+        self.replacements = {token: new for token, new in replacements.items() if token}
+        singles = {t: new for t, new in self.replacements.items() if len(t) == 1}
+        tokens = [token for token in self.replacements if len(token) > 1]
+        if any(char in singles for t in tokens for char in self.replacements[t]):
+            singles, tokens = {}, list(self.replacements)
+
+        self._table = str.maketrans(singles) if singles else None
+        self._pattern = None
+        if tokens:
+            tokens.sort(key=len, reverse=True)
+            self._pattern = re.compile(f"({'|'.join(map(re.escape, tokens))})")
+
+    def __call__(self, value: str) -> str:
+        value = value.lower()
+        if self._pattern is not None:
+            # Odd items of the split are the matched tokens
+            parts = self._pattern.split(value)
+            parts[1::2] = map(self.replacements.__getitem__, parts[1::2])
+            value = "".join(parts)
+        if self._table is not None:
+            value = value.translate(self._table)
+        return value
+
+
+class TrigramIndex:
+    """Trigram inverted index over a fixed list of candidate strings
+
+    Built once up front, the index can shortlist the few candidates that share
+    the most trigrams with a query, so only those need to be scored with
+    :mod:`difflib`. Typos, truncations and transpositions leave most trigrams
+    intact, which makes the shortlist a very good proxy for the full scan.
+
+    The shortlist is an approximation: a candidate can score above the
+    cutoff while sharing fewer trigrams than the ones shortlisted, and then
+    it is missed. Corpora no larger than the shortlist are scored in full,
+    so the result there is identical to :func:`difflib.get_close_matches`.
+    Queries sharing no trigram with any candidate (mostly scanner noise such
+    as ``.env``) are only scored in full against small corpora, up to
+    `full_scan_factor` times the shortlist; larger ones find no match.
+
+    Candidates can be added and removed after construction; removed ones are
+    only marked as such and skipped when shortlisting.
+
+    :param candidates: List of valid slugs or routes
+    :param shortlist_size: Number of candidates to score exactly per query
+    """
+
+    #: Multiple of the shortlist size up to which a query sharing no trigram
+    #: is still scored against every candidate
+    full_scan_factor = 20
+
+    def __init__(self, candidates, shortlist_size=50):
+        self.candidates = []
+        self.shortlist_size = shortlist_size
+        self._members = set()
+        self._postings: dict[str, array] = {}
+        self._sizes = array("I")
+        self._removed = 0
+
+        for candidate in candidates:
+            self._append(candidate)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def _append(self, candidate: str) -> None:
+        idx = len(self.candidates)
+        grams = trigrams(candidate)
+        self.candidates.append(candidate)
+        self._members.add(candidate)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(idx)
+
+    def add(self, candidate: str) -> None:
+        if candidate not in self._members:
+            self._append(candidate)
+
+    def discard(self, candidate: str) -> None:
+        if candidate in self._members:
+            self._members.discard(candidate)
+            self._removed += 1
+
+    def shortlist(self, query: str, limit=None) -> list[str]:
+        """Return up to `limit` candidates ranked by trigram similarity"""
+        limit = limit or self.shortlist_size
+        grams = trigrams(query)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+
+        # Trigrams shared by a large part of the corpus barely change the ranking
+        # but dominate the counting cost, so skip them while rarer ones remain.
+        common = max(limit, len(self.candidates) // 50)
+        rare = [p for p in postings if len(p) <= common]
+        counts = Counter(chain.from_iterable(rare if rare else postings))
+        if not counts:
+            return []
+
+        total, sizes = len(grams), self._sizes
+        top = heapq.nlargest(
+            limit + min(self._removed, limit),
+            counts.items(),
+            key=lambda item: item[1] / (total + sizes[item[0]]),
+        )
+        members = self._members
+        found = [self.candidates[idx] for idx, _ in top]
+        return [candidate for candidate in found if candidate in members][:limit]
+
+    def best_match(self, query: str, cutoff=0.6) -> str | None:
+        """Return the closest candidate scoring at least `cutoff`, or None"""
+        if query in self._members:
+            return query
+        shortlist = None
+        if len(self._members) > self.shortlist_size:
+            shortlist = self.shortlist(query)
+        if not shortlist:
+            # No trigram in common does not rule out a close match, e.g.
+            # "xabycdzefw" and "qabrcdsefu" score 0.6, but scanning a large
+            # corpus for every bot 404 would be a linear scan per request
+            if len(self._members) > self.shortlist_size * self.full_scan_factor:
+                return None
+            shortlist = list(self._members)
+        return best_close_match(query, shortlist, cutoff)
+
+
+class SubstringIndex:
+    """Multi-pattern substring search over a fixed list of strings
+
+    Answers "which strings contain any of these needles, first one first"
+    for many needles at once. All strings are lowercased and joined into a
+    single string, and every trigram is mapped to the (ascending) positions
+    of the strings containing it. A needle can then only occur in the strings
+    listed under its rarest trigram, so only those few are checked, instead
+    of scanning the whole corpus once per needle. Needles shorter than a
+    trigram fall back to a C-level scan of the joined string.
+
+    Matching is case-insensitive. The trigram postings are built on first use.
+
+    :param strings: strings to search, in the order results are ranked by
+    """
+
+    def __init__(self, strings):
+        lowered = [string.lower() for string in strings]
+        self._blob = "\n".join(lowered)
+        self._starts = array("Q")
+        offset = 0
+        for string in lowered:
+            self._starts.append(offset)
+            offset += len(string) + 1
+        self._starts.append(offset)
+        self._postings = None
+
+    def __len__(self) -> int:
+        return len(self._starts) - 1
+
+    def _build_postings(self) -> dict[str, array]:
+        postings = {}
+        for idx, string in enumerate(self._blob.split("\n") if len(self) else ()):
+            for gram in {string[i : i + 3] for i in range(len(string) - 2)}:
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array("I")
+                ids.append(idx)
+        self._postings = postings
+        return postings
+
+    def iter_containing(self, needle: str):
+        """Positions of the strings containing `needle`, in ascending order"""
+        if not needle or "\n" in needle:
+            return
+        needle = needle.lower()
+        blob, starts = self._blob, self._starts
+
+        if len(needle) < 3:
+            pos = blob.find(needle)
+            while pos != -1:
+                idx = bisect_right(starts, pos) - 1
+                yield idx
+                pos = blob.find(needle, starts[idx + 1])
+            return
+
+        postings = self._postings or self._build_postings()
+        rarest = None
+        for i in range(len(needle) - 2):
+            ids = postings.get(needle[i : i + 3])
+            if ids is None:
+                return
+            if rarest is None or len(ids) < len(rarest):
+                rarest = ids
+        for idx in rarest:
+            if blob.find(needle, starts[idx], starts[idx + 1]) != -1:
+                yield idx
+
+    def first_containing(self, needles, exclude=None) -> int | None:
+        """Position of the first string containing any of `needles`
+
+        :param exclude: optional predicate; positions it accepts are skipped
+        """
+        best = None
+        for needle in needles:
+            for idx in self.iter_containing(needle):
+                if best is not None and idx >= best:
+                    break
+                if exclude is None or not exclude(idx):
+                    best = idx
+                    break
+        return best
+
+    def containing_any(self, needles) -> list[int]:
+        """Positions of all strings containing any of `needles`, ascending"""
+        found = set()
+        for needle in needles:
+            found.update(self.iter_containing(needle))
+        return sorted(found)
+
+
+class SlugSnapshot:
+    """Compact in-memory copy of a slug column
+
+    Answers the same questions the :class:`~flask_selfheal.DatabaseResolver`
+    stages ask the database, without a round trip. "First slug containing any
+    of these needles" is answered by a :class:`SubstringIndex`, so it only
+    checks the few slugs that could contain them. Like ``LIKE`` on SQLite and
+    MySQL, containment is case-insensitive while exact matches are
+    case-sensitive.
+
+    Slugs added or removed after construction are kept in a small overlay on
+    top of the index (see :attr:`pending`); rebuild the snapshot from itself
+    once the overlay grows large.
+
+    :param slugs: slugs in the order the database would return them
+    """
+
+    def __init__(self, slugs):
+        self.slugs = [sys.intern(slug) for slug in slugs if slug]
+        self._members = set(self.slugs)
+        self._substrings = SubstringIndex(self.slugs)
+
+        self._added: list[str] = []
+        self._added_lower: list[str] = []
+        self._removed: set[str] = set()
+        self._fuzzy_index = None
+        self._normalized = None
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._members
+
+    def __iter__(self):
+        removed = self._removed
+        for slug in chain(self.slugs, list(self._added)):
+            if slug not in removed:
+                yield slug
+
+    @property
+    def pending(self) -> int:
+        """Number of changes applied since the snapshot was built"""
+        return len(self._added) + len(self._removed)
+
+    def add(self, slug: str) -> None:
+        """Add `slug`, ordered after all existing slugs"""
+        if not slug or slug in self._members:
+            return
+        if slug in self._removed:
+            self._removed.discard(slug)
+        else:
+            self._added.append(sys.intern(slug))
+            self._added_lower.append(slug.lower())
+        self._members.add(slug)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.add(slug)
+        if self._normalized is not None:
+            normalize, table, shared = self._normalized
+            key = normalize(slug)
+            first = table.setdefault(key, slug)
+            if first != slug:
+                shared.setdefault(key, [first]).append(slug)
+
+    def discard(self, slug: str) -> None:
+        if slug not in self._members:
+            return
+        self._members.discard(slug)
+        self._removed.add(slug)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.discard(slug)
+        if self._normalized is not None:
+            normalize, table, shared = self._normalized
+            key = normalize(slug)
+            group = shared.get(key)
+            if group is None:
+                if table.get(key) == slug:
+                    del table[key]
+            else:
+                # The next slug with the same normalized form takes over
+                group.remove(slug)
+                table[key] = group[0]
+                if len(group) == 1:
+                    del shared[key]
+
+    def _is_removed(self, idx: int) -> bool:
+        return self.slugs[idx] in self._removed
+
+    def _first_index(self, needles) -> int | None:
+        idx = self._substrings.first_containing(
+            needles, self._is_removed if self._removed else None
+        )
+        if idx is not None:
+            return idx
+
+        needles = [needle.lower() for needle in needles if needle]
+        for offset, slug in enumerate(self._added_lower):
+            if (
+                any(needle in slug for needle in needles)
+                and self._added[offset] not in self._removed
+            ):
+                return len(self.slugs) + offset
+        return None
+
+    def _slug_at(self, idx: int) -> str:
+        if idx < len(self.slugs):
+            return self.slugs[idx]
+        return self._added[idx - len(self.slugs)]
+
+    def first_containing(self, *needles: str) -> str | None:
+        """Return the first slug that contains any of `needles`"""
+        idx = self._first_index(needles)
+        return None if idx is None else self._slug_at(idx)
+
+    def first_containing_ranked(self, needles) -> str | None:
+        """Return the first slug containing the highest ranked needle that
+        occurs anywhere, trying `needles` in order"""
+        for needle in needles:
+            idx = self._first_index((needle,))
+            if idx is not None:
+                return self._slug_at(idx)
+        return None
+
+    def first_normalized(self, value: str, normalize) -> str | None:
+        """Return the first slug that `normalize` maps to `value`
+
+        The normalized form of every slug is computed once per `normalize`
+        and then kept up to date. Forms shared by several slugs also keep the
+        list of those slugs, so removing the first one needs no rebuild.
+        """
+        cached = self._normalized
+        if cached is None or cached[0] is not normalize:
+            table, shared = {}, {}
+            for slug in self:
+                key = normalize(slug)
+                first = table.setdefault(key, slug)
+                if first != slug:
+                    shared.setdefault(key, [first]).append(slug)
+            cached = self._normalized = (normalize, table, shared)
+        return cached[1].get(value)
+
+    def build_indexes(self, normalize=None, fuzzy=True) -> None:
+        """Build the indexes otherwise built on first use, e.g. before the
+        snapshot is handed to readers
+
+        :param normalize: normalization function used with
+            :meth:`first_normalized`
+        :param fuzzy: whether to build the index used by :meth:`best_match`
+        """
+        if self._substrings._postings is None:
+            self._substrings._build_postings()
+        if normalize is not None:
+            self.first_normalized("", normalize)
+        if fuzzy and self._fuzzy_index is None:
+            self._fuzzy_index = TrigramIndex(self)
+
+    def best_match(self, query: str, cutoff=0.6) -> str | None:
+        """Return the closest slug by :mod:`difflib` similarity, or None"""
+        if self._fuzzy_index is None:
+            self._fuzzy_index = TrigramIndex(self)
+        return self._fuzzy_index.best_match(query, cutoff)
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance between `a` and `b`
+
+    Counts insertions, deletions, substitutions and transpositions of adjacent
+    characters. Returns ``max_distance + 1`` as soon as the distance is known
+    to exceed `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        ca, ca_prev = a[i - 1], a[i - 2] if i > 1 else None
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if j > 1 and ca == b[j - 2] and ca_prev == cb:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    return min(previous[-1], max_distance + 1)
+
+
+class DeletionIndex:
+    """SymSpell-style symmetric deletion index for bounded edit distance lookups
+
+    Two strings within `max_distance` edits of each other always share a
+    "delete variant" (the string with up to `max_distance` characters removed)
+    of their first `prefix_length` characters, and likewise of their last
+    `prefix_length` characters. Those variants are precomputed for every
+    candidate, so a lookup only generates the variants of the query's own
+    prefix and suffix and verifies the few candidates found under both,
+    instead of comparing against the whole list.
+
+    Ties on distance go to the candidate listed first.
+
+    :param candidates: List of valid slugs or routes
+    :param max_distance: maximum number of edits between a query and its match
+    :param prefix_length: number of leading (and trailing) characters that are
+        indexed; longer prefixes give shorter candidate lists at the cost of
+        memory
+    """
+
+    def __init__(self, candidates, max_distance=2, prefix_length=7):
+        if prefix_length <= max_distance:
+            raise ValueError("prefix_length must be greater than max_distance")
+
+        self.candidates = list(candidates)
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._positions = {}
+        self._prefixes: dict[str, array] = {}
+        self._suffixes: dict[str, array] = {}
+
+        for idx, candidate in enumerate(self.candidates):
+            self._positions.setdefault(candidate, idx)
+            for deletes, part in (
+                (self._prefixes, candidate[:prefix_length]),
+                (self._suffixes, candidate[-prefix_length:]),
+            ):
+                for variant in self._variants(part):
+                    postings = deletes.get(variant)
+                    if postings is None:
+                        postings = deletes[variant] = array("I")
+                    postings.append(idx)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def _variants(self, value: str) -> set[str]:
+        """`value` with every combination of up to `max_distance` deletions"""
+        variants = {value}
+        frontier = {value}
+        for _ in range(self.max_distance):
+            frontier = {
+                word[:i] + word[i + 1 :] for word in frontier for i in range(len(word))
+            }
+            variants |= frontier
+        return variants
+
+    def _shortlist(self, query: str) -> list[int]:
+        """Indexes of the candidates sharing a prefix and a suffix variant"""
+        sides = []
+        for deletes, part in (
+            (self._prefixes, query[: self.prefix_length]),
+            (self._suffixes, query[-self.prefix_length :]),
+        ):
+            postings = [deletes[v] for v in self._variants(part) if v in deletes]
+            sides.append((sum(map(len, postings)), postings))
+
+        # Collect the smaller side, then filter it by streaming the larger one
+        (_, smaller), (_, larger) = sorted(sides, key=lambda side: side[0])
+        found = set(chain.from_iterable(smaller))
+        if found:
+            found = found.intersection(chain.from_iterable(larger))
+        return sorted(found)
+
+    def lookup(self, query: str) -> tuple[str, int] | None:
+        """Return the closest candidate and its distance, or None"""
+        idx = self._positions.get(query)
+        if idx is not None:
+            return self.candidates[idx], 0
+
+        best_distance, best_idx = self.max_distance + 1, None
+        for idx in self._shortlist(query):
+            distance = edit_distance(query, self.candidates[idx], best_distance)
+            # Candidates come in list order, so ties keep the earlier one
+            if distance < best_distance:
+                best_distance, best_idx = distance, idx
+
+        if best_idx is None:
+            return None
+        return self.candidates[best_idx], best_distance
@@ -0,0 +1,450 @@
+from array import array
+from contextlib import ExitStack
+from itertools import groupby, islice
+from mmap import ACCESS_READ, mmap
+from operator import itemgetter
+from zlib import crc32
+import csv
+import heapq
+import json
+import os
+import shutil
+import struct
+import tempfile
+
+#: First bytes of every lookup table file
+MAGIC = b"SHLOOKUP"
+
+#: Last bytes of lookup table files that end in a hash table
+HASH_MAGIC = b"SHHASH\0\0"
+
+# Magic, key count, distinct value count
+_HEADER = struct.Struct("=8sQQ")
+
+# Hash table slot count, magic
+_TRAILER = struct.Struct("=Q8s")
+
+# Key length, target length of a record in a sorted run
+_RECORD = struct.Struct("=II")
+
+
+class LookupTable:
+    """Read-only, memory-mapped table of path -> target mappings
+
+    The file (see :func:`write_lookup_table`) is mapped into memory rather
+    than read, so opening it is instant and every worker process on a host
+    shares the same pages. Keys are stored sorted, and looked up through a
+    hash table at the end of the file (by binary search in files written
+    without one); each distinct target is stored once.
+
+    Files are written in the native byte order and are not meant to be moved
+    between machines of different architectures.
+
+    :param filename: path of a file written by :func:`write_lookup_table`
+    """
+
+    def __init__(self, filename):
+        self.filename = os.fspath(filename)
+        with open(self.filename, "rb") as f:
+            self._mmap = mmap(f.fileno(), 0, access=ACCESS_READ)
+
+        magic, key_count, value_count = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.filename} is not a lookup table file")
+
+        self._view = memoryview(self._mmap)
+        pos = _HEADER.size
+        self._key_offsets = self._view[pos : pos + 8 * (key_count + 1)].cast("Q")
+        pos += 8 * (key_count + 1)
+        self._value_ids = self._view[pos : pos + 4 * key_count].cast("I")
+        pos += 4 * key_count
+        pos += -pos % 8
+        self._value_offsets = self._view[pos : pos + 8 * (value_count + 1)].cast("Q")
+        pos += 8 * (value_count + 1)
+        self._keys_start = pos
+        self._values_start = pos + self._key_offsets[key_count]
+
+        self._table = None
+        size = len(self._mmap)
+        if size >= pos + _TRAILER.size:
+            slots, magic = _TRAILER.unpack_from(self._mmap, size - _TRAILER.size)
+            if magic == HASH_MAGIC:
+                table_start = size - _TRAILER.size - 4 * slots
+                self._table = self._view[table_start : size - _TRAILER.size].cast("I")
+
+    def __len__(self) -> int:
+        return len(self._value_ids)
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key.encode()) is not None
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self._key(idx).decode()
+
+    def items(self):
+        for idx in range(len(self)):
+            yield self._key(idx).decode(), self._value(self._value_ids[idx])
+
+    def values(self):
+        """Every distinct target, once"""
+        for value_id in range(len(self._value_offsets) - 1):
+            yield self._value(value_id)
+
+    def get(self, key: str, default=None) -> str | None:
+        idx = self._find(key.encode())
+        if idx is None:
+            return default
+        return self._value(self._value_ids[idx])
+
+    def _key(self, idx: int) -> bytes:
+        start = self._keys_start
+        return self._mmap[
+            start + self._key_offsets[idx] : start + self._key_offsets[idx + 1]
+        ]
+
+    def _value(self, value_id: int) -> str:
+        start = self._values_start
+        return self._mmap[
+            start + self._value_offsets[value_id] : start
+            + self._value_offsets[value_id + 1]
+        ].decode()
+
+    def _find(self, needle: bytes) -> int | None:
+        table = self._table
+        if table is not None:
+            mask = len(table) - 1
+            slot = crc32(needle) & mask
+            while entry := table[slot]:
+                if self._key(entry - 1) == needle:
+                    return entry - 1
+                slot = (slot + 1) & mask
+            return None
+
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self._key(mid)
+            if probe < needle:
+                lo = mid + 1
+            elif probe > needle:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def close(self) -> None:
+        if self._table is not None:
+            self._table.release()
+        for view in (
+            self._key_offsets,
+            self._value_ids,
+            self._value_offsets,
+            self._view,
+        ):
+            view.release()
+        self._mmap.close()
+
+
+def _write_run(f, entries) -> None:
+    for key, target in entries:
+        f.write(_RECORD.pack(len(key), len(target)))
+        f.write(key)
+        f.write(target)
+
+
+def _read_run(f):
+    f.seek(0)
+    while header := f.read(_RECORD.size):
+        key_length, target_length = _RECORD.unpack(header)
+        yield f.read(key_length), f.read(target_length)
+
+
+def _sorted_pairs(items, chunk_size: int, directory: str):
+    """Yield the ``(key, target)`` pairs of `items` as bytes, sorted by key;
+    pairs with the same key stay in input order
+
+    Sorts `chunk_size` pairs at a time in memory, spilling each sorted chunk
+    to a temporary file and merging them, so memory use does not grow with
+    the number of pairs. Nothing is yielded before `items` is exhausted.
+    """
+    items = iter(items)
+    with ExitStack() as stack:
+        runs = []
+        while True:
+            chunk = [
+                (key.encode(), target.encode())
+                for key, target in islice(items, chunk_size)
+            ]
+            # Stable, so equal keys keep their order
+            chunk.sort(key=itemgetter(0))
+            if not runs and len(chunk) < chunk_size:
+                # Everything fit into one chunk
+                yield from chunk
+                return
+            if chunk:
+                run = stack.enter_context(tempfile.TemporaryFile(dir=directory))
+                _write_run(run, chunk)
+                runs.append(run)
+            if len(chunk) < chunk_size:
+                break
+            del chunk
+
+        # Equal keys are taken from earlier runs first
+        yield from heapq.merge(*map(_read_run, runs), key=itemgetter(0))
+
+
+def _sorted_unique(items, chunk_size: int, directory: str):
+    """Like :func:`_sorted_pairs`, keeping the last target given for each key"""
+    pairs = _sorted_pairs(items, chunk_size, directory)
+    for key, group in groupby(pairs, key=itemgetter(0)):
+        for _, target in group:
+            pass
+        yield key, target
+
+
+def _hash_slots(key_count: int) -> int:
+    """Number of hash table slots for `key_count` keys, at most half full"""
+    return 1 << max(3, (2 * key_count).bit_length())
+
+
+def write_lookup_table(filename, items, chunk_size=1_000_000) -> int:
+    """Write ``(key, target)`` pairs to `filename` as a lookup table file
+
+    Later pairs override earlier ones with the same key. `items` is consumed
+    as a stream and sorted `chunk_size` pairs at a time, with sorted chunks
+    spilled to temporary files next to `filename`, so tables larger than
+    memory can be built; only the distinct targets are kept in memory. The
+    file is written next to `filename` and then renamed over it, so readers
+    that already have the old file open keep seeing it in full.
+
+    Returns the number of keys written.
+    """
+    filename = os.fspath(filename)
+    directory = os.path.dirname(filename) or "."
+    return _write_table(filename, _sorted_unique(items, chunk_size, directory))
+
+
+def _write_table(filename: str, entries) -> int:
+    """Write the ``(key, target)`` byte pairs `entries`, sorted by key and
+    with distinct keys, to `filename`"""
+    directory = os.path.dirname(filename) or "."
+    value_ids = {}
+    value_offsets = array("Q", [0])
+    key_count = key_end = 0
+    with ExitStack() as stack:
+        offsets_file, ids_file, keys_file, values_file = (
+            stack.enter_context(tempfile.TemporaryFile(dir=directory)) for _ in range(4)
+        )
+        key_offsets, ids = array("Q", [0]), array("I")
+        for key, target in entries:
+            keys_file.write(key)
+            key_end += len(key)
+            key_offsets.append(key_end)
+            value_id = value_ids.get(target)
+            if value_id is None:
+                value_id = value_ids[target] = len(value_ids)
+                values_file.write(target)
+                value_offsets.append(value_offsets[-1] + len(target))
+            ids.append(value_id)
+            key_count += 1
+            if len(ids) >= 65536:
+                key_offsets.tofile(offsets_file)
+                ids.tofile(ids_file)
+                key_offsets, ids = array("Q"), array("I")
+        key_offsets.tofile(offsets_file)
+        ids.tofile(ids_file)
+
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w+b") as f:
+                f.write(_HEADER.pack(MAGIC, key_count, len(value_ids)))
+                for part in (offsets_file, ids_file):
+                    part.seek(0)
+                    shutil.copyfileobj(part, f)
+                f.write(b"\0" * (-f.tell() % 8))
+                f.write(value_offsets.tobytes())
+                keys_start = f.tell()
+                for part in (keys_file, values_file):
+                    part.seek(0)
+                    shutil.copyfileobj(part, f)
+                _write_hash_table(f, key_count, keys_start)
+            os.replace(tmp, filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return key_count
+
+
+def _write_hash_table(f, key_count: int, keys_start: int) -> None:
+    """Append the hash table over the keys already written to `f`
+
+    Each slot holds the index of a key plus one (zero for empty); collisions
+    go to the next slot.
+    """
+    f.write(b"\0" * (-f.tell() % 8))
+    slots = _hash_slots(key_count)
+    table_start = f.tell()
+    f.truncate(table_start + 4 * slots)
+    f.seek(0, os.SEEK_END)
+    f.write(_TRAILER.pack(slots, HASH_MAGIC))
+    f.flush()
+
+    # Filled in place, so the table never has to fit in memory
+    with mmap(f.fileno(), 0) as mapped:
+        view = memoryview(mapped)
+        offsets = view[_HEADER.size : _HEADER.size + 8 * (key_count + 1)].cast("Q")
+        buckets = view[table_start : table_start + 4 * slots].cast("I")
+        try:
+            mask = slots - 1
+            for idx in range(key_count):
+                key = mapped[keys_start + offsets[idx] : keys_start + offsets[idx + 1]]
+                slot = crc32(key) & mask
+                while buckets[slot]:
+                    slot = (slot + 1) & mask
+                buckets[slot] = idx + 1
+        finally:
+            for part in (offsets, buckets, view):
+                part.release()
+
+
+def read_alias_file(filename, format=None):
+    """Stream the ``(old path, target)`` pairs of an alias file
+
+    Supported formats are ``"csv"`` (two columns per row), ``"jsonl"`` (a
+    ``["old", "new"]`` array or ``{"old": "new"}`` object per line) and
+    ``"json"`` (one object mapping old paths to targets, which is loaded at
+    once). By default the format is taken from the file extension. Leading
+    and trailing slashes are stripped from old paths, as from request paths.
+    A CSV header row (``old,new`` or similar) is skipped.
+
+    :raises ValueError: on a malformed row, with its line number
+    """
+    filename = os.fspath(filename)
+    if format is None:
+        format = os.path.splitext(filename)[1].lstrip(".").lower()
+        format = {"ndjson": "jsonl", "txt": "csv"}.get(format, format)
+    if format not in ("csv", "jsonl", "json"):
+        raise ValueError(f"Unsupported alias file format: {format!r}")
+
+    with open(filename, encoding="utf-8", newline="") as f:
+        if format == "csv":
+            pairs = _read_csv(f)
+        elif format == "jsonl":
+            pairs = _read_json_lines(f)
+        else:
+            pairs = ((None, pair) for pair in json.load(f).items())
+        for line_number, entry in pairs:
+            try:
+                old, target = entry
+                if not isinstance(old, str) or not isinstance(target, str):
+                    raise TypeError
+            except (TypeError, ValueError):
+                where = f"line {line_number}" if line_number else "entry"
+                raise ValueError(
+                    f"{filename}: {where}: expected an old path and a target, "
+                    f"got {entry!r}"
+                ) from None
+            yield old.strip("/"), target
+
+
+# First-column names treated as a CSV header rather than an alias
+_CSV_HEADERS = {"old", "old_path", "old_url", "from", "path", "source", "url"}
+
+
+def _read_csv(f):
+    reader = csv.reader(f)
+    for row in reader:
+        if not row:
+            continue
+        if reader.line_num == 1 and row[0].strip().lower() in _CSV_HEADERS:
+            continue
+        yield reader.line_num, row
+
+
+def _read_json_lines(f):
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{f.name}: line {line_number}: {e}") from None
+        if isinstance(entry, dict):
+            for pair in entry.items():
+                yield line_number, pair
+        else:
+            yield line_number, entry
+
+
+def typo_variants(slug: str, normalizations=None) -> set[str]:
+    """Likely broken forms of `slug` that should heal to it
+
+    Covers single deleted characters, swapped adjacent characters, trailing
+    words cut off, other word separators, and (if given) the typos that the
+    ``{typo: correct}`` `normalizations` would correct back to `slug`.
+    """
+    variants = set()
+    for i in range(len(slug)):
+        variants.add(slug[:i] + slug[i + 1 :])
+        if i + 1 < len(slug) and slug[i] != slug[i + 1]:
+            variants.add(slug[:i] + slug[i + 1] + slug[i] + slug[i + 2 :])
+
+    words = slug.split("-")
+    for end in range(1, len(words)):
+        truncated = "-".join(words[:end])
+        if len(truncated) >= 4:
+            variants.add(truncated)
+    if len(words) > 1:
+        variants.add("_".join(words))
+        variants.add("".join(words))
+
+    # Normalizations match case-insensitively; the rest keeps the slug's case
+    lowered = slug.lower()
+    original = slug if len(lowered) == len(slug) else lowered
+    for typo, correct in (normalizations or {}).items():
+        start = lowered.find(correct)
+        while start != -1:
+            variants.add(original[:start] + typo + original[start + len(correct) :])
+            start = lowered.find(correct, start + 1)
+
+    variants.discard(slug)
+    return variants
+
+
+def build_lookup_table(filename, resolvers, chunk_size=1_000_000) -> int:
+    """Precompute the typo variants of every slug known to `resolvers`
+
+    Walks each resolver's :meth:`~flask_selfheal.resolvers.BaseResolver.known_slugs`,
+    generates their :func:`typo_variants` and writes the variants that point
+    to exactly one slug (and are not slugs themselves) to `filename`.
+
+    The variants are streamed through the same external sort as in
+    :func:`write_lookup_table`, so only the slugs are kept in memory.
+
+    Returns the number of entries written.
+    """
+    filename = os.fspath(filename)
+    directory = os.path.dirname(filename) or "."
+    known = set()
+
+    def variants():
+        for resolver in resolvers:
+            normalizations = getattr(resolver, "normalizations", None)
+            for slug in resolver.known_slugs():
+                known.add(slug.encode())
+                for variant in typo_variants(slug, normalizations):
+                    yield variant, slug
+
+    def unambiguous(pairs):
+        # Sorting consumes every variant first, so `known` is complete here
+        for variant, group in groupby(pairs, key=itemgetter(0)):
+            slugs = {slug for _, slug in group}
+            # Ambiguous variants are left to the live resolvers
+            if len(slugs) == 1 and variant not in known:
+                yield variant, slugs.pop()
+
+    return _write_table(
+        filename, unambiguous(_sorted_pairs(variants(), chunk_size, directory))
+    )
@@ -0,0 +1,167 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from time import perf_counter
+from weakref import WeakSet
+
+from flask import g, has_request_context
+from sqlalchemy import event
+
+_current_metrics: ContextVar["Metrics | None"] = ContextVar(
+    "flask_selfheal_metrics", default=None
+)
+_query_count: ContextVar[list[int] | None] = ContextVar(
+    "flask_selfheal_query_count", default=None
+)
+_counted_engines = WeakSet()
+
+
+def current_metrics() -> "Metrics | None":
+    """Return the :class:`Metrics` collecting for the current resolution, if any"""
+    return _current_metrics.get()
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def _count_queries_on(session) -> None:
+    """Make sure queries issued through `session`'s engine are counted"""
+    engine = session.get_bind()
+    engine = getattr(engine, "engine", engine)
+    if engine not in _counted_engines:
+        event.listen(engine, "before_cursor_execute", _count_query)
+        _counted_engines.add(engine)
+
+
+def resolver_name(resolver) -> str:
+    """Label used for `resolver` in metrics (its ``name`` or class name)"""
+    return getattr(resolver, "name", None) or type(resolver).__name__
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    hits: int = 0
+    seconds: float = 0.0
+    queries: int = 0
+
+
+class Metrics:
+    """Latency, hit rate and query counts for the 404 healing path
+
+    Pass an instance to :class:`~flask_selfheal.SelfHeal` to record, for every
+    resolution, how long each resolver took and whether it matched (stage
+    ``"resolve"``), as well as each :class:`~flask_selfheal.DatabaseResolver`
+    stage (``"exact"``, ``"contains"``, ``"normalized"``, ``"word"``,
+    ``"partial"``, ``"fuzzy"``) and the database queries it issued. Cache hits
+    are recorded under the resolver name ``"cache"``.
+
+    Totals are kept in memory (see :meth:`as_dict` and :meth:`prometheus_text`).
+    Each observation can also be sent elsewhere as it happens:
+
+    :param callback: called as ``callback(resolver, stage, seconds, hit, queries)``
+        for every observation
+    :param annotate_g: append observations made on the request thread to
+        ``flask.g.selfheal_metrics``
+    """
+
+    def __init__(self, callback=None, annotate_g=False):
+        self.callback = callback
+        self.annotate_g = annotate_g
+        self.stats: dict[tuple[str, str], StageStats] = {}
+        self._lock = Lock()
+
+    def observe(
+        self, resolver: str, stage: str, seconds: float, hit: bool, queries=0
+    ) -> None:
+        with self._lock:
+            stats = self.stats.get((resolver, stage))
+            if stats is None:
+                stats = self.stats[(resolver, stage)] = StageStats()
+            stats.calls += 1
+            stats.hits += bool(hit)
+            stats.seconds += seconds
+            stats.queries += queries
+
+        if self.callback is not None:
+            self.callback(resolver, stage, seconds, bool(hit), queries)
+        if self.annotate_g and has_request_context():
+            g.setdefault("selfheal_metrics", []).append(
+                {
+                    "resolver": resolver,
+                    "stage": stage,
+                    "seconds": seconds,
+                    "hit": bool(hit),
+                    "queries": queries,
+                }
+            )
+
+    def time_stage(self, resolver, stage: str, func, *args):
+        """Call ``func(*args)`` and record its duration, result and queries"""
+        outer, counter = _query_count.get(), [0]
+        token = _query_count.set(counter)
+        start = perf_counter()
+        try:
+            result = func(*args)
+        finally:
+            elapsed = perf_counter() - start
+            _query_count.reset(token)
+            if outer is not None:
+                outer[0] += counter[0]
+        self.observe(resolver_name(resolver), stage, elapsed, result, counter[0])
+        return result
+
+    def time_resolver(self, resolver, path: str):
+        """Resolve `path` with `resolver`, recording it as stage ``"resolve"``"""
+        query = getattr(getattr(resolver, "model", None), "query", None)
+        if query is not None:
+            _count_queries_on(query.session)
+        return self.time_stage(resolver, "resolve", resolver.resolve, path)
+
+    def activate(self):
+        """Make this the collector for the current context; returns a token
+        for :meth:`deactivate`"""
+        return _current_metrics.set(self)
+
+    @staticmethod
+    def deactivate(token) -> None:
+        _current_metrics.reset(token)
+
+    def as_dict(self) -> dict[str, dict[str, dict]]:
+        """Totals as ``{resolver: {stage: {calls, hits, seconds, queries}}}``"""
+        with self._lock:
+            totals = {}
+            for (resolver, stage), stats in self.stats.items():
+                totals.setdefault(resolver, {})[stage] = dict(vars(stats))
+            return totals
+
+    def prometheus_text(self) -> str:
+        """Totals in the Prometheus text exposition format"""
+        fields = [
+            ("calls", "Resolver and stage invocations"),
+            ("hits", "Invocations that found a match"),
+            ("seconds", "Time spent, in seconds"),
+            ("queries", "Database queries issued"),
+        ]
+        with self._lock:
+            items = sorted(self.stats.items())
+            lines = []
+            for field, help_text in fields:
+                name = f"selfheal_stage_{field}_total"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (resolver, stage), stats in items:
+                    labels = f'resolver="{resolver}",stage="{stage}"'
+                    lines.append(f"{name}{{{labels}}} {getattr(stats, field)}")
+        return "\n".join(lines) + "\n"
+
+    def register_endpoint(self, app, rule="/selfheal/metrics") -> None:
+        """Serve :meth:`prometheus_text` from `app` at `rule`"""
+
+        def selfheal_metrics():
+            return self.prometheus_text(), 200, {"Content-Type": "text/plain"}
+
+        app.add_url_rule(rule, "selfheal_metrics", selfheal_metrics)
@@ -0,0 +1,128 @@
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import BoundedSemaphore, Lock
+import os
+
+# The resolver built by each worker process
+_worker_resolver = None
+
+
+def _start_worker(factory, args) -> None:
+    global _worker_resolver
+    _worker_resolver = factory(*args)
+
+
+def _resolve_in_worker(path: str) -> str | None:
+    return _worker_resolver.resolve(path)
+
+
+class ResolverPool:
+    """Runs a CPU-heavy resolver in a pool of worker processes
+
+    Each worker builds its own resolver as ``factory(*args)`` once, when it
+    starts. The arguments (e.g. the candidate list) are inherited on fork, or
+    pickled once per worker otherwise, so a lookup only sends the path and
+    receives the target. Scoring then never holds the web worker's GIL, and
+    normal requests keep being served while a burst of 404s is resolved.
+
+    At most `max_pending` lookups are queued or running at once. Beyond that,
+    and for lookups that take longer than `timeout`, :meth:`resolve` returns
+    ``None`` right away instead of waiting (see :attr:`stats`).
+
+    The processes are started on first use in each process, so a pool can be
+    created before the server forks its workers.
+
+    :param factory: picklable callable building the resolver, e.g. its class
+    :param args: picklable arguments for `factory`
+    :param processes: number of worker processes
+    :param max_pending: maximum number of queued or running lookups (defaults
+        to four per process)
+    :param timeout: seconds to wait for a lookup (``None`` for no limit)
+    :param mp_context: :mod:`multiprocessing` context used to start workers
+    """
+
+    def __init__(
+        self,
+        factory,
+        args=(),
+        processes=2,
+        max_pending=None,
+        timeout=None,
+        mp_context=None,
+    ):
+        self.factory = factory
+        self.args = tuple(args)
+        self.processes = processes
+        self.max_pending = max_pending or 4 * processes
+        self.timeout = timeout
+        self.mp_context = mp_context
+
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+        self._executor = None
+        self._pid = None
+        self._lock = Lock()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Worker processes (and the slot count) do not survive a fork
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._slots = BoundedSemaphore(self.max_pending)
+                    self._executor = ProcessPoolExecutor(
+                        self.processes,
+                        mp_context=self.mp_context,
+                        initializer=_start_worker,
+                        initargs=(self.factory, self.args),
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def resolve(self, path: str) -> str | None:
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            return None
+
+        try:
+            future = executor.submit(_resolve_in_worker, path)
+        except RuntimeError:
+            # Closed by another thread in the meantime
+            slots.release()
+            return None
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        self.submitted += 1
+
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            future.cancel()
+            return None
+        except CancelledError:
+            # The pool was closed while this lookup was queued
+            return None
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next lookup
+            self._executor = None
+            return None
+
+    def close(self) -> None:
+        """Stop the worker processes once their current lookups finish"""
+        executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,7 +1,66 @@
 from difflib import get_close_matches
-from sqlalchemy import or_
+from functools import partial
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    case,
+    cast,
+    event,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session, object_session
+from threading import Lock
+from time import monotonic
+from urllib.parse import unquote, urlsplit
+from weakref import WeakKeyDictionary
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
 import re
 
+from .index import (
+    DeletionIndex,
+    Normalizer,
+    SlugSnapshot,
+    SubstringIndex,
+    TrigramIndex,
+    best_close_match,
+    trigrams,
+)
+from .lookup import LookupTable
+from .metrics import current_metrics
+from .pool import ResolverPool
+
+# Default {typo: correction} pairs applied by DatabaseResolver's normalized
+# stage (I find these are generally useful in my testing)
+DEFAULT_NORMALIZATIONS = {
+    "0": "o",
+    "1": "l",
+    "3": "e",
+    "5": "s",
+    "@": "a",
+    "ph": "f",
+    "ck": "k",
+    "qu": "kw",
+}
+
+_WORD_RE = re.compile(r"[a-zA-Z0-9]+")
+_SEPARATORS_RE = re.compile(r"[-_\s]+")
+_PATH_CONVERTER_RE = re.compile(r"<path(?:\([^)]*\))?:\w+>")
+
+
+def _escape_like(value: str) -> str:
+    """Escape `value` for a ``LIKE`` pattern using ``/`` as the escape character"""
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
 
 class BaseResolver:
     """Base class for all resolvers"""
@@ -9,6 +68,29 @@ class BaseResolver:
     def resolve(self, path: str) -> str | None:
         raise NotImplementedError
 
+    def resolve_many(self, paths) -> list[str | None]:
+        """Resolve every path in `paths`, returning the targets in order
+
+        Resolvers that can share work across paths (e.g. batch their
+        queries) override this; by default each path is resolved on its own.
+        """
+        return [self.resolve(path) for path in paths]
+
+    def warm(self) -> None:
+        """Build or rebuild anything otherwise built on first use
+
+        Called by :class:`~flask_selfheal.warmer.Warmer` from a background
+        thread, in an app context. New structures are swapped in whole, so
+        concurrent lookups keep using the old ones until then.
+        """
+
+    def known_slugs(self):
+        """Every slug this resolver can resolve to, if it knows them up front
+
+        Used to precompute redirect tables (see ``flask selfheal build-index``).
+        """
+        return ()
+
 
 class AliasMappingResolver(BaseResolver):
     """Basic 1:1 alias mapping resolver
@@ -17,6 +99,10 @@ class AliasMappingResolver(BaseResolver):
     useful for handling renamed or moved resources where the old slug should
     redirect to the new slug.
 
+    For very large maps, pass a :class:`~flask_selfheal.lookup.LookupTable`
+    (see ``flask selfheal build-aliases``) instead of a dict: it is
+    memory-mapped, so all workers on a host share one copy.
+
     :param alias_map: Dict mapping old_slug -> new_slug
     """
 
@@ -26,6 +112,17 @@ class AliasMappingResolver(BaseResolver):
     def resolve(self, path: str) -> str | None:
         return self.alias_map.get(path)
 
+    def known_slugs(self):
+        if isinstance(self.alias_map, LookupTable):
+            # Stored once per distinct target already
+            yield from self.alias_map.values()
+            return
+        seen = set()
+        for slug in self.alias_map.values():
+            if slug not in seen:
+                seen.add(slug)
+                yield slug
+
 
 class FuzzyMappingResolver(BaseResolver):
     """Fuzzy-like matching resolver
@@ -33,18 +130,142 @@ class FuzzyMappingResolver(BaseResolver):
     Similar to the :class:`AliasMappingResolver`, but uses fuzzy-like matching to
     find the closest match from a list of candidates.
 
+    By default the candidates are indexed by trigram once, up front, so each
+    lookup only scores a short list of likely matches instead of the whole
+    list. Pass ``use_index=False`` to score every candidate on every lookup.
+
+    With ``word_prefilter=True``, only candidates containing at least one
+    word of the path (of `min_word_length` or more characters) are
+    considered, found with a :class:`~flask_selfheal.index.SubstringIndex`.
+
+    With ``processes`` set, scoring runs in that many worker processes, each
+    holding its own copy of the candidates and indexes (see
+    :class:`~flask_selfheal.pool.ResolverPool`), so a burst of 404s does not
+    slow down the requests served by this process. Lookups beyond
+    `max_pending` in flight, or slower than `pool_timeout`, find no match.
+
     :param candidates: List of valid slugs or routes
     :param fuzzy_cutoff: Similarity threshold (0 to 1) for a match to be considered valid
+    :param use_index: whether to shortlist candidates with a trigram index
+    :param shortlist_size: number of indexed candidates to score per lookup
+    :param word_prefilter: whether to require candidates to share a word with the path
+    :param min_word_length: minimum length of the words used by `word_prefilter`
+    :param processes: number of worker processes to score in (``0`` to score
+        in the calling process)
+    :param max_pending: maximum number of lookups queued for the workers
+    :param pool_timeout: seconds to wait for a worker (``None`` for no limit)
     """
 
-    def __init__(self, candidates: list[str], fuzzy_cutoff=0.6):
+    def __init__(
+        self,
+        candidates: list[str],
+        fuzzy_cutoff=0.6,
+        use_index=True,
+        shortlist_size=50,
+        word_prefilter=False,
+        min_word_length=3,
+        processes=0,
+        max_pending=None,
+        pool_timeout=None,
+    ):
         self.candidates = candidates
         self.fuzzy_cutoff = fuzzy_cutoff
+        self.shortlist_size = shortlist_size
+        self.min_word_length = min_word_length
+        self.index = self.substrings = self.pool = None
+
+        if processes:
+            # The workers build the indexes; this process only forwards paths
+            self.pool = ResolverPool(
+                FuzzyMappingResolver,
+                (
+                    candidates,
+                    fuzzy_cutoff,
+                    use_index,
+                    shortlist_size,
+                    word_prefilter,
+                    min_word_length,
+                ),
+                processes=processes,
+                max_pending=max_pending,
+                timeout=pool_timeout,
+            )
+            return
+
+        if use_index:
+            self.index = TrigramIndex(candidates, shortlist_size)
+        if word_prefilter:
+            self.substrings = SubstringIndex(candidates)
 
     def resolve(self, path: str) -> str | None:
+        if self.pool is not None:
+            return self.pool.resolve(path)
+        if self.substrings is not None:
+            return self._resolve_prefiltered(path)
+        if self.index is not None:
+            return self.index.best_match(path, self.fuzzy_cutoff)
         close = get_close_matches(path, self.candidates, n=1, cutoff=self.fuzzy_cutoff)
         return close[0] if close else None
 
+    def resolve_many(self, paths) -> list[str | None]:
+        paths = list(paths)
+        # Scoring is the expensive part, so score each distinct path once
+        targets = {path: None for path in paths}
+        for path in targets:
+            targets[path] = self.resolve(path)
+        return [targets[path] for path in paths]
+
+    def _resolve_prefiltered(self, path: str) -> str | None:
+        words = [
+            word for word in _WORD_RE.findall(path) if len(word) >= self.min_word_length
+        ]
+        possibilities = [
+            self.candidates[idx] for idx in self.substrings.containing_any(words)
+        ]
+        if self.index is not None and len(possibilities) > self.shortlist_size:
+            # Too many to score: keep those the trigram index ranks highest
+            allowed = set(possibilities)
+            shortlist = self.index.shortlist(path, len(possibilities))
+            possibilities = [c for c in shortlist if c in allowed]
+            possibilities = possibilities[: self.shortlist_size]
+        return best_close_match(path, possibilities, self.fuzzy_cutoff)
+
+    def warm(self) -> None:
+        if self.substrings is not None and self.substrings._postings is None:
+            self.substrings._build_postings()
+
+    def known_slugs(self):
+        return self.candidates
+
+
+class EditDistanceResolver(BaseResolver):
+    """Bounded edit distance resolver
+
+    Resolves paths that are at most `max_distance` typos (insertions,
+    deletions, substitutions or swapped adjacent characters) away from one of
+    the candidates. Candidates are indexed up front with a SymSpell-style
+    deletion index, so each lookup only checks a handful of candidates.
+
+    The closest candidate wins; ties go to the candidate listed first.
+
+    :param candidates: List of valid slugs or routes
+    :param max_distance: maximum number of edits for a match to be considered valid
+    :param prefix_length: number of leading characters to index (see
+        :class:`~flask_selfheal.index.DeletionIndex`)
+    """
+
+    def __init__(self, candidates: list[str], max_distance=2, prefix_length=7):
+        self.candidates = candidates
+        self.max_distance = max_distance
+        self.index = DeletionIndex(candidates, max_distance, prefix_length)
+
+    def resolve(self, path: str) -> str | None:
+        match = self.index.lookup(path)
+        return match[0] if match else None
+
+    def known_slugs(self):
+        return self.candidates
+
 
 class DatabaseResolver(BaseResolver):
     """Database-backed resolver with fuzzy-like matching
@@ -71,7 +292,35 @@ class DatabaseResolver(BaseResolver):
     :param enable_word_matching: whether to match individual words from the path
     :param enable_partial_matching: whether to try partial matches of the path
     :param min_word_length: minimum length for words to be considered in matching
-    :param custom_normalizers: dict of custom character normalizations
+    :param custom_normalizers: dict of custom ``{typo: correction}``
+        normalizations, applied in a single longest-match-first pass
+    :param snapshot: whether to load the slug column into memory once and run
+        every matching stage against that copy instead of the database; its
+        fuzzy stage scores a :class:`~flask_selfheal.index.TrigramIndex`
+        shortlist rather than every slug
+    :param snapshot_refresh: seconds after which the in-memory copy (and the
+        fuzzy index of :meth:`resolve_many`) is reloaded (``None`` to only
+        reload on :meth:`refresh`); once :meth:`warm` has run (e.g. from a
+        :class:`~flask_selfheal.Warmer`), requests no longer reload a stale
+        copy themselves but leave that to the next warm
+    :param snapshot_events: whether to apply committed inserts, updates and
+        deletes of `model` to the in-memory copy as they happen
+    :param session: ``Session`` class, ``sessionmaker`` or ``scoped_session``
+        whose commits are watched for those changes (defaults to the
+        Flask-SQLAlchemy session of `model`, else every ``Session``)
+    :param trigram_table: name of a side table of slug trigrams (see
+        :meth:`build_trigram_table`); when set, the fuzzy stage asks the
+        database for the slugs sharing the most trigrams with the path and
+        only scores those, instead of loading every slug
+    :param trigram_shortlist: number of slugs the trigram query returns
+    :param batch_size: number of paths per set-based query in :meth:`resolve_many`
+    :param fuzzy_processes: in snapshot mode, number of worker processes that
+        run the fuzzy stage on their own copy of the slugs (see
+        :class:`FuzzyMappingResolver`); the copy is replaced whenever the
+        snapshot is reloaded or compacted
+    :param fuzzy_max_pending: maximum number of fuzzy lookups queued for the
+        workers; lookups beyond it find no match
+    :param fuzzy_timeout: seconds to wait for a worker (``None`` for no limit)
     """
 
     def __init__(
@@ -84,7 +333,20 @@ class DatabaseResolver(BaseResolver):
         enable_partial_matching=True,
         min_word_length=3,
         custom_normalizers=None,
+        snapshot=False,
+        snapshot_refresh=300,
+        snapshot_events=True,
+        session=None,
+        trigram_table=None,
+        trigram_shortlist=50,
+        batch_size=200,
+        fuzzy_processes=0,
+        fuzzy_max_pending=None,
+        fuzzy_timeout=None,
     ):
+        if fuzzy_processes and not snapshot:
+            raise ValueError("fuzzy_processes requires snapshot=True")
+
         self.model = model
         self.slug_field = slug_field
         self.use_fuzzy = use_fuzzy
@@ -93,143 +355,841 @@ class DatabaseResolver(BaseResolver):
         self.enable_partial_matching = enable_partial_matching
         self.min_word_length = min_word_length
         self.custom_normalizers = custom_normalizers or {}
+        self.normalizations = self.custom_normalizers or DEFAULT_NORMALIZATIONS
+        self.normalizer = Normalizer(self.normalizations)
+        self.snapshot = snapshot
+        self.snapshot_refresh = snapshot_refresh
+        self._snapshot = None
+        self._snapshot_loaded = 0.0
+        self._snapshot_lock = Lock()
+        self._reload_lock = Lock()
+        self._warmed = False
+        self._replays: list[list] = []
+        self._batch_index = None
+
+        self.trigram_shortlist = trigram_shortlist
+        self.batch_size = batch_size
+        self.fuzzy_processes = fuzzy_processes
+        self.fuzzy_max_pending = fuzzy_max_pending
+        self.fuzzy_timeout = fuzzy_timeout
+        self._fuzzy_pool = None
+        self._listeners = []
+        self._trigram_table_ready = False
+        self.trigram_table = (
+            Table(
+                trigram_table,
+                MetaData(),
+                Column("gram", String(3), primary_key=True),
+                Column("slug", String, primary_key=True),
+                Column("size", Integer, nullable=False),
+            )
+            if trigram_table
+            else None
+        )
+
+        if snapshot and snapshot_events:
+            if session is None:
+                fsa = getattr(model, "__fsa__", None)
+                session = fsa.session if fsa is not None else Session
+            self._listen_for_changes(session)
+        if self.trigram_table is not None:
+            self._maintain_trigram_table()
 
     def resolve(self, path: str) -> str | None:
         # Handle empty or very short paths
         if not path or len(path.strip()) < 2:
             return None
 
-        session = self.model.query.session
+        if self.snapshot:
+            return self._resolve_from_snapshot(self._get_snapshot(), path)
+
+        return self._resolve_with_session(self.model.query.session, path)
+
+    def resolve_many(self, paths) -> list[str | None]:
+        """Resolve every path in `paths`, returning the targets in order
+
+        Each distinct path is resolved once. Exact and contains matches for
+        the whole batch are found with a few set-based queries. For the fuzzy
+        stage the slug column is loaded and indexed by trigram as in snapshot
+        mode, instead of being scanned per path, and the index is reused by
+        later batches for `snapshot_refresh` seconds.
+
+        Like in snapshot mode, the fuzzy stage then only scores the slugs
+        sharing the most trigrams with a path (see
+        :class:`~flask_selfheal.index.TrigramIndex`), so it can rarely miss a
+        match that :meth:`resolve`, which scores every slug, finds.
+        """
+        paths = list(paths)
+        if self.snapshot:
+            snapshot = self._get_snapshot()
+            targets = {
+                path: self._resolve_from_snapshot(snapshot, path)
+                if path and len(path.strip()) >= 2
+                else None
+                for path in paths
+            }
+            return [targets[path] for path in paths]
+
+        targets = self._resolve_many_with_session(self.model.query.session, paths)
+        return [targets[path] for path in paths]
+
+    def _resolve_many_with_session(self, session, paths) -> dict:
+        """Map each distinct path in `paths` to its target, using `session`"""
+        slug_column = getattr(self.model, self.slug_field)
+        targets = dict.fromkeys(paths)
+        pending = [path for path in targets if path and len(path.strip()) >= 2]
+
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start : start + self.batch_size]
+            found = self._run_stage(
+                "exact", self._try_exact_matching_many, session, slug_column, chunk
+            )
+            targets.update(found)
+        pending = [path for path in pending if targets[path] is None]
+
+        if len(inspect(self.model).primary_key) == 1:
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start : start + self.batch_size]
+                found = self._run_stage(
+                    "contains",
+                    self._try_contains_matching_many,
+                    session,
+                    slug_column,
+                    chunk,
+                )
+                targets.update(found)
+            pending = [path for path in pending if targets[path] is None]
+        else:
+            # Composite primary keys: no single column to rank rows by
+            for path in pending:
+                targets[path] = self._run_stage(
+                    "contains", self._try_contains_matching, session, slug_column, path
+                )
+            pending = [path for path in pending if targets[path] is None]
+
+        load_index = partial(self._load_batch_index, session, slug_column)
+        for path in pending:
+            targets[path] = self._resolve_remaining(
+                session, slug_column, path, load_index
+            )
+        return targets
+
+    def _load_batch_index(self, session, slug_column) -> TrigramIndex:
+        """The trigram index of the slug column, reloaded once stale"""
+        cached = self._batch_index
+        if cached is not None and (
+            self.snapshot_refresh is None
+            or monotonic() - cached[0] < self.snapshot_refresh
+        ):
+            return cached[1]
+        slugs = session.query(slug_column).order_by(*inspect(self.model).primary_key)
+        index = TrigramIndex(row[0] for row in slugs)
+        self._batch_index = (monotonic(), index)
+        return index
+
+    def _resolve_with_session(self, session, path: str) -> str | None:
+        """Run every matching stage for `path` as queries on `session`"""
         slug_column = getattr(self.model, self.slug_field)
+        stage = self._run_stage
 
         # First try exact match (fastest)
-        exact_match = session.query(slug_column).filter(slug_column == path).scalar()
+        exact_match = stage(
+            "exact", self._try_exact_matching, session, slug_column, path
+        )
         if exact_match:
             return exact_match
 
         # Try contains match (covers startswith and endswith cases)
-        contains_match = (
-            session.query(slug_column)
-            .filter(slug_column.contains(path, autoescape=True))
-            .first()
+        contains_match = stage(
+            "contains", self._try_contains_matching, session, slug_column, path
         )
         if contains_match:
-            return contains_match[0]
+            return contains_match
+
+        return self._resolve_remaining(session, slug_column, path)
+
+    def _resolve_remaining(
+        self, session, slug_column, path: str, load_index=None
+    ) -> str | None:
+        """Run the stages after exact and contains matching for `path`"""
+        stage = self._run_stage
 
         # Try normalized version for common typos
         normalized_path = self._normalize_path(path)
         if normalized_path != path:
-            # Try exact match first
-            exact_norm_match = (
-                session.query(slug_column)
-                .filter(slug_column == normalized_path)
-                .first()
-            )
-            if exact_norm_match:
-                return exact_norm_match[0]
-
-            contains_norm_match = (
-                session.query(slug_column)
-                .filter(slug_column.contains(normalized_path, autoescape=True))
-                .first()
+            normalized_match = stage(
+                "normalized",
+                self._try_normalized_matching,
+                session,
+                slug_column,
+                normalized_path,
             )
-            if contains_norm_match:
-                return contains_norm_match[0]
+            if normalized_match:
+                return normalized_match
 
         # Try word-based matching
         if self.enable_word_matching:
-            word_match = self._try_word_matching(session, slug_column, path)
+            word_match = stage(
+                "word", self._try_word_matching, session, slug_column, path
+            )
             if word_match:
                 return word_match
 
         # Try partial matching for significant parts
         if self.enable_partial_matching:
-            partial_match = self._try_partial_matching(session, slug_column, path)
+            partial_match = stage(
+                "partial", self._try_partial_matching, session, slug_column, path
+            )
             if partial_match:
                 return partial_match
 
         # Finally, fall back to fuzzy matching for typos (slower but comprehensive)
         if self.use_fuzzy:
-            slugs = [row[0] for row in session.query(slug_column).all()]
-            close = get_close_matches(path, slugs, n=1, cutoff=self.fuzzy_cutoff)
-            return close[0] if close else None
+            return stage(
+                "fuzzy",
+                self._try_fuzzy_matching,
+                session,
+                slug_column,
+                path,
+                load_index,
+            )
 
         return None
 
+    def _run_stage(self, name: str, func, *args):
+        """Run one matching stage, timing it if metrics are being collected"""
+        metrics = current_metrics()
+        if metrics is None:
+            return func(*args)
+        return metrics.time_stage(self, name, func, *args)
+
+    def _try_exact_matching(self, session, slug_column, value: str) -> str | None:
+        exact_match = session.query(slug_column).filter(slug_column == value).first()
+        return exact_match[0] if exact_match else None
+
+    def _try_exact_matching_many(self, session, slug_column, values) -> dict:
+        rows = session.query(slug_column).filter(slug_column.in_(values))
+        return {row[0]: row[0] for row in rows}
+
+    def _try_contains_matching_many(self, session, slug_column, values) -> dict:
+        """First slug containing each of `values`, in one join"""
+        (pk,) = inspect(self.model).primary_key
+        needles = union_all(
+            *(
+                select(
+                    literal(idx).label("idx"),
+                    literal(f"%{_escape_like(value)}%").label("pattern"),
+                )
+                for idx, value in enumerate(values)
+            )
+        ).subquery("needles")
+        first_rows = (
+            select(needles.c.idx, func.min(pk).label("pk"))
+            .join_from(
+                needles, self.model, slug_column.like(needles.c.pattern, escape="/")
+            )
+            .group_by(needles.c.idx)
+        ).subquery("first_rows")
+        rows = session.execute(
+            select(first_rows.c.idx, slug_column).join_from(
+                first_rows, self.model, pk == first_rows.c.pk
+            )
+        )
+        return {values[idx]: slug for idx, slug in rows}
+
+    def _try_contains_matching(self, session, slug_column, value: str) -> str | None:
+        contains_match = (
+            session.query(slug_column)
+            .filter(slug_column.contains(value, autoescape=True))
+            .first()
+        )
+        return contains_match[0] if contains_match else None
+
+    def _try_normalized_matching(
+        self, session, slug_column, normalized_path: str
+    ) -> str | None:
+        # Try exact match first
+        return self._try_exact_matching(
+            session, slug_column, normalized_path
+        ) or self._try_contains_matching(session, slug_column, normalized_path)
+
+    def _try_fuzzy_matching(
+        self, session, slug_column, path: str, load_index=None
+    ) -> str | None:
+        if self.trigram_table is not None:
+            slugs = self._trigram_shortlist(session, path)
+            return best_close_match(path, slugs, self.fuzzy_cutoff)
+
+        if load_index is not None:
+            return load_index().best_match(path, self.fuzzy_cutoff)
+
+        slugs = [row[0] for row in session.query(slug_column).all()]
+        close = get_close_matches(path, slugs, n=1, cutoff=self.fuzzy_cutoff)
+        return close[0] if close else None
+
+    def _trigram_shortlist(self, session, path: str) -> list[str]:
+        """Slugs sharing the most trigrams with `path`, ranked in the database"""
+        grams = trigrams(path)
+        table = self.trigram_table
+        similarity = cast(func.count(), Float) / (len(grams) + func.max(table.c.size))
+        query = (
+            select(table.c.slug)
+            .where(table.c.gram.in_(grams))
+            .group_by(table.c.slug)
+            .order_by(similarity.desc(), table.c.slug)
+            .limit(self.trigram_shortlist)
+        )
+        return list(session.execute(query).scalars())
+
+    @staticmethod
+    def _trigram_rows(slug: str) -> list[dict]:
+        grams = trigrams(slug)
+        return [{"gram": gram, "slug": slug, "size": len(grams)} for gram in grams]
+
+    def build_trigram_table(self, batch_size=1000) -> None:
+        """Create the trigram side table if needed and (re)fill it from `model`
+
+        Later inserts, updates and deletes made through the ORM keep the table
+        up to date within the same transaction; bulk statements do not, so
+        rebuild after those.
+        """
+        session = self.model.query.session
+        slug_column = getattr(self.model, self.slug_field)
+        table = self.trigram_table
+
+        table.create(session.get_bind(), checkfirst=True)
+        self._trigram_table_ready = True
+        session.execute(table.delete())
+
+        # Page through the slugs in order, rather than loading them all at once
+        last = None
+        while True:
+            query = session.query(slug_column).filter(slug_column.is_not(None))
+            if last is not None:
+                query = query.filter(slug_column > last)
+            slugs = [row[0] for row in query.order_by(slug_column).limit(batch_size)]
+            if not slugs:
+                break
+            rows = [row for slug in slugs for row in self._trigram_rows(slug)]
+            session.execute(table.insert(), rows)
+            last = slugs[-1]
+
+        session.commit()
+
+    def _has_trigram_table(self, connection) -> bool:
+        # Changes made before build_trigram_table() are picked up by it
+        if not self._trigram_table_ready:
+            self._trigram_table_ready = inspect(connection).has_table(
+                self.trigram_table.name
+            )
+        return self._trigram_table_ready
+
+    def _maintain_trigram_table(self) -> None:
+        """Mirror slug changes on `model` into the trigram side table, once
+        it has been created"""
+        table = self.trigram_table
+
+        def remove(connection, slug):
+            if slug and self._has_trigram_table(connection):
+                # Filter on the whole primary key, rather than scan for `slug`
+                connection.execute(
+                    table.delete().where(
+                        table.c.gram.in_(trigrams(slug)), table.c.slug == slug
+                    )
+                )
+
+        def add(connection, slug):
+            if slug and self._has_trigram_table(connection):
+                connection.execute(table.insert(), self._trigram_rows(slug))
+
+        def after_insert(mapper, connection, target):
+            add(connection, getattr(target, self.slug_field))
+
+        def after_update(mapper, connection, target):
+            history = inspect(target).attrs[self.slug_field].history
+            if history.added or history.deleted:
+                remove(connection, history.deleted[0] if history.deleted else None)
+                add(connection, history.added[0] if history.added else None)
+
+        def after_delete(mapper, connection, target):
+            remove(connection, getattr(target, self.slug_field))
+
+        self._listen(self.model, "after_insert", after_insert, propagate=True)
+        self._listen(self.model, "after_update", after_update, propagate=True)
+        self._listen(self.model, "after_delete", after_delete, propagate=True)
+
+    def _listen(self, target, identifier: str, fn, **kwargs) -> None:
+        """Register an event listener, to be removed by :meth:`close`"""
+        event.listen(target, identifier, fn, **kwargs)
+        self._listeners.append((target, identifier, fn))
+
+    def close(self) -> None:
+        """Stop tracking changes to `model` and stop the fuzzy workers"""
+        listeners, self._listeners = self._listeners, []
+        for target, identifier, fn in listeners:
+            event.remove(target, identifier, fn)
+        pool, self._fuzzy_pool = self._fuzzy_pool, None
+        if pool is not None:
+            pool.close()
+
     def _normalize_path(self, path: str) -> str:
         """Normalize path for common typos and character substitutions"""
-        # Default normalizations (I find these are generally useful in my testing)
-        normalizations = {
-            "0": "o",
-            "1": "l",
-            "3": "e",
-            "5": "s",
-            "@": "a",
-            "ph": "f",
-            "ck": "k",
-            "qu": "kw",
-        }
-
-        # Override with custom normalizations if provided
-        if self.custom_normalizers:
-            normalizations = self.custom_normalizers
-
-        normalized = path.lower()
-        for typo, correct in normalizations.items():
-            normalized = normalized.replace(typo, correct)
-
-        return normalized
+        return self.normalizer(path)
 
-    def _try_word_matching(self, session, slug_column, path: str) -> str | None:
-        """Try matching based on individual words in the path"""
+    def _word_needles(self, path: str) -> list[str]:
+        """Significant words of the path and their short combinations"""
         # Extract meaningful words (alphanumeric sequences)
-        words = re.findall(r"[a-zA-Z0-9]+", path)
+        words = _WORD_RE.findall(path)
         significant_words = [w for w in words if len(w) >= self.min_word_length]
 
-        if not significant_words:
-            return None
-
-        patterns = []
-
-        for word in significant_words:
-            patterns.append(slug_column.contains(word, autoescape=True))
+        needles = list(significant_words)
 
         # Add word combinations (max 2 words)
         if len(significant_words) > 1:
             for i in range(len(significant_words)):
                 for j in range(i + 1, min(i + 3, len(significant_words) + 1)):
-                    combo = "-".join(significant_words[i:j])
-                    patterns.append(slug_column.contains(combo, autoescape=True))
+                    needles.append("-".join(significant_words[i:j]))
+
+        return needles
 
+    def _try_word_matching(self, session, slug_column, path: str) -> str | None:
+        """Try matching based on individual words in the path"""
+        needles = self._word_needles(path)
+        if not needles:
+            return None
+
+        patterns = [slug_column.contains(word, autoescape=True) for word in needles]
         word_match = session.query(slug_column).filter(or_(*patterns)).first()
         if word_match:
             return word_match[0]
 
         return None
 
-    def _try_partial_matching(self, session, slug_column, path: str) -> str | None:
-        """Try matching significant parts of the path"""
+    def _partial_needles(self, path: str) -> list[str]:
+        """Substrings of the path to try, highest priority first"""
         # Remove common separators and split
-        clean_path = re.sub(r"[-_\s]+", "", path)
+        clean_path = _SEPARATORS_RE.sub("", path)
 
         if len(clean_path) < 4:
+            return []
+
+        # Substrings are tried shortest first (from half the path length up),
+        # then leftmost first. Any slug containing a longer substring also
+        # contains one of the shortest ones, so only those can ever be the
+        # first to match.
+        length = max(4, len(clean_path) // 2)
+        if length >= len(clean_path):
+            return []
+
+        return list(
+            dict.fromkeys(
+                clean_path[start : start + length]
+                for start in range(len(clean_path) - length + 1)
+            )
+        )
+
+    def _try_partial_matching(self, session, slug_column, path: str) -> str | None:
+        """Try matching significant parts of the path"""
+        needles = self._partial_needles(path)
+        if not needles:
             return None
 
-        # Try different substring lengths, starting with longer ones
-        for length in range(max(4, len(clean_path) // 2), len(clean_path)):
-            for start in range(len(clean_path) - length + 1):
-                substring = clean_path[start : start + length]
-                if len(substring) >= 4:  # Only try meaningful substrings
-                    partial_match = (
-                        session.query(slug_column)
-                        .filter(slug_column.contains(substring, autoescape=True))
-                        .first()
-                    )
-                    if partial_match:
-                        return partial_match[0]
+        # A single query over all substrings, ranked by their priority
+        conditions = [slug_column.contains(sub, autoescape=True) for sub in needles]
+        priority = case(
+            *((condition, rank) for rank, condition in enumerate(conditions))
+        )
+        partial_match = (
+            session.query(slug_column)
+            .filter(or_(*conditions))
+            .order_by(priority, *inspect(self.model).primary_key)
+            .first()
+        )
+        if partial_match:
+            return partial_match[0]
+
+        return None
+
+    def refresh(self) -> SlugSnapshot:
+        """Reload the in-memory copy of the slug column from the database
+
+        Requests keep using the current copy meanwhile. Changes committed
+        while the new one loads are applied to both.
+        """
+        self._batch_index = None
+        return self._reload()
+
+    def warm(self) -> None:
+        """In snapshot mode, reload the snapshot and build all its indexes
+        before swapping it in (see :meth:`refresh`)"""
+        if self.snapshot:
+            self._reload(build_indexes=True)
+            self._warmed = True
+
+    def _reload(self, build_indexes=False) -> SlugSnapshot:
+        """Load a new snapshot outside the lock, replay the changes committed
+        meanwhile, and swap it in"""
+        replay = []
+        with self._snapshot_lock:
+            self._replays.append(replay)
+        try:
+            snapshot = self._load_snapshot()
+            if build_indexes:
+                snapshot.build_indexes(
+                    self.normalizer, fuzzy=self.use_fuzzy and not self.fuzzy_processes
+                )
+        finally:
+            with self._snapshot_lock:
+                self._replays.remove(replay)
+        with self._snapshot_lock:
+            # Committed before or after the load read them; either way the
+            # result is the same
+            for old, new in replay:
+                if old:
+                    snapshot.discard(old)
+                if new:
+                    snapshot.add(new)
+
+            current = self._snapshot
+            unchanged = (
+                current is not None
+                and not current.pending
+                and not snapshot.pending
+                and current.slugs == snapshot.slugs
+            )
+            # The fuzzy workers already have these slugs
+            self._install_snapshot(snapshot, restart_pool=not unchanged)
+            self._snapshot_loaded = monotonic()
+        return snapshot
+
+    def _load_snapshot(self) -> SlugSnapshot:
+        session = self.model.query.session
+        slug_column = getattr(self.model, self.slug_field)
+        rows = session.query(slug_column).order_by(*inspect(self.model).primary_key)
+        return SlugSnapshot(row[0] for row in rows)
+
+    def _install_snapshot(self, snapshot: SlugSnapshot, restart_pool=True) -> None:
+        """Swap `snapshot` in whole, so readers never see a partial one
+
+        :param restart_pool: whether to give the fuzzy workers (if any) a
+            copy of `snapshot`; not needed if it holds the same slugs as the
+            snapshot they were started with
+        """
+        if self.fuzzy_processes and (restart_pool or self._fuzzy_pool is None):
+            pool, self._fuzzy_pool = (
+                self._fuzzy_pool,
+                ResolverPool(
+                    FuzzyMappingResolver,
+                    (list(snapshot), self.fuzzy_cutoff),
+                    processes=self.fuzzy_processes,
+                    max_pending=self.fuzzy_max_pending,
+                    timeout=self.fuzzy_timeout,
+                ),
+            )
+            if pool is not None:
+                pool.close()
+        self._snapshot = snapshot
+
+    def _listen_for_changes(self, session) -> None:
+        """Track slug changes on `model` and apply them to the snapshot
+
+        Changes are collected per session while flushing and only applied once
+        that session commits, so rolled back changes never reach the snapshot.
+        Rolling back a savepoint only drops the changes flushed inside it.
+        Bulk ``UPDATE``/``DELETE`` statements bypass these events and are only
+        picked up by the next full reload.
+
+        :param session: event target for the session events
+        """
+        key = ("flask_selfheal", id(self))
+
+        def record(target, *changes):
+            session = object_session(target)
+            if session is not None:
+                # Tagged with the savepoint they were flushed in, if any
+                savepoint = session.get_nested_transaction()
+                session.info.setdefault(key, []).extend(
+                    (savepoint, change) for change in changes
+                )
+
+        def after_insert(mapper, connection, target):
+            record(target, (None, getattr(target, self.slug_field)))
+
+        def after_update(mapper, connection, target):
+            history = inspect(target).attrs[self.slug_field].history
+            if history.added or history.deleted:
+                old = history.deleted[0] if history.deleted else None
+                record(target, (old, history.added[0] if history.added else None))
+
+        def after_delete(mapper, connection, target):
+            record(target, (getattr(target, self.slug_field), None))
+
+        def after_commit(session):
+            changes = session.info.pop(key, None)
+            if changes:
+                self._apply_changes(change for _, change in changes)
+
+        def rolled_back(savepoint, transaction) -> bool:
+            while savepoint is not None:
+                if savepoint is transaction:
+                    return True
+                savepoint = savepoint.parent
+            return False
+
+        def after_rollback(session, previous_transaction):
+            if previous_transaction.parent is None:
+                session.info.pop(key, None)
+            elif previous_transaction.nested and key in session.info:
+                session.info[key] = [
+                    (savepoint, change)
+                    for savepoint, change in session.info[key]
+                    if not rolled_back(savepoint, previous_transaction)
+                ]
+
+        self._listen(self.model, "after_insert", after_insert, propagate=True)
+        self._listen(self.model, "after_update", after_update, propagate=True)
+        self._listen(self.model, "after_delete", after_delete, propagate=True)
+        self._listen(session, "after_commit", after_commit)
+        self._listen(session, "after_soft_rollback", after_rollback)
+
+    def _apply_changes(self, changes) -> None:
+        """Apply committed (old_slug, new_slug) pairs to the loaded snapshot"""
+        changes = list(changes)
+        with self._snapshot_lock:
+            for replay in self._replays:
+                # Also applied to the snapshot being loaded by warm()
+                replay.extend(changes)
+            snapshot = self._snapshot
+            if snapshot is None:
+                # Nothing loaded yet, the first load will include these
+                return
+
+            for old, new in changes:
+                if old:
+                    snapshot.discard(old)
+                if new:
+                    snapshot.add(new)
+
+            # Fold a large overlay back into the compact form, without a query
+            if snapshot.pending > max(1024, len(snapshot) // 10):
+                self._install_snapshot(SlugSnapshot(snapshot))
+
+    def _get_snapshot(self) -> SlugSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and (
+            self.snapshot_refresh is None
+            or monotonic() - self._snapshot_loaded < self.snapshot_refresh
+        ):
+            return snapshot
+
+        if snapshot is not None and self._warmed:
+            # The warmer reloads it, with all indexes built, off the request
+            return snapshot
+        # One thread reloads at a time, without holding _snapshot_lock (which
+        # commits need); the others keep using the stale copy meanwhile
+        if not self._reload_lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            # Another thread may have reloaded it while we waited
+            if self._snapshot is not snapshot:
+                return self._snapshot
+            return self.refresh()
+        finally:
+            self._reload_lock.release()
+
+    def known_slugs(self):
+        if self.snapshot:
+            return iter(self._get_snapshot())
+        slug_column = getattr(self.model, self.slug_field)
+        query = select(slug_column).execution_options(yield_per=1000)
+        return self.model.query.session.execute(query).scalars()
+
+    def _resolve_from_snapshot(self, snapshot: SlugSnapshot, path: str) -> str | None:
+        """Run the same matching stages as :meth:`resolve` against `snapshot`"""
+        stage = self._run_stage
+
+        if stage("exact", snapshot.__contains__, path):
+            return path
+
+        contains_match = stage("contains", snapshot.first_containing, path)
+        if contains_match:
+            return contains_match
+
+        normalized_path = self._normalize_path(path)
+        if normalized_path != path:
+            if stage("normalized", snapshot.__contains__, normalized_path):
+                return normalized_path
+
+            # Slugs can contain the same typos, so compare normalized forms too
+            same_normalized = stage(
+                "normalized",
+                snapshot.first_normalized,
+                normalized_path,
+                self.normalizer,
+            )
+            if same_normalized:
+                return same_normalized
+
+            contains_norm_match = stage(
+                "normalized", snapshot.first_containing, normalized_path
+            )
+            if contains_norm_match:
+                return contains_norm_match
+
+        if self.enable_word_matching:
+            word_match = stage(
+                "word", snapshot.first_containing, *self._word_needles(path)
+            )
+            if word_match:
+                return word_match
+
+        if self.enable_partial_matching:
+            partial_match = stage(
+                "partial",
+                snapshot.first_containing_ranked,
+                self._partial_needles(path),
+            )
+            if partial_match:
+                return partial_match
+
+        if self.use_fuzzy:
+            if self._fuzzy_pool is not None:
+                return stage("fuzzy", self._pooled_fuzzy_match, snapshot, path)
+            return stage("fuzzy", snapshot.best_match, path, self.fuzzy_cutoff)
 
         return None
 
+    def _pooled_fuzzy_match(self, snapshot: SlugSnapshot, path: str) -> str | None:
+        target = self._fuzzy_pool.resolve(path)
+        # The workers' copy may predate changes applied to the snapshot since
+        return target if target in snapshot else None
+
+
+class _RouteNode:
+    """One path segment of a :class:`_RouteTrie`"""
+
+    __slots__ = ("_matcher", "children", "endpoints", "rest", "wildcard")
+
+    def __init__(self):
+        self.children: dict[str, _RouteNode] = {}
+        self.wildcard: _RouteNode | None = None  # Any one segment
+        self.rest: list[str] = []  # Endpoints taking all remaining segments
+        self.endpoints: list[str] = []  # Endpoints of rules ending here
+        self._matcher = None
+
+    def correct(self, segment: str, fuzzy_cutoff: float) -> str | None:
+        """The static child closest to `segment`, if close enough"""
+        if segment in self.children:
+            return segment
+        if not self.children:
+            return None
+        return self.matcher(fuzzy_cutoff).resolve(segment)
+
+    def matcher(self, fuzzy_cutoff: float) -> FuzzyMappingResolver:
+        if self._matcher is None:
+            self._matcher = FuzzyMappingResolver(
+                list(self.children), fuzzy_cutoff=fuzzy_cutoff
+            )
+        return self._matcher
+
+
+class _RouteTrie:
+    """The GET rules of a Flask app's ``url_map``, split into segments
+
+    Static segments are edges to children, and segments with converters
+    (``<slug>``, ``page-<int:n>``) are wildcards. A ``<path:...>`` converter
+    takes all remaining segments.
+    """
+
+    def __init__(self, app, fuzzy_cutoff: float):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.root = _RouteNode()
+        self.static_routes = []
+        self.adapter = app.url_map.bind(app.config.get("SERVER_NAME") or "localhost")
+
+        for rule in app.url_map.iter_rules():
+            route = rule.rule.strip("/")
+            # Skip the root route ('/') to avoid redirect loops
+            if not route or rule.host or rule.subdomain:
+                continue
+            if rule.methods is not None and "GET" not in rule.methods:
+                continue
+            if "<" not in route:
+                self.static_routes.append(route)
+            self._insert(route.split("/"), rule.endpoint)
+
+    def _insert(self, segments: list[str], endpoint: str) -> None:
+        node = self.root
+        for segment in segments:
+            if _PATH_CONVERTER_RE.fullmatch(segment):
+                node.rest.append(endpoint)
+                return
+            if "<" in segment:
+                if node.wildcard is None:
+                    node.wildcard = _RouteNode()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _RouteNode())
+        node.endpoints.append(endpoint)
+
+    def walk(self, segments: list[str], node=None, depth=0, parts=()):
+        """Yield ``(parts, endpoint)`` for every rule `segments` may have
+        been meant for; `parts` pairs each (corrected) segment with whether
+        it is dynamic
+
+        Static segments are tried before wildcards, and only the closest
+        static child is tried at each depth.
+        """
+        if node is None:
+            node = self.root
+        if depth == len(segments):
+            for endpoint in node.endpoints:
+                yield parts, endpoint
+            return
+
+        segment = segments[depth]
+        corrected = node.correct(segment, self.fuzzy_cutoff)
+        if corrected is not None:
+            yield from self.walk(
+                segments,
+                node.children[corrected],
+                depth + 1,
+                (*parts, (corrected, False)),
+            )
+        if node.wildcard is not None:
+            yield from self.walk(
+                segments, node.wildcard, depth + 1, (*parts, (segment, True))
+            )
+        for endpoint in node.rest:
+            yield (*parts, ("/".join(segments[depth:]), True)), endpoint
+
+    def warm(self) -> None:
+        """Build the fuzzy matcher of every node"""
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node.children:
+                node.matcher(self.fuzzy_cutoff)
+            nodes.extend(node.children.values())
+            if node.wildcard is not None:
+                nodes.append(node.wildcard)
+
+    def routes_to(self, path: str, endpoint: str) -> bool:
+        """Whether `path` is routed to `endpoint`"""
+        try:
+            matched, _ = self.adapter.match("/" + path, method="GET")
+        except RequestRedirect as redirect:
+            # E.g. a missing trailing slash: check where Werkzeug redirects to
+            try:
+                matched, _ = self.adapter.match(
+                    unquote(urlsplit(redirect.new_url).path), method="GET"
+                )
+            except HTTPException:
+                return False
+        except HTTPException:
+            return False
+        return matched == endpoint
+
 
 class FlaskRoutesResolver(BaseResolver):
     """Fuzzy-like resolver based on existing Flask routes
@@ -237,21 +1197,133 @@ class FlaskRoutesResolver(BaseResolver):
     Similar to the :class:`FuzzyMappingResolver`, but uses the current
     Flask app's registered routes as candidates.
 
+    Routes are matched segment by segment: each segment of the path is
+    corrected against the static segments that may follow the ones before
+    it, so lookups cost the same however many routes the app has. Dynamic
+    segments (e.g. ``<slug>`` in ``/product/<slug>``) match anything, and
+    can be healed by the resolver given for the rule's endpoint:
+    ```
+    FlaskRoutesResolver(endpoint_resolvers={"product_detail": db_resolver})
+    ```
+    With it, ``/prodcut/cool-prodcut`` resolves to ``product/cool-product``.
+    Without it, the dynamic segment is kept as it is, and the path only
+    heals if a static segment was corrected.
+
+    The routes (and the indexes over them) are collected once per app and
+    reused until rules are added to the app's ``url_map``.
+
     :param fuzzy_cutoff: Similarity threshold (0 to 1) for a match to be considered valid
+    :param endpoint_resolvers: mapping of endpoint names to the resolver
+        healing the (last) dynamic segment of their rules
     """
 
-    def __init__(self, fuzzy_cutoff=0.6):
+    def __init__(self, fuzzy_cutoff=0.6, endpoint_resolvers=None):
         self.fuzzy_cutoff = fuzzy_cutoff
+        self.endpoint_resolvers = endpoint_resolvers or {}
+        self._tries = WeakKeyDictionary()
 
     def resolve(self, path: str) -> str | None:
         from flask import current_app
 
-        routes = [
-            r.rule.strip("/")
-            for r in current_app.url_map.iter_rules()
-            if "<" not in r.rule  # Skip dynamic routes
-        ]
-        # Filter out empty strings (root route - '/') to avoid redirect loops
-        routes = [route for route in routes if route]
-        close = get_close_matches(path, routes, n=1, cutoff=self.fuzzy_cutoff)
-        return close[0] if close else None
+        trie = self._get_trie(current_app._get_current_object())
+        for parts, endpoint in trie.walk(path.split("/")):
+            target = self._heal_dynamic(trie, parts, endpoint)
+            # The path itself matched a rule whose view returned the 404
+            if target and target != path:
+                return target
+        return None
+
+    def warm(self) -> None:
+        from flask import current_app
+
+        self._get_trie(current_app._get_current_object()).warm()
+
+    def known_slugs(self):
+        from flask import current_app
+
+        return self._get_trie(current_app._get_current_object()).static_routes
+
+    def _heal_dynamic(self, trie: _RouteTrie, parts, endpoint: str) -> str | None:
+        """Join `parts` into a path of `endpoint`, healing its dynamic segment"""
+        segments = [segment for segment, _ in parts]
+        dynamic = [i for i, (_, is_dynamic) in enumerate(parts) if is_dynamic]
+        if not dynamic:
+            return "/".join(segments)
+
+        resolver = self.endpoint_resolvers.get(endpoint)
+        if resolver is not None:
+            healed = resolver.resolve(segments[dynamic[-1]])
+            if not healed:
+                return None
+            segments[dynamic[-1]] = healed
+
+        target = "/".join(segments)
+        return target if trie.routes_to(target, endpoint) else None
+
+    def _get_trie(self, app) -> _RouteTrie:
+        """Return the cached route trie for `app`, rebuilding it if stale"""
+        # Rules are only ever added to a url_map, so the rule count is enough
+        # to tell whether the cached routes are still current. iter_rules()
+        # would count them one by one on every lookup.
+        rule_count = len(app.url_map._rules)
+        cached = self._tries.get(app)
+        if cached is not None and cached[0] == rule_count:
+            return cached[1]
+
+        trie = _RouteTrie(app, self.fuzzy_cutoff)
+        self._tries[app] = (rule_count, trie)
+        return trie
+
+
+class LookupTableResolver(BaseResolver):
+    """Precomputed redirect table resolver
+
+    Looks paths up in a table file written by ``flask selfheal build-index``
+    (see :func:`~flask_selfheal.lookup.build_lookup_table`), which maps likely
+    typos of every known slug to that slug. The file is memory-mapped, not
+    loaded, so startup is instant and all workers on a host share one copy;
+    each lookup is a binary search.
+
+    Put it first in the chain, so precomputed paths skip the live resolvers:
+    ```
+    SelfHeal(app, resolvers=[LookupTableResolver("redirects.idx"), db_resolver])
+    ```
+
+    Until the file exists this resolves nothing, and opening it is retried
+    at most every `retry_interval` seconds. Call :meth:`reload` after
+    rebuilding it. Alias maps converted with ``flask selfheal build-aliases``
+    are served the same way.
+
+    :param filename: path of the lookup table file
+    :param retry_interval: seconds between attempts to open a missing file
+    """
+
+    def __init__(self, filename, retry_interval=5.0):
+        self.filename = filename
+        self.retry_interval = retry_interval
+        self._table = None
+        self._retry_at = 0.0
+
+    def resolve(self, path: str) -> str | None:
+        table = self._table
+        if table is None:
+            if monotonic() < self._retry_at:
+                return None
+            table = self.reload()
+            if table is None:
+                return None
+        return table.get(path)
+
+    def warm(self) -> None:
+        self.reload()
+
+    def reload(self) -> LookupTable | None:
+        """(Re)open the lookup table file, if it exists"""
+        try:
+            table = LookupTable(self.filename)
+        except FileNotFoundError:
+            self._retry_at = monotonic() + self.retry_interval
+            return None
+        # The previous table is unmapped once in-flight lookups drop it
+        self._table = table
+        return table
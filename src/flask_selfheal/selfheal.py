@@ -1,4 +1,89 @@
-from flask import request, redirect, url_for
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from threading import Lock, Semaphore
+from time import monotonic, perf_counter
+import os
+import re
+
+from flask import current_app, has_app_context, request, redirect, url_for
+
+from .cache import MISS
+from .cli import cli
+
+_CONVERTER_RE = re.compile(r"<(?:([^<>:]+):)?([^<>]+)>")
+
+
+def _found(future) -> bool:
+    """Whether `future` completed with a target"""
+    return (
+        future.done()
+        and not future.cancelled()
+        and not future.exception()
+        and bool(future.result())
+    )
+
+
+class Section:
+    """A part of the site with its own resolver chain and redirect target
+
+    `pattern` is either a URL prefix (``"/product/"``) or a Werkzeug rule
+    with a single converter (``"/product/<slug>"``,
+    ``"/shop/<int:id>/reviews"``). A 404 whose path starts with the prefix
+    (and ends with the rest of the rule) only runs this section's resolvers,
+    on the part of the path the converter stands for (everything after a
+    prefix). Prefixes match whole segments, and only a ``path`` converter
+    stands for more than one segment.
+
+    :param pattern: URL prefix or Werkzeug rule of the section
+    :param resolvers: list of resolver instances run on the paths of this
+        section
+    :param redirect_pattern: pattern for redirect URL (defaults to `pattern`
+        with its converter replaced by ``{slug}``, or `pattern` followed by
+        ``{slug}`` for a prefix)
+    :param endpoint: Flask endpoint name to use with url_for instead of
+        redirect, passing the target as the converter's argument
+    """
+
+    def __init__(self, pattern: str, resolvers, redirect_pattern=None, endpoint=None):
+        self.pattern = pattern
+        self.resolvers = resolvers
+        self.endpoint = endpoint
+
+        route = pattern.lstrip("/")
+        converters = list(_CONVERTER_RE.finditer(route))
+        if len(converters) > 1:
+            raise ValueError(f"{pattern!r} has more than one converter")
+        if converters:
+            match = converters[0]
+            self.prefix = route[: match.start()]
+            self.suffix = route[match.end() :].rstrip("/")
+            self.argument = match.group(2)
+            self.multiple_segments = (match.group(1) or "").startswith("path")
+            default_pattern = f"/{self.prefix}{{slug}}{route[match.end() :]}"
+        else:
+            # "/product" is the same section as "/product/", not "/products"
+            self.prefix = f"{route.rstrip('/')}/" if route else ""
+            self.suffix, self.argument = "", "slug"
+            self.multiple_segments = True
+            default_pattern = f"/{self.prefix}{{slug}}"
+        self.redirect_pattern = redirect_pattern or default_pattern
+
+    def matches(self, path: str) -> bool:
+        """Whether `path` belongs to this section"""
+        if not path.startswith(self.prefix) or not path.endswith(self.suffix):
+            return False
+        # Empty as well when the prefix and the suffix overlap
+        slug = self.slug_of(path)
+        return bool(slug) and (self.multiple_segments or "/" not in slug)
+
+    def slug_of(self, path: str) -> str:
+        """The part of `path` (which :meth:`matches`) to resolve"""
+        return path[len(self.prefix) : len(path) - len(self.suffix)]
+
+    def redirect_url(self, target: str) -> str:
+        if self.endpoint:
+            return url_for(self.endpoint, **{self.argument: target})
+        return self.redirect_pattern.format(slug=target)
 
 
 class SelfHeal:
@@ -11,38 +96,366 @@ class SelfHeal:
     :param resolvers: list of resolver instances
     :param redirect_pattern: pattern for redirect URL (e.g., "/product/{slug}", "/{slug}")
     :param endpoint: Flask endpoint name to use with url_for instead of redirect
+    :param cache: optional cache backend (e.g.
+        :class:`~flask_selfheal.cache.ResolutionCache`) used to remember resolver
+        chain results (including misses) per path
+    :param parallel: run all resolvers concurrently on a thread pool; the
+        first resolver (in chain order) to succeed still wins, as soon as all
+        resolvers before it have missed. Each resolver of a chain may only
+        use its share of the workers, so a slow one cannot starve the others.
+        Resolvers are never queued: those finding no free worker are
+        skipped, and the result is not cached
+    :param deadline: seconds a parallel resolution may take in total before
+        giving up and serving the plain 404 (``None`` for no limit); resolvers
+        already running cannot be cancelled and keep their worker until done
+    :param max_workers: size of the thread pool used in parallel mode
+    :param metrics: optional :class:`~flask_selfheal.metrics.Metrics` that
+        records per-resolver and per-stage timings, hits and query counts
+    :param admission: optional
+        :class:`~flask_selfheal.admission.AdmissionControl` deciding which
+        404s are healed at all; the others get a plain 404 right away
+    :param negative_filter: optional
+        :class:`~flask_selfheal.bloom.NegativeFilter` remembering paths the
+        resolver chain found no match for, checked after the cache
+    :param sections: list of :class:`Section` instances; each 404 under a
+        section's prefix only runs that section's resolvers, and redirects
+        to its target
+    :param warmer: optional :class:`~flask_selfheal.warmer.Warmer` started by
+        :meth:`init_app` to build indexes and prime the cache in the
+        background
+    :param hit_log: optional :class:`~flask_selfheal.hitlog.HitLog` that
+        records every redirect served; the aliases it promoted are looked up
+        before anything else
     """
 
     def __init__(
-        self, app=None, resolvers=None, redirect_pattern="/{slug}", endpoint=None
+        self,
+        app=None,
+        resolvers=None,
+        redirect_pattern="/{slug}",
+        endpoint=None,
+        cache=None,
+        parallel=False,
+        deadline=None,
+        max_workers=None,
+        metrics=None,
+        admission=None,
+        negative_filter=None,
+        sections=None,
+        warmer=None,
+        hit_log=None,
     ):
         self.app = app
         self.resolvers = resolvers or []
         self.redirect_pattern = redirect_pattern
         self.endpoint = endpoint
+        self.cache = cache
+        self.parallel = parallel
+        self.deadline = deadline
+        self.metrics = metrics
+        self.admission = admission
+        self.negative_filter = negative_filter
+        self.sections = list(sections or [])
+        self._compile_sections()
+        self.warmer = warmer
+        self.hit_log = hit_log
+        self.executor = None
+        if parallel:
+            # Same default as ThreadPoolExecutor
+            max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+            self.executor = ThreadPoolExecutor(
+                max_workers, thread_name_prefix="selfheal"
+            )
+            self.max_workers = max_workers
+            self._free_workers = Semaphore(max_workers)
+            self._resolver_workers = {}
+            self._resolver_workers_lock = Lock()
 
         if app is not None:
             self.init_app(app)
 
     def init_app(self, app):
         self.app = app
+        app.extensions["selfheal"] = self
+        app.cli.add_command(cli)
         app.register_error_handler(404, self.handle_404)
+        if self.warmer is not None:
+            self.warmer.start(app, self)
 
     def handle_404(self, e):
-        path = request.path.strip("/")
+        path = self._request_path()
+        target = None
+        if self._admit(path):
+            try:
+                target = self.resolve(path)
+            finally:
+                self._release()
+        return self._respond(path, target)
 
-        for resolver in self.resolvers:
-            target = resolver.resolve(path)
-            if target:
-                if self.endpoint:
-                    # Use Flask url_for with the specified endpoint
-                    return redirect(url_for(self.endpoint, slug=target), code=301)
-                else:
-                    # Use the redirect pattern (default: "/{slug}")
-                    redirect_url = self.redirect_pattern.format(slug=target)
-                    return redirect(redirect_url, code=301)
+    def _request_path(self) -> str:
+        """The path of the current 404, once the warmer is running"""
+        if self.warmer is not None:
+            # Restart the thread in a forked worker
+            self.warmer.start(current_app._get_current_object(), self)
+        return request.path.strip("/")
+
+    def _admit(self, path: str) -> bool:
+        """Whether `path` may be healed; call :meth:`_release` once done if so"""
+        return self.admission is None or self.admission.acquire(path)
+
+    def _release(self) -> None:
+        if self.admission is not None:
+            self.admission.release()
+
+    def _respond(self, path: str, target: str | None):
+        """The redirect to `target`, or the 404 response if there is none"""
+        if target:
+            if self.hit_log is not None:
+                self.hit_log.record(path, target)
+            return redirect(self.redirect_url(path, target), code=301)
 
         return (
             f"404 Not Found: {path}",
             404,
         )  # Maybe make this configurable (custom page)?
+
+    def redirect_url(self, path: str, target: str) -> str:
+        """The URL to redirect `path` to, given the `target` it resolved to"""
+        section = self.section_for(path)
+        if section is not None:
+            return section.redirect_url(target)
+        if self.endpoint:
+            # Use Flask url_for with the specified endpoint
+            return url_for(self.endpoint, slug=target)
+        # Use the redirect pattern (default: "/{slug}")
+        return self.redirect_pattern.format(slug=target)
+
+    def _compile_sections(self) -> None:
+        """Build the lookup of :attr:`sections` by prefix"""
+        self._sections_by_prefix = {}
+        for section in self.sections:
+            if section.prefix in self._sections_by_prefix:
+                raise ValueError(f"More than one section for {section.prefix!r}")
+            self._sections_by_prefix[section.prefix] = section
+        # Longest first, so the most specific prefix matches
+        prefixes = self._prefixes = sorted(
+            self._sections_by_prefix, key=len, reverse=True
+        )
+        self._section_re = (
+            re.compile("|".join(map(re.escape, prefixes))) if prefixes else None
+        )
+
+    def section_for(self, path: str) -> Section | None:
+        """The section `path` belongs to, if any"""
+        if self._section_re is None:
+            return None
+        match = self._section_re.match(path)
+        if match is None:
+            return None
+        section = self._sections_by_prefix[match.group()]
+        if section.matches(path):
+            return section
+        # A shorter prefix may still take it, e.g. "docs/" for "docs/api/x"
+        # when the section of "docs/api/" requires a suffix
+        for prefix in self._prefixes:
+            section = self._sections_by_prefix[prefix]
+            if len(prefix) < match.end() and section.matches(path):
+                return section
+        return None
+
+    def _chain(self, path: str):
+        """The resolvers for `path`, and the part of `path` they resolve"""
+        section = self.section_for(path)
+        if section is None:
+            return self.resolvers, path
+        return section.resolvers, section.slug_of(path)
+
+    def _group_by_chain(self, paths) -> list:
+        """Split `paths` into ``(resolvers, {path: part to resolve})`` groups"""
+        groups = {}
+        for path in paths:
+            section = self.section_for(path)
+            if section is None:
+                groups.setdefault(None, (self.resolvers, {}))[1][path] = path
+            else:
+                group = groups.setdefault(section, (section.resolvers, {}))
+                group[1][path] = section.slug_of(path)
+        return list(groups.values())
+
+    def resolve(self, path: str) -> str | None:
+        """Run `path` through the resolver chain (or the cache, if configured)"""
+        target = self._promoted(path)
+        if target:
+            return target
+        if self.cache is not None:
+            target = self._cache_lookup(path)
+            if target is not MISS:
+                return target
+        if self._known_miss(path):
+            return None
+
+        resolvers, key = self._chain(path)
+        if self.parallel:
+            target, complete = self._resolve_parallel(resolvers, key)
+            if not complete:
+                # Out of time or workers: the chain's result is not known for
+                # sure, so don't cache it
+                return target
+        else:
+            target = self._resolve_sequential(resolvers, key)
+
+        self._remember(path, target)
+        return target
+
+    def _promoted(self, path: str) -> str | None:
+        """The alias the hit log promoted for `path`, if any"""
+        if self.hit_log is None:
+            return None
+        return self._call_resolver(self.hit_log.resolver, path)
+
+    def _known_miss(self, path: str) -> bool:
+        return self.negative_filter is not None and path in self.negative_filter
+
+    def _remember(self, path: str, target: str | None) -> None:
+        """Record the outcome of the resolver chain for `path`"""
+        if target is None and self.negative_filter is not None:
+            self.negative_filter.add(path)
+        if self.cache is not None:
+            self.cache.set(path, target)
+
+    def resolve_many(self, paths) -> list[str | None]:
+        """Run all `paths` through the resolver chain in bulk
+
+        Each resolver gets the paths no earlier resolver could heal in a
+        single :meth:`~flask_selfheal.resolvers.BaseResolver.resolve_many`
+        call. The cache is neither read nor written, so one-off jobs (see
+        ``flask selfheal resolve-file``) do not evict live entries.
+        """
+        paths = list(paths)
+        targets = {}
+        for resolvers, keys in self._group_by_chain(paths):
+            found = self._resolve_chain_many(resolvers, keys.values())
+            targets.update(zip(keys, found))
+        return [targets[path] for path in paths]
+
+    def _resolve_chain_many(self, resolvers, paths) -> list[str | None]:
+        paths = list(paths)
+        targets = dict.fromkeys(paths)
+        pending = list(targets)
+        for resolver in resolvers:
+            if not pending:
+                break
+            found = resolver.resolve_many(pending)
+            pending = self._collect(targets, pending, found)
+        return [targets[path] for path in paths]
+
+    @staticmethod
+    def _collect(targets: dict, pending: list, found) -> list:
+        """Record the `found` targets of `pending`; return the paths still unresolved"""
+        unresolved = []
+        for path, target in zip(pending, found):
+            if target:
+                targets[path] = target
+            else:
+                unresolved.append(path)
+        return unresolved
+
+    def _cache_lookup(self, path: str):
+        if self.metrics is None:
+            return self.cache.get(path)
+        start = perf_counter()
+        target = self.cache.get(path)
+        hit = target is not MISS
+        self.metrics.observe("cache", "lookup", perf_counter() - start, hit)
+        return target
+
+    def _call_resolver(self, resolver, path: str) -> str | None:
+        if self.metrics is None:
+            return resolver.resolve(path)
+        token = self.metrics.activate()
+        try:
+            return self.metrics.time_resolver(resolver, path)
+        finally:
+            self.metrics.deactivate(token)
+
+    def _resolve_sequential(self, resolvers, path: str) -> str | None:
+        for resolver in resolvers:
+            target = self._call_resolver(resolver, path)
+            if target:
+                return target
+        return None
+
+    def _worker_share(self, resolver, chain_length: int) -> Semaphore:
+        """Limits the workers `resolver` may hold at once to its share"""
+        share = self._resolver_workers.get(id(resolver))
+        if share is None:
+            with self._resolver_workers_lock:
+                share = self._resolver_workers.setdefault(
+                    id(resolver),
+                    Semaphore(max(1, self.max_workers // chain_length)),
+                )
+        return share
+
+    def _submit(self, resolver, path: str, chain_length: int):
+        """Start `resolver` on the thread pool, within its share of the
+        workers; ``None`` if no worker is free, rather than queue it behind
+        the stragglers of earlier requests"""
+        app = current_app._get_current_object() if has_app_context() else None
+        share = self._worker_share(resolver, chain_length)
+        if not share.acquire(blocking=False):
+            return None
+        if not self._free_workers.acquire(blocking=False):
+            share.release()
+            return None
+
+        def run():
+            # Each resolver gets its own app context (and so its own
+            # Flask-SQLAlchemy session), as it may outlive this request
+            with app.app_context() if app is not None else nullcontext():
+                return self._call_resolver(resolver, path)
+
+        def release(future):
+            share.release()
+            self._free_workers.release()
+
+        try:
+            future = self.executor.submit(run)
+        except BaseException:
+            release(None)
+            raise
+        # Also called if the future is cancelled before it starts
+        future.add_done_callback(release)
+        return future
+
+    def _resolve_parallel(self, resolvers, path: str):
+        """Race all resolvers, returning ``(target, complete)``
+
+        `complete` is false if the deadline passed, or a resolver was skipped
+        for lack of a free worker, before the chain's result was known; the
+        target is then the best one found (or ``None``).
+        """
+        expires = None if self.deadline is None else monotonic() + self.deadline
+        futures = []
+        for resolver in resolvers:
+            if any(future and _found(future) for future in futures):
+                break  # Later resolvers cannot win any more
+            futures.append(self._submit(resolver, path, len(resolvers)))
+
+        complete = True
+        try:
+            for future in futures:
+                if future is None:
+                    complete = False
+                    continue
+                timeout = None if expires is None else max(0, expires - monotonic())
+                try:
+                    target = future.result(timeout)
+                except TimeoutError:
+                    return None, False
+                if target:
+                    return target, complete
+            return None, complete
+        finally:
+            for future in futures:
+                if future is not None:
+                    future.cancel()
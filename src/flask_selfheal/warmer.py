@@ -0,0 +1,114 @@
+from functools import partial
+from inspect import isawaitable
+from itertools import islice
+from threading import Event, Lock, Thread
+import asyncio
+import os
+
+
+class Warmer:
+    """Builds resolver indexes and primes the cache in a background thread
+
+    Pass an instance to :class:`~flask_selfheal.SelfHeal` to start the
+    thread from ``init_app``. Every `interval` seconds it calls
+    :meth:`~flask_selfheal.resolvers.BaseResolver.warm` on each resolver
+    (e.g. reloading a ``DatabaseResolver`` snapshot with all its indexes),
+    so requests neither build indexes on first use nor wait for a reload;
+    the new structures are swapped in whole once complete.
+
+    With a cache configured, each run then resolves up to `preload_limit` of
+    the paths returned by `preload`, so they are cached before anyone
+    requests them. If ``SelfHeal`` has a :class:`~flask_selfheal.HitLog`,
+    its most often healed paths are preloaded by default, and the aliases
+    it promoted are reloaded when another process compacted it.
+
+    Threads do not survive a fork, so in each forked server worker the
+    thread is started again on its first 404.
+
+    :param interval: seconds between runs (``None`` to only run once)
+    :param preload: callable returning the paths to resolve ahead of time,
+        most important first
+    :param preload_limit: maximum number of paths preloaded per run
+    """
+
+    def __init__(self, interval=300, preload=None, preload_limit=1000):
+        self.interval = interval
+        self.preload = preload
+        self.preload_limit = preload_limit
+
+        self.runs = 0
+        self.errors = 0
+        self.preloaded = 0
+
+        self._thread = None
+        self._pid = None
+        self._stopped = Event()
+        self._lock = Lock()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"runs": self.runs, "errors": self.errors, "preloaded": self.preloaded}
+
+    def start(self, app, selfheal) -> None:
+        """Start the thread, unless it is already running in this process"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stopped.clear()
+            self._thread = Thread(
+                target=self._run,
+                args=(app, selfheal),
+                name="selfheal-warmer",
+                daemon=True,
+            )
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self, timeout=None) -> None:
+        """Stop the thread once its current run completes"""
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout)
+
+    def _run(self, app, selfheal) -> None:
+        while True:
+            with app.app_context():
+                self.run_once(app, selfheal)
+            if self.interval is None or self._stopped.wait(self.interval):
+                return
+
+    def run_once(self, app, selfheal) -> None:
+        """Warm every resolver of `selfheal`, then preload the cache"""
+        resolvers = list(selfheal.resolvers)
+        for section in selfheal.sections:
+            resolvers.extend(section.resolvers)
+        if selfheal.hit_log is not None:
+            resolvers.append(selfheal.hit_log.resolver)
+        for resolver in resolvers:
+            try:
+                resolver.warm()
+            except Exception:
+                # Keep warming the others; requests fall back to lazy builds
+                self.errors += 1
+                app.logger.exception("Warming %r failed", resolver)
+
+        preload = self.preload
+        if preload is None and selfheal.hit_log is not None:
+            preload = partial(selfheal.hit_log.top, self.preload_limit)
+        if preload is not None and selfheal.cache is not None:
+            try:
+                for path in islice(preload(), self.preload_limit):
+                    if self._stopped.is_set():
+                        break
+                    target = selfheal.resolve(path)
+                    if isawaitable(target):
+                        # AsyncSelfHeal; this thread has no event loop running
+                        asyncio.run(target)
+                    self.preloaded += 1
+            except Exception:
+                self.errors += 1
+                app.logger.exception("Preloading the cache failed")
+        self.runs += 1
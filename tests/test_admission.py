@@ -0,0 +1,94 @@
+import threading
+
+from flask import Flask
+from flask_selfheal import AdmissionControl, BaseResolver, SelfHeal
+
+
+class CountingResolver(BaseResolver):
+    def __init__(self):
+        self.calls = []
+
+    def resolve(self, path):
+        self.calls.append(path)
+        return "new"
+
+
+def make_app(admission):
+    app = Flask(__name__)
+
+    @app.route("/new")
+    def new():
+        return "new"
+
+    resolver = CountingResolver()
+    SelfHeal(app, resolvers=[resolver], admission=admission)
+    return app, resolver
+
+
+def test_admission_rejects_scanner_paths():
+    admission = AdmissionControl(max_length=20)
+    app, resolver = make_app(admission)
+    client = app.test_client()
+
+    for path in [
+        "/wp-login.php",
+        "/.env",
+        "/admin/config.BAK",
+        "/.git/config",
+        "/a" * 20,
+        "/x%3Cy",
+    ]:
+        response = client.get(path)
+        assert response.status_code == 404
+    assert resolver.calls == []
+
+    assert client.get("/old-page.html").status_code == 301
+    assert resolver.calls == ["old-page.html"]
+    assert admission.stats == {
+        "admitted": 1,
+        "rejected": 6,
+        "rejected_extension": 4,
+        "rejected_length": 1,
+        "rejected_characters": 1,
+    }
+
+
+def test_admission_token_bucket_per_client():
+    client_id = "a"
+    admission = AdmissionControl(rate=0.001, burst=2, client_key=lambda: client_id)
+    app, resolver = make_app(admission)
+    client = app.test_client()
+
+    assert [client.get("/old").status_code for _ in range(3)] == [301, 301, 404]
+    client_id = "b"
+    assert client.get("/old").status_code == 301
+    assert len(resolver.calls) == 3
+    assert admission.stats["rejected_rate"] == 1
+
+
+def test_admission_concurrency_cap():
+    admission = AdmissionControl(max_concurrent=1)
+    started, finish = threading.Event(), threading.Event()
+
+    class BlockingResolver(BaseResolver):
+        def resolve(self, path):
+            started.set()
+            finish.wait(5)
+            return "new"
+
+    app = Flask(__name__)
+    SelfHeal(app, resolvers=[BlockingResolver()], admission=admission)
+
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(app.test_client().get("/first").status_code)
+    )
+    thread.start()
+    started.wait(5)
+    assert app.test_client().get("/second").status_code == 404
+    finish.set()
+    thread.join()
+
+    assert results == [301]
+    assert app.test_client().get("/third").status_code == 301
+    assert admission.stats["rejected_concurrency"] == 1
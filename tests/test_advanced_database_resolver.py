@@ -1,6 +1,8 @@
 import pytest
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from flask_selfheal.index import Normalizer, SlugSnapshot
 from flask_selfheal.resolvers import DatabaseResolver
 
 
@@ -162,3 +164,417 @@ def test_performance_order(app, db_with_products):
         # Test that LIKE patterns work
         result = resolver.resolve("product-SKU")  # Should match via LIKE %product-SKU%
         assert result == "cool-product-SKU1234567"
+
+
+def test_partial_matching_single_query(app, db_with_products):
+    db, Product = db_with_products
+    resolver = DatabaseResolver(Product)
+    statements = []
+
+    with app.app_context():
+        session = Product.query.session
+        slug_column = Product.slug
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            match = resolver._try_partial_matching(
+                session, slug_column, "ABC987654-xyz"
+            )
+            miss = resolver._try_partial_matching(
+                session, slug_column, "completely-unrelated-path-here"
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+
+    assert match == "awesome-gadget-ABC987654"
+    assert miss is None
+    assert len(statements) == 2
+
+
+def test_snapshot_mode_matches_database(app, db_with_products):
+    _, Product = db_with_products
+    paths = [
+        "cool-product-SKU1234567",
+        "product-SKU",
+        "c00l-product-SKU1234567",
+        "super-fone-XYZ123",
+        "ABC987654",
+        "cool-SKU1234567",
+        "ABC987654-xyz",
+        "cool-prodcut-SKU1234567",
+        "awsome-gadget-ABC987654",
+        "totally-different-thing",
+        "",
+    ]
+
+    with app.app_context():
+        live = DatabaseResolver(Product, fuzzy_cutoff=0.7)
+        snapshot = DatabaseResolver(Product, fuzzy_cutoff=0.7, snapshot=True)
+        for path in paths:
+            assert snapshot.resolve(path) == live.resolve(path), path
+
+
+def test_snapshot_refresh(app, db_with_products):
+    db, Product = db_with_products
+
+    with app.app_context():
+        resolver = DatabaseResolver(
+            Product, snapshot=True, snapshot_refresh=None, snapshot_events=False
+        )
+        assert resolver.resolve("brand-new-thing") is None
+
+        db.session.add(Product(slug="brand-new-thing-QRS111"))
+        db.session.commit()
+        assert resolver.resolve("brand-new-thing") is None
+
+        resolver.refresh()
+        assert resolver.resolve("brand-new-thing") == "brand-new-thing-QRS111"
+
+
+def test_snapshot_tracks_committed_changes(app, db_with_products):
+    db, Product = db_with_products
+
+    with app.app_context():
+        resolver = DatabaseResolver(
+            Product, snapshot=True, snapshot_refresh=None, use_fuzzy=False
+        )
+        assert resolver.resolve("brand-new-thing") is None
+
+        db.session.add(Product(slug="brand-new-thing-QRS111"))
+        db.session.flush()
+        assert resolver.resolve("brand-new-thing") is None  # not committed yet
+        db.session.commit()
+        assert resolver.resolve("brand-new-thing") == "brand-new-thing-QRS111"
+
+        product = Product.query.filter_by(slug="super-phone-XYZ123").one()
+        product.slug = "super-tablet-XYZ123"
+        db.session.commit()
+        assert resolver.resolve("phone") is None
+        assert resolver.resolve("tablet") == "super-tablet-XYZ123"
+
+        db.session.delete(Product.query.filter_by(slug="laptop-model-DEF456789").one())
+        db.session.add(Product(slug="another-item-ZZZ999"))
+        db.session.commit()
+        assert resolver.resolve("laptop") is None
+
+        db.session.add(Product(slug="never-committed-YYY888"))
+        db.session.flush()
+        db.session.rollback()
+        assert resolver.resolve("never-committed") is None
+
+
+def test_snapshot_changes_savepoints_and_close(app, db_with_products):
+    db, Product = db_with_products
+
+    with app.app_context():
+        resolver = DatabaseResolver(
+            Product, snapshot=True, snapshot_refresh=None, use_fuzzy=False
+        )
+        resolver.resolve("warm-up")
+
+        db.session.add(Product(slug="zebra-stripes-AAA111"))
+        with db.session.begin_nested() as savepoint:
+            db.session.add(Product(slug="walrus-tusks-BBB222"))
+            db.session.flush()
+            savepoint.rollback()
+        db.session.commit()
+        assert resolver.resolve("zebra-stripes") == "zebra-stripes-AAA111"
+        assert resolver.resolve("walrus-tusks") is None
+
+        resolver.close()
+        db.session.add(Product(slug="falcon-wings-CCC333"))
+        db.session.commit()
+        assert resolver.resolve("falcon-wings") is None
+
+
+def test_trigram_table_fuzzy_stage(app, db_with_products):
+    db, Product = db_with_products
+    statements = []
+
+    with app.app_context():
+        resolver = DatabaseResolver(
+            Product,
+            fuzzy_cutoff=0.7,
+            enable_word_matching=False,
+            enable_partial_matching=False,
+            trigram_table="product_trigrams",
+        )
+        resolver.build_trigram_table()
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            match = resolver.resolve("cool-prodcut-SKU1234567")
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+        assert match == "cool-product-SKU1234567"
+        assert "product_trigrams" in statements[-1]
+        assert "GROUP BY" in statements[-1]
+
+        # ORM changes keep the side table current
+        product = Product.query.filter_by(slug="super-phone-XYZ123").one()
+        product.slug = "super-tablet-XYZ123"
+        db.session.add(Product(slug="brand-new-thing-QRS111"))
+        db.session.commit()
+        assert resolver.resolve("super-tablte-XYZ123") == "super-tablet-XYZ123"
+        assert resolver.resolve("brand-nwe-thing-QRS111") == "brand-new-thing-QRS111"
+        table = resolver.trigram_table
+        slugs = {row.slug for row in db.session.execute(table.select())}
+        assert "super-phone-XYZ123" not in slugs
+        assert len(slugs) == 6
+
+
+def test_trigram_table_changes_before_build(app):
+    db = SQLAlchemy(app)
+
+    class Item(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        slug = db.Column(db.String, unique=True)
+
+    resolver = DatabaseResolver(Item, trigram_table="item_trigrams")
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        db.create_all()
+        # No side table yet: ORM changes go through without touching it
+        db.session.add(Item(slug="zebra-stripes-AAA111"))
+        db.session.commit()
+
+        resolver.build_trigram_table()
+        item = Item.query.one()
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            db.session.delete(item)
+            db.session.commit()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        deletes = [s for s in statements if s.startswith("DELETE FROM item_trigrams")]
+        assert len(deletes) == 1 and "gram IN" in deletes[0]
+        assert list(db.session.execute(resolver.trigram_table.select())) == []
+        resolver.close()
+
+
+def test_normalizer_is_single_pass():
+    # Replacements are not rescanned, and the longest token wins
+    assert Normalizer({"a": "b", "b": "c"})("ABab") == "bcbc"
+    assert Normalizer({"p": "b", "ph": "f"})("phone-pack") == "fone-back"
+    assert Normalizer({"0": "o", "1": "l"})("C00L-1") == "cool-l"
+
+
+def test_snapshot_compares_normalized_slugs(app, db_with_products):
+    db, Product = db_with_products
+
+    with app.app_context():
+        db.session.add(Product(slug="iPhone-Case-QQ1"))
+        db.session.commit()
+        resolver = DatabaseResolver(
+            Product,
+            snapshot=True,
+            snapshot_refresh=None,
+            enable_word_matching=False,
+            enable_partial_matching=False,
+            use_fuzzy=False,
+        )
+        # "iph0ne" and "iPhone" both normalize to "ifone"
+        assert resolver.resolve("iph0ne-case-qq1") == "iPhone-Case-QQ1"
+
+        db.session.add(Product(slug="ifone-case-QQ2"))
+        db.session.delete(Product.query.filter_by(slug="iPhone-Case-QQ1").one())
+        db.session.commit()
+        assert resolver.resolve("iph0ne-case-qq2") == "ifone-case-QQ2"
+        assert resolver.resolve("iph0ne-case-qq1") is None
+
+
+def test_snapshot_discard_keeps_normalized_table():
+    normalize = Normalizer({"0": "o"})
+    snapshot = SlugSnapshot(["c00l-one", "cool-one", "cool-two"])
+    assert snapshot.first_normalized("cool-one", normalize) == "c00l-one"
+    table = snapshot._normalized
+
+    snapshot.discard("c00l-one")
+    assert snapshot.first_normalized("cool-one", normalize) == "cool-one"
+    snapshot.discard("cool-one")
+    snapshot.discard("cool-two")
+    assert snapshot.first_normalized("cool-one", normalize) is None
+    snapshot.add("c0ol-one")
+    assert snapshot.first_normalized("cool-one", normalize) == "c0ol-one"
+    assert snapshot._normalized is table
+
+
+def test_resolve_many_matches_resolve(app, db_with_products):
+    db, Product = db_with_products
+    paths = [
+        "cool-product-SKU1234567",
+        "product-SKU",
+        "c00l-product-SKU1234567",
+        "super-fone-XYZ123",
+        "ABC987654-xyz",
+        "cool-prodcut-SKU1234567",
+        "100%_off",
+        "totally-different-thing",
+        "product-SKU",
+        "",
+    ]
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        for snapshot in (False, True):
+            resolver = DatabaseResolver(Product, fuzzy_cutoff=0.7, snapshot=snapshot)
+            expected = [resolver.resolve(path) for path in paths]
+            assert resolver.resolve_many(paths) == expected
+
+        resolver = DatabaseResolver(Product, fuzzy_cutoff=0.7)
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            for path in paths:
+                resolver.resolve(path)
+            one_by_one, statements[:] = list(statements), []
+            resolver.resolve_many(paths)
+            batch, statements[:] = list(statements), []
+            resolver.resolve_many(paths)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+
+    # The slug column is loaded for fuzzy matching once, and reused by the
+    # next batch
+    assert len([s for s in batch if "ORDER BY product.id" in s]) == 1
+    assert len(batch) < len(one_by_one) - 10
+    assert not [s for s in statements if "ORDER BY product.id" in s]
+
+
+def test_snapshot_fuzzy_stage_in_processes(app, db_with_products):
+    db, Product = db_with_products
+
+    with pytest.raises(ValueError):
+        DatabaseResolver(Product, fuzzy_processes=1)
+
+    with app.app_context():
+        resolver = DatabaseResolver(
+            Product,
+            snapshot=True,
+            snapshot_refresh=None,
+            enable_word_matching=False,
+            enable_partial_matching=False,
+            fuzzy_processes=1,
+        )
+        try:
+            assert resolver.resolve("cool-prodcut-SKU1234567") == (
+                "cool-product-SKU1234567"
+            )
+            # Changes since the workers loaded their copy are respected
+            db.session.delete(
+                Product.query.filter_by(slug="cool-product-SKU1234567").one()
+            )
+            db.session.commit()
+            assert resolver.resolve("cool-prodcut-SKU1234567") is None
+        finally:
+            resolver._fuzzy_pool.close()
+
+
+def test_snapshot_warm_swaps_in_built_snapshot(app, db_with_products):
+    db, Product = db_with_products
+    resolver = DatabaseResolver(Product, snapshot=True)
+
+    with app.app_context():
+        old = resolver._get_snapshot()
+        db.session.add(Product(slug="new-widget-JKL111"))
+        db.session.commit()
+
+        resolver.warm()
+        snapshot = resolver._snapshot
+        assert snapshot is not old
+        assert snapshot._substrings._postings is not None
+        assert snapshot._fuzzy_index is not None
+        assert snapshot._normalized[0] is resolver.normalizer
+        assert resolver.resolve("new-widgt-JKL111") == "new-widget-JKL111"
+
+
+def test_snapshot_warm_replays_changes_committed_while_loading(app, db_with_products):
+    db, Product = db_with_products
+    resolver = DatabaseResolver(Product, snapshot=True, use_fuzzy=False)
+    load_snapshot = resolver._load_snapshot
+
+    def load_then_commit():
+        snapshot = load_snapshot()
+        # Committed after the rows were read, before the swap
+        db.session.add(Product(slug="late-arrival-MNO222"))
+        db.session.commit()
+        return snapshot
+
+    with app.app_context():
+        resolver._get_snapshot()
+        resolver._load_snapshot = load_then_commit
+        resolver.warm()
+        assert "late-arrival-MNO222" in resolver._snapshot
+
+
+@pytest.mark.parametrize("reload", ["refresh", "stale"])
+def test_snapshot_reload_replays_changes_committed_while_loading(
+    app, db_with_products, reload
+):
+    db, Product = db_with_products
+    resolver = DatabaseResolver(
+        Product, snapshot=True, snapshot_refresh=None, use_fuzzy=False
+    )
+    load_snapshot = resolver._load_snapshot
+
+    def load_then_commit():
+        snapshot = load_snapshot()
+        # Applied while the load runs, rather than waiting for it
+        db.session.add(Product(slug="late-arrival-MNO222"))
+        db.session.commit()
+        return snapshot
+
+    with app.app_context():
+        resolver._get_snapshot()
+        resolver._load_snapshot = load_then_commit
+        if reload == "refresh":
+            resolver.refresh()
+        else:
+            resolver.snapshot_refresh = 0
+            resolver._get_snapshot()
+        assert "late-arrival-MNO222" in resolver._snapshot
+
+
+def test_warmed_snapshot_is_not_reloaded_by_requests(app, db_with_products):
+    _, Product = db_with_products
+    resolver = DatabaseResolver(
+        Product, snapshot=True, snapshot_refresh=0, use_fuzzy=False
+    )
+
+    with app.app_context():
+        resolver.warm()
+        snapshot = resolver._snapshot
+        resolver._load_snapshot = None  # Would fail if called
+        assert resolver.resolve("super-phone-XYZ123") == "super-phone-XYZ123"
+        assert resolver._snapshot is snapshot
+
+
+def test_snapshot_warm_keeps_fuzzy_workers_if_unchanged(app, db_with_products):
+    db, Product = db_with_products
+
+    with app.app_context():
+        resolver = DatabaseResolver(Product, snapshot=True, fuzzy_processes=1)
+        try:
+            resolver.warm()
+            pool = resolver._fuzzy_pool
+            resolver.warm()
+            assert resolver._fuzzy_pool is pool
+
+            db.session.add(Product(slug="new-widget-JKL111"))
+            db.session.commit()
+            resolver.warm()
+            assert resolver._fuzzy_pool is not pool
+        finally:
+            resolver.close()
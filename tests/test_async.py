@@ -0,0 +1,202 @@
+import asyncio
+import threading
+
+import pytest
+from flask import Flask, abort
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from flask_selfheal import (
+    AliasMappingResolver,
+    FlaskRoutesResolver,
+    ResolutionCache,
+    Warmer,
+)
+from flask_selfheal.aio import AsyncBaseResolver, AsyncDatabaseResolver, AsyncSelfHeal
+
+Base = declarative_base()
+
+
+class Article(Base):
+    __tablename__ = "articles"
+    id = Column(Integer, primary_key=True)
+    slug = Column(String, unique=True)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    url = f"sqlite:///{tmp_path / 'articles.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            Article.__table__.insert(),
+            [{"slug": "flask-basics"}, {"slug": "cool-product-SKU1234567"}],
+        )
+
+    async_engine = create_async_engine(url.replace("sqlite", "sqlite+aiosqlite"))
+    yield async_sessionmaker(async_engine)
+    asyncio.run(async_engine.dispose())
+
+
+def test_async_database_resolver(session_factory):
+    resolver = AsyncDatabaseResolver(Article, session_factory)
+
+    async def run():
+        return [
+            await resolver.resolve("flask-basic"),
+            await resolver.resolve("SKU1234567"),
+            await resolver.resolve("c00l-product-SKU1234567"),
+            await resolver.resolve("not-found"),
+        ]
+
+    assert asyncio.run(run()) == [
+        "flask-basics",
+        "cool-product-SKU1234567",
+        "cool-product-SKU1234567",
+        None,
+    ]
+
+
+def test_async_selfheal_resolve_many(session_factory):
+    selfheal = AsyncSelfHeal(
+        resolvers=[
+            AliasMappingResolver({"old": "new"}),
+            AsyncDatabaseResolver(Article, session_factory),
+        ]
+    )
+    targets = asyncio.run(selfheal.resolve_many(["old", "flask-basic", "zzz-nothing"]))
+    assert targets == ["new", "flask-basics", None]
+
+
+def test_async_selfheal_mixes_sync_and_async_resolvers(session_factory):
+    pytest.importorskip("asgiref")
+    app = Flask(__name__)
+
+    @app.route("/<slug>")
+    async def by_slug(slug):
+        if slug in ("flask-basics", "new", "about-us"):
+            return f"Slug: {slug}"
+        abort(404)
+
+    @app.route("/about-us/")
+    def about():
+        return "about"
+
+    AsyncSelfHeal(
+        app,
+        resolvers=[
+            AliasMappingResolver({"old": "new"}),
+            FlaskRoutesResolver(),
+            AsyncDatabaseResolver(Article, session_factory),
+        ],
+    )
+    client = app.test_client()
+
+    assert client.get("/old").headers["Location"].endswith("/new")
+    assert client.get("/about-u").headers["Location"].endswith("/about-us")
+    assert client.get("/flask-basic").headers["Location"].endswith("/flask-basics")
+    assert client.get("/zzz-nothing").status_code == 404
+
+
+def test_async_selfheal_offloads_blocking_cache():
+    class ThreadRecordingCache(ResolutionCache):
+        blocking = True
+
+        def __init__(self):
+            super().__init__()
+            self.threads = set()
+
+        def get(self, path):
+            self.threads.add(threading.get_ident())
+            return super().get(path)
+
+        def set(self, path, target):
+            self.threads.add(threading.get_ident())
+            super().set(path, target)
+
+    cache = ThreadRecordingCache()
+    selfheal = AsyncSelfHeal(
+        resolvers=[AliasMappingResolver({"old": "new"})], cache=cache
+    )
+
+    async def run():
+        return await selfheal.resolve("old"), await selfheal.resolve("old")
+
+    assert asyncio.run(run()) == ("new", "new")
+    assert cache.stats["hits"] == 1
+    assert cache.threads and threading.get_ident() not in cache.threads
+
+
+def test_async_selfheal_warmer_preloads_cache(tmp_path):
+    class AsyncAliases(AsyncBaseResolver):
+        def __init__(self):
+            self.calls = []
+
+        async def resolve(self, path):
+            self.calls.append(path)
+            return {"old": "new"}.get(path)
+
+    app = Flask(__name__)
+    resolver = AsyncAliases()
+    warmer = Warmer(interval=None, preload=lambda: ["old"])
+    selfheal = AsyncSelfHeal(
+        app, resolvers=[resolver], cache=ResolutionCache(), warmer=warmer
+    )
+    warmer._thread.join(5)
+    assert warmer.stats == {"runs": 1, "errors": 0, "preloaded": 1}
+    assert asyncio.run(selfheal.resolve("old")) == "new"
+    assert resolver.calls == ["old"]
+
+    # Async resolvers know no slugs up front, rather than break the command
+    result = app.test_cli_runner().invoke(
+        args=["selfheal", "build-index", str(tmp_path / "index.idx")]
+    )
+    assert result.exit_code == 0, result.output
+
+
+class SleepingResolver(AsyncBaseResolver):
+    def __init__(self, delay, target=None):
+        self.delay = delay
+        self.target = target
+        self.cancelled = False
+
+    async def resolve(self, path):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.target
+
+
+def test_async_selfheal_parallel_and_deadline():
+    slow = SleepingResolver(5, target="too-late")
+    cache = ResolutionCache()
+    selfheal = AsyncSelfHeal(
+        resolvers=[
+            SleepingResolver(0.05),
+            AliasMappingResolver({"old": "new"}),
+            slow,
+        ],
+        parallel=True,
+        deadline=0.3,
+        cache=cache,
+    )
+
+    async def run():
+        start = asyncio.get_running_loop().time()
+        found = await selfheal.resolve("old")
+        # Both sleepers ran at once, and the alias won without waiting for 3
+        assert asyncio.get_running_loop().time() - start < 0.3
+        assert await selfheal.resolve("missing") is None
+        return found
+
+    assert asyncio.run(run()) == "new"
+    assert slow.cancelled
+    assert len(cache) == 1  # The timed out miss is not cached
+
+    # The deadline also applies to a sequential chain
+    selfheal = AsyncSelfHeal(resolvers=[SleepingResolver(5, "x")], deadline=0.05)
+    assert asyncio.run(selfheal.resolve("old")) is None
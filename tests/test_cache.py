@@ -0,0 +1,127 @@
+from flask import Flask
+from flask_selfheal import SelfHeal, AliasMappingResolver, ResolutionCache
+from flask_selfheal import SQLiteCache, RedisCache
+from flask_selfheal import cache as cache_module
+from flask_selfheal.cache import MISS
+
+
+class CountingResolver(AliasMappingResolver):
+    def __init__(self, alias_map):
+        super().__init__(alias_map)
+        self.calls = 0
+
+    def resolve(self, path):
+        self.calls += 1
+        return super().resolve(path)
+
+
+def test_selfheal_caches_hits_and_misses():
+    app = Flask(__name__)
+    resolver = CountingResolver({"old": "new"})
+    cache = ResolutionCache()
+    SelfHeal(app, resolvers=[resolver], cache=cache)
+    client = app.test_client()
+
+    for _ in range(3):
+        assert client.get("/old").headers["Location"].endswith("/new")
+        assert client.get("/missing").status_code == 404
+
+    assert resolver.calls == 2
+    assert cache.stats == {"hits": 4, "misses": 2, "evictions": 0, "size": 2}
+
+
+def test_cache_lru_eviction_keeps_positives():
+    cache = ResolutionCache(max_size=2, negative_max_size=2)
+    cache.set("a", "x")
+    cache.set("b", "y")
+    assert cache.get("a") == "x"  # "b" is now least recently used
+    cache.set("c", "z")
+
+    for i in range(100):
+        cache.set(f"junk-{i}", None)
+
+    assert cache.get("b") is MISS
+    assert cache.get("a") == "x"
+    assert cache.get("c") == "z"
+    assert len(cache) == 4
+    assert cache.evictions == 1 + 98
+
+
+def test_cache_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "monotonic", lambda: now[0])
+    cache = ResolutionCache(ttl=60, negative_ttl=5)
+    cache.set("old", "new")
+    cache.set("junk", None)
+
+    now[0] += 10
+    assert cache.get("old") == "new"
+    assert cache.get("junk") is MISS
+
+    now[0] += 60
+    assert cache.get("old") is MISS
+
+
+class FakeRedis:
+    """Stand-in for a redis-py client, backed by a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if key.startswith(match[:-1])]
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_sqlite_cache_shared_between_workers(tmp_path):
+    filename = tmp_path / "selfheal.db"
+    worker_a = SQLiteCache(filename)
+    worker_b = SQLiteCache(filename)
+
+    worker_a.set("old", "new")
+    worker_a.set("junk", None)
+    assert worker_b.get("old") == "new"
+    assert worker_b.get("junk") is None
+    assert worker_b.get("unseen") is MISS
+    assert worker_b.stats == {"hits": 2, "misses": 1}
+
+    worker_b.clear()
+    assert worker_a.get("old") is MISS
+
+
+def test_sqlite_cache_prunes_to_max_size(tmp_path):
+    cache = SQLiteCache(tmp_path / "selfheal.db", max_size=5, prune_interval=10)
+    for i in range(10):
+        cache.set(f"path-{i}", f"target-{i}")
+
+    assert cache.get("path-0") is MISS
+    assert cache.get("path-9") == "target-9"
+
+
+def test_redis_cache_with_selfheal():
+    app = Flask(__name__)
+    resolver = CountingResolver({"old": "new"})
+    client = FakeRedis()
+    SelfHeal(app, resolvers=[resolver], cache=RedisCache(client))
+
+    # A second "worker" sharing the same Redis never runs its resolvers
+    other = Flask(__name__)
+    other_resolver = CountingResolver({"old": "new"})
+    SelfHeal(other, resolvers=[other_resolver], cache=RedisCache(client))
+
+    assert app.test_client().get("/old").status_code == 301
+    assert app.test_client().get("/missing").status_code == 404
+    assert other.test_client().get("/old").headers["Location"].endswith("/new")
+    assert other.test_client().get("/missing").status_code == 404
+
+    assert resolver.calls == 2
+    assert other_resolver.calls == 0
+    assert client.data == {"selfheal:old": b"new", "selfheal:missing": b""}
@@ -0,0 +1,32 @@
+from flask_selfheal.index import edit_distance
+from flask_selfheal.resolvers import EditDistanceResolver
+
+
+def test_edit_distance():
+    assert edit_distance("kitten", "sitting", 5) == 3
+    assert edit_distance("flask-basics", "falsk-basics", 2) == 1  # transposition
+    assert edit_distance("ca", "abc", 5) == 3
+    assert edit_distance("short", "much-longer-string", 2) == 3
+
+
+def test_edit_distance_resolver():
+    resolver = EditDistanceResolver(
+        ["hello-world", "flask-basics", "flask-basins", "cool-product-SKU1234567"]
+    )
+    assert resolver.resolve("flask-basics") == "flask-basics"
+    assert resolver.resolve("falsk-basics") == "flask-basics"
+    assert resolver.resolve("hllo-wrld") == "hello-world"
+    assert resolver.resolve("cool-prodcut-SKU1234567") == "cool-product-SKU1234567"
+    assert resolver.resolve("hllo-wrl") is None  # 3 edits
+    assert resolver.resolve("not-found") is None
+
+
+def test_edit_distance_resolver_ties_go_to_first_candidate():
+    assert (
+        EditDistanceResolver(["flask-basins", "flask-basics"]).resolve("flask-basi")
+        == "flask-basins"
+    )
+    assert (
+        EditDistanceResolver(["flask-basics", "flask-basins"]).resolve("flask-basi")
+        == "flask-basics"
+    )
@@ -1,5 +1,6 @@
 from flask import Flask
-from flask_selfheal.resolvers import FlaskRoutesResolver
+from werkzeug.routing import Rule
+from flask_selfheal.resolvers import AliasMappingResolver, FlaskRoutesResolver
 
 
 def test_flaskroutes_resolver():
@@ -13,3 +14,72 @@ def test_flaskroutes_resolver():
         resolver = FlaskRoutesResolver()
         assert resolver.resolve("hello-worl") == "hello-world"
         assert resolver.resolve("not-found") is None
+
+
+def test_flaskroutes_resolver_picks_up_new_routes():
+    app = Flask(__name__)
+    other = Flask(__name__)
+
+    @app.route("/hello-world")
+    def hello():
+        return "hi"
+
+    @other.route("/goodbye-world")
+    def goodbye():
+        return "bye"
+
+    resolver = FlaskRoutesResolver()
+    with app.app_context():
+        assert resolver.resolve("hello-worl") == "hello-world"
+        assert resolver.resolve("about-u") is None
+
+    with other.app_context():
+        assert resolver.resolve("goodbye-wrld") == "goodbye-world"
+        assert resolver.resolve("hello-worl") is None
+
+    app.add_url_rule("/about-us", "about", lambda: "about")
+    with app.app_context():
+        assert resolver.resolve("about-u") == "about-us"
+
+
+def test_flaskroutes_resolver_heals_dynamic_routes():
+    app = Flask(__name__)
+    app.add_url_rule("/products", "products", lambda: "all")
+    app.add_url_rule("/product/<slug>", "product", lambda slug: slug)
+    app.add_url_rule("/product/<slug>/reviews", "reviews", lambda slug: slug)
+    app.add_url_rule("/blog/<int:year>/<title>", "post", lambda year, title: title)
+    app.add_url_rule("/docs/<path:page>", "docs", lambda page: page)
+
+    resolver = FlaskRoutesResolver(
+        endpoint_resolvers={
+            "product": AliasMappingResolver({"cool-prodcut": "cool-product"})
+        }
+    )
+    with app.app_context():
+        assert resolver.resolve("prodcut/cool-prodcut") == "product/cool-product"
+        assert resolver.resolve("product/cool-prodcut") == "product/cool-product"
+        assert resolver.resolve("prodcuts") == "products"
+        # The product resolver cannot heal this slug
+        assert resolver.resolve("prodcut/unknown") is None
+        # Without an endpoint resolver the dynamic segments are kept
+        assert resolver.resolve("prodcut/abc/reviwes") == "product/abc/reviews"
+        assert resolver.resolve("blgo/2024/hello") == "blog/2024/hello"
+        assert resolver.resolve("blgo/latest/hello") is None  # Not an int
+        assert resolver.resolve("dcos/guide/setup") == "docs/guide/setup"
+        # Already a valid route, so there is nothing to heal
+        assert resolver.resolve("blog/2024/hello") is None
+        assert sorted(resolver.known_slugs()) == ["products"]
+
+
+def test_flaskroutes_resolver_follows_redirects_to_the_same_endpoint():
+    app = Flask(__name__)
+    app.add_url_rule("/shop/<slug>/", "shop", lambda slug: slug)
+    app.add_url_rule("/new/<slug>", "new", lambda slug: slug)
+    app.url_map.add(Rule("/old/<slug>", endpoint="old", redirect_to="/new/<slug>"))
+
+    resolver = FlaskRoutesResolver()
+    with app.app_context():
+        # Werkzeug only adds the trailing slash, so it is still "shop"
+        assert resolver.resolve("shpo/abc") == "shop/abc"
+        # Redirected to another endpoint than the rule that matched
+        assert resolver.resolve("odl/abc") is None
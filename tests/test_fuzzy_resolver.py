@@ -1,3 +1,4 @@
+from flask_selfheal.index import SubstringIndex, TrigramIndex
 from flask_selfheal.resolvers import FuzzyMappingResolver
 
 
@@ -5,3 +6,54 @@ def test_fuzzy_resolver():
     resolver = FuzzyMappingResolver(["hello-world", "flask-basics"])
     assert resolver.resolve("flask-basic") == "flask-basics"
     assert resolver.resolve("not-found") is None
+
+
+def test_fuzzy_resolver_index_matches_full_scan():
+    words = ["cool", "awesome", "super", "gaming", "laptop", "phone", "mouse"]
+    candidates = [f"{a}-{b}-{i}" for i in range(40) for a in words for b in words]
+    indexed = FuzzyMappingResolver(candidates)
+    full_scan = FuzzyMappingResolver(candidates, use_index=False)
+
+    for path in ["cool-mous-7", "awsome-phone-12", "laptop-gaming-3", "zzzz"]:
+        assert indexed.resolve(path) == full_scan.resolve(path)
+
+
+def test_trigram_index_scans_all_without_shared_trigram():
+    index = TrigramIndex([f"item-{i}" for i in range(100)] + ["qabrcdsefu"])
+    assert index.shortlist("xabycdzefw") == []
+    assert index.best_match("xabycdzefw") == "qabrcdsefu"
+
+
+def test_trigram_index_does_not_scan_large_corpus(monkeypatch):
+    index = TrigramIndex([f"item-{i}" for i in range(5000)], shortlist_size=10)
+    scored = []
+
+    def best_close_match(word, possibilities, cutoff=0.6):
+        scored.append(len(possibilities))
+
+    monkeypatch.setattr("flask_selfheal.index.best_close_match", best_close_match)
+    assert index.best_match(".env") is None
+    assert index.best_match("xmlrpc.php") is None
+    assert scored == []
+
+
+def test_substring_index():
+    index = SubstringIndex(["Cool-Product", "awesome-gadget", "cool-gadget", "ab"])
+    assert list(index.iter_containing("gadget")) == [1, 2]
+    assert list(index.iter_containing("COOL")) == [0, 2]
+    assert list(index.iter_containing("b")) == [3]  # shorter than a trigram
+    assert list(index.iter_containing("missing")) == []
+    assert index.first_containing(["gadget", "product"]) == 0
+    assert index.first_containing(["gadget", "product"], {0}.__contains__) == 1
+    assert index.first_containing(["nope", "zzz"]) is None
+    assert index.containing_any(["gadget", "cool"]) == [0, 1, 2]
+
+
+def test_fuzzy_resolver_word_prefilter():
+    candidates = ["hello-world", "flask-basics", "basic-flask"]
+    resolver = FuzzyMappingResolver(candidates, word_prefilter=True)
+    assert resolver.resolve("flask-basic") == "flask-basics"
+    assert resolver.resolve("hello-wrld") == "hello-world"
+    # Close enough for difflib, but shares no whole word with any candidate
+    assert FuzzyMappingResolver(candidates).resolve("hellx-wxrld") == "hello-world"
+    assert resolver.resolve("hellx-wxrld") is None
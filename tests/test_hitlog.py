@@ -0,0 +1,134 @@
+from threading import Thread
+
+import pytest
+from flask import Flask
+from flask_selfheal import BaseResolver, HitLog, SelfHeal
+
+
+class CountingResolver(BaseResolver):
+    def __init__(self, aliases):
+        self.aliases = aliases
+        self.calls = []
+
+    def resolve(self, path):
+        self.calls.append(path)
+        return self.aliases.get(path)
+
+
+def test_hit_log_promotes_hot_paths(tmp_path):
+    hit_log = HitLog(tmp_path / "hits.log", min_hits=3)
+    for _ in range(3):
+        hit_log.record("prodcut-1", "product-1")
+    hit_log.record("prodcut-1", "product-2")
+    hit_log.record("rare", "rarely-healed")
+    hit_log.record("bad\tpath", "x")
+    hit_log.flush()
+
+    assert hit_log.top(1) == ["prodcut-1"]
+    assert hit_log.compact() == 1
+    assert hit_log.load_aliases() == {"prodcut-1": "product-1"}
+    assert hit_log.resolver.resolve("prodcut-1") == "product-1"
+
+    # Paths not promoted keep their counts
+    hit_log.record("rare", "rarely-healed")
+    hit_log.record("rare", "rarely-healed")
+    assert hit_log.compact() == 1
+    assert hit_log.load_aliases() == {
+        "prodcut-1": "product-1",
+        "rare": "rarely-healed",
+    }
+    assert hit_log.stats == {"recorded": 7, "written": 7, "dropped": 1, "promoted": 2}
+
+    # Another process picks up the promoted aliases
+    assert HitLog(tmp_path / "hits.log").resolver.resolve("rare") == "rarely-healed"
+
+
+def test_selfheal_records_and_uses_promoted_aliases(tmp_path):
+    app = Flask(__name__)
+    resolver = CountingResolver({"old": "new"})
+    hit_log = HitLog(tmp_path / "hits.log", min_hits=2, flush_interval=60)
+    SelfHeal(app, resolvers=[resolver], hit_log=hit_log)
+    client = app.test_client()
+
+    for _ in range(2):
+        assert client.get("/old").headers["Location"] == "/new"
+    assert client.get("/missing").status_code == 404
+    assert resolver.calls == ["old", "old", "missing"]
+
+    hit_log.compact()
+    assert client.get("/old").headers["Location"] == "/new"
+    assert resolver.calls == ["old", "old", "missing"]
+
+
+def test_compact_keeps_counts_of_every_target(tmp_path):
+    hit_log = HitLog(tmp_path / "hits.log", min_hits=5)
+    for _ in range(3):
+        hit_log.record("split", "target-a")
+    for _ in range(2):
+        hit_log.record("split", "target-b")
+    assert hit_log.compact() == 0
+
+    # Heals of the runner-up target still count once it overtakes
+    for _ in range(3):
+        hit_log.record("split", "target-b")
+    hit_log.flush()
+    assert hit_log.counts() == {("split", "target-a"): 3, ("split", "target-b"): 5}
+    assert hit_log.compact() == 1
+    assert hit_log.load_aliases() == {"split": "target-b"}
+    assert hit_log.counts() == {}
+
+
+def test_compact_revalidates_aliases(tmp_path):
+    hit_log = HitLog(tmp_path / "hits.log", min_hits=1)
+    for path in ("moved", "gone", "kept"):
+        hit_log.record(path, f"{path}-target")
+    assert hit_log.compact() == 3
+
+    current = {"moved": "new-target", "kept": "kept-target"}
+    assert (
+        hit_log.compact(revalidate=lambda paths: [current.get(p) for p in paths]) == 1
+    )
+    assert hit_log.load_aliases() == current
+    assert hit_log.resolver.resolve("gone") is None
+    assert hit_log.resolver.resolve("moved") == "new-target"
+
+
+def test_compact_waits_for_the_log_lock(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    hit_log = HitLog(tmp_path / "hits.log", min_hits=1)
+    hit_log.record("old", "new")
+    hit_log.flush()
+
+    # Another process appending holds the lock
+    with open(tmp_path / "hits.log.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH)
+        compacting = Thread(target=hit_log.compact)
+        compacting.start()
+        compacting.join(0.2)
+        assert compacting.is_alive()
+        assert hit_log.load_aliases() == {}
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        compacting.join()
+    assert hit_log.load_aliases() == {"old": "new"}
+
+
+def test_compact_hits_command(tmp_path):
+    app = Flask(__name__)
+    resolver = CountingResolver({"old": "moved"})
+    hit_log = HitLog(tmp_path / "hits.log")
+    SelfHeal(app, resolvers=[resolver], hit_log=hit_log)
+    for _ in range(2):
+        hit_log.record("old", "new")
+        hit_log.record("stale", "gone")
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(
+        args=["selfheal", "compact-hits", "--min-hits", "2", "--no-revalidate"]
+    )
+    assert "Promoted 2 paths" in result.output
+    assert hit_log.resolver.resolve("old") == "new"
+
+    # By default every alias is resolved again
+    result = runner.invoke(args=["selfheal", "compact-hits"])
+    assert "Promoted 1 paths" in result.output
+    assert hit_log.load_aliases() == {"old": "moved"}
@@ -0,0 +1,205 @@
+import pytest
+from flask import Flask
+
+from flask_selfheal import Section, SelfHeal
+from flask_selfheal.lookup import (
+    LookupTable,
+    build_lookup_table,
+    read_alias_file,
+    typo_variants,
+    write_lookup_table,
+)
+from flask_selfheal.resolvers import (
+    AliasMappingResolver,
+    FuzzyMappingResolver,
+    LookupTableResolver,
+)
+
+
+def test_lookup_table_round_trip(tmp_path):
+    filename = tmp_path / "table.idx"
+    items = {f"old-{i}": f"new-{i % 3}" for i in range(100)}
+    assert write_lookup_table(filename, items.items()) == 100
+
+    table = LookupTable(filename)
+    assert len(table) == 100
+    assert table.get("old-42") == "new-0"
+    assert table.get("old-") is None
+    assert "old-99" in table
+    assert "old-100" not in table
+    assert dict(table.items()) == items
+    assert list(table) == sorted(items)
+    table.close()
+
+
+def test_lookup_table_streams_in_chunks(tmp_path):
+    filename = tmp_path / "table.idx"
+    items = [(f"old-{i % 250}", f"new-{i}") for i in range(1000)]
+    assert write_lookup_table(filename, iter(items), chunk_size=64) == 250
+
+    table = LookupTable(filename)
+    assert table._table is not None
+    # Later pairs win, also across sorted chunks
+    assert dict(table.items()) == dict(items)
+    assert sorted(table.values()) == sorted(dict(items).values())
+    assert table.get("old-7") == "new-757"
+    assert AliasMappingResolver(table).resolve("old-249") == "new-999"
+    table.close()
+
+
+def test_lookup_table_without_hash_table(tmp_path):
+    filename = tmp_path / "table.idx"
+    write_lookup_table(filename, [("b", "x"), ("a", "y"), ("c", "x")])
+    table = LookupTable(filename)
+    hash_table_start = len(table._mmap) - table._table.nbytes - 16
+    table.close()
+
+    # Files written before hash tables were added are binary searched
+    with open(filename, "r+b") as f:
+        f.truncate(hash_table_start)
+    table = LookupTable(filename)
+    assert table._table is None
+    assert [table.get(key) for key in "abcd"] == ["y", "x", "x", None]
+
+
+def test_read_alias_file(tmp_path):
+    (tmp_path / "aliases.csv").write_text("/old-a/,new-a\nold-b,new-b\n")
+    (tmp_path / "aliases.jsonl").write_text(
+        '["old-a", "new-a"]\n\n{"old-b": "new-b"}\n'
+    )
+    (tmp_path / "aliases.json").write_text('{"old-a": "new-a", "old-b": "new-b"}')
+    for name in ["aliases.csv", "aliases.jsonl", "aliases.json"]:
+        pairs = list(read_alias_file(tmp_path / name))
+        assert pairs == [("old-a", "new-a"), ("old-b", "new-b")]
+
+    # A header row is skipped; malformed rows are reported with their line
+    (tmp_path / "header.csv").write_text("old,new\nold-a,new-a\n")
+    assert list(read_alias_file(tmp_path / "header.csv")) == [("old-a", "new-a")]
+    (tmp_path / "bad.csv").write_text("old-a,new-a\n\nold-b\n")
+    with pytest.raises(ValueError, match="line 3"):
+        list(read_alias_file(tmp_path / "bad.csv"))
+    (tmp_path / "bad.jsonl").write_text('["old-a", "new-a"]\n{"old-b": 1}\n')
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_alias_file(tmp_path / "bad.jsonl"))
+    (tmp_path / "broken.jsonl").write_text('["old-a", "new-a"]\n["old-b",\n')
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_alias_file(tmp_path / "broken.jsonl"))
+
+
+def test_alias_resolver_known_slugs(tmp_path):
+    aliases = {"old-a": "new-a", "old-b": "new-b", "old-c": "new-a"}
+    assert list(AliasMappingResolver(aliases).known_slugs()) == ["new-a", "new-b"]
+    write_lookup_table(tmp_path / "aliases.idx", aliases.items())
+    resolver = AliasMappingResolver(LookupTable(tmp_path / "aliases.idx"))
+    assert sorted(resolver.known_slugs()) == ["new-a", "new-b"]
+
+
+def test_build_aliases_command(tmp_path):
+    app = Flask(__name__)
+    filename = tmp_path / "aliases.idx"
+    SelfHeal(app, resolvers=[LookupTableResolver(filename)])
+    (tmp_path / "aliases.csv").write_text("legacy/page-1,page-one\n")
+
+    result = app.test_cli_runner().invoke(
+        args=["selfheal", "build-aliases", str(tmp_path / "aliases.csv"), str(filename)]
+    )
+    assert result.exit_code == 0, result.output
+    assert app.test_client().get("/legacy/page-1").location == "/page-one"
+
+
+def test_lookup_table_empty(tmp_path):
+    write_lookup_table(tmp_path / "empty.idx", [])
+    table = LookupTable(tmp_path / "empty.idx")
+    assert len(table) == 0
+    assert table.get("anything") is None
+
+
+def test_typo_variants():
+    variants = typo_variants("red-shoes", {"0": "o"})
+    assert "red-shos" in variants  # deletion
+    assert "red-sheos" in variants  # transposition
+    assert "red_shoes" in variants
+    assert "redshoes" in variants
+    assert "red-sh0es" in variants  # normalized back to the slug
+    assert "red-shoes" not in variants
+    assert "red" not in variants  # too short a truncation
+    assert "Red-Sh0es" in typo_variants("Red-Shoes", {"0": "o"})
+
+
+def test_build_lookup_table_drops_ambiguous_variants(tmp_path):
+    filename = tmp_path / "table.idx"
+    build_lookup_table(
+        filename,
+        [
+            FuzzyMappingResolver(["flask-basics", "flask-basins"]),
+            AliasMappingResolver({"old": "hello-world"}),
+        ],
+    )
+    table = LookupTable(filename)
+    assert table.get("falsk-basics") == "flask-basics"
+    assert table.get("hello-wrld") == "hello-world"
+    assert table.get("flask-basis") is None  # one deletion from either slug
+    assert table.get("flask-basics") is None  # slugs themselves are not keys
+
+    # Variants spilled to sorted runs give the same table
+    spilled = tmp_path / "spilled.idx"
+    resolvers = [FuzzyMappingResolver(["flask-basics", "flask-basins"])]
+    assert build_lookup_table(spilled, resolvers, chunk_size=7) == (
+        build_lookup_table(filename, resolvers)
+    )
+    assert list(LookupTable(spilled).items()) == list(LookupTable(filename).items())
+
+
+def test_lookup_table_resolver(tmp_path):
+    filename = tmp_path / "table.idx"
+    resolver = LookupTableResolver(filename)
+    assert resolver.resolve("hello-wrld") is None  # no file yet
+
+    build_lookup_table(filename, [FuzzyMappingResolver(["hello-world"])])
+    assert resolver.resolve("hello-wrld") is None  # not retried right away
+    resolver.reload()
+    assert resolver.resolve("hello-wrld") == "hello-world"
+
+    build_lookup_table(filename, [FuzzyMappingResolver(["goodbye-world"])])
+    assert resolver.resolve("hello-wrld") == "hello-world"
+    resolver.reload()
+    assert resolver.resolve("hello-wrld") is None
+    assert resolver.resolve("goodbye-wrld") == "goodbye-world"
+
+
+def test_build_index_command(tmp_path):
+    app = Flask(__name__)
+    filename = tmp_path / "table.idx"
+    lookup = LookupTableResolver(filename)
+    SelfHeal(
+        app,
+        resolvers=[lookup, FuzzyMappingResolver(["hello-world", "flask-basics"])],
+    )
+
+    result = app.test_cli_runner().invoke(
+        args=["selfheal", "build-index", str(filename)]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Wrote" in result.output
+
+    response = app.test_client().get("/hello-wrold")
+    assert response.status_code == 301
+    assert response.location == "/hello-world"
+    assert lookup.resolve("falsk-basics") == "flask-basics"
+
+
+def test_build_index_command_walks_sections(tmp_path):
+    app = Flask(__name__)
+    filename = tmp_path / "table.idx"
+    section = Section("/blog/", [FuzzyMappingResolver(["hello-world"])])
+    SelfHeal(app, resolvers=[], sections=[section])
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["selfheal", "build-index", str(filename)])
+    assert result.exit_code == 0, result.output
+    assert LookupTable(filename).get("hello-wrld") == "hello-world"
+
+    SelfHeal(app, resolvers=[])
+    result = runner.invoke(args=["selfheal", "build-index", str(filename)])
+    assert result.exit_code != 0
+    assert "no resolvers" in result.output
@@ -0,0 +1,78 @@
+from flask import Flask, g
+from flask_sqlalchemy import SQLAlchemy
+
+from flask_selfheal import (
+    AliasMappingResolver,
+    DatabaseResolver,
+    Metrics,
+    ResolutionCache,
+    SelfHeal,
+)
+
+
+def test_metrics_per_resolver_and_stage():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db = SQLAlchemy(app)
+
+    class Article(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        slug = db.Column(db.String, unique=True)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(Article(slug="flask-basics"))
+        db.session.commit()
+
+    observations = []
+    metrics = Metrics(callback=lambda *args: observations.append(args))
+    SelfHeal(
+        app,
+        resolvers=[AliasMappingResolver({"old": "new"}), DatabaseResolver(Article)],
+        cache=ResolutionCache(),
+        metrics=metrics,
+    )
+    metrics.register_endpoint(app)
+    client = app.test_client()
+
+    client.get("/old")
+    client.get("/old")
+    client.get("/flask-basic")
+
+    totals = metrics.as_dict()
+    assert totals["cache"]["lookup"]["calls"] == 3
+    assert totals["cache"]["lookup"]["hits"] == 1
+    assert totals["AliasMappingResolver"]["resolve"]["hits"] == 1
+    assert totals["DatabaseResolver"]["resolve"]["hits"] == 1
+    assert totals["DatabaseResolver"]["exact"] == {
+        "calls": 1,
+        "hits": 0,
+        "seconds": totals["DatabaseResolver"]["exact"]["seconds"],
+        "queries": 1,
+    }
+    assert totals["DatabaseResolver"]["contains"]["hits"] == 1
+    assert totals["DatabaseResolver"]["resolve"]["queries"] == 2
+    assert "word" not in totals["DatabaseResolver"]
+    assert ("DatabaseResolver", "contains", True) in [
+        o[:2] + (o[3],) for o in observations
+    ]
+
+    text = client.get("/selfheal/metrics").get_data(as_text=True)
+    assert (
+        'selfheal_stage_queries_total{resolver="DatabaseResolver",stage="resolve"} 2'
+        in text
+    )
+
+
+def test_metrics_annotate_g():
+    app = Flask(__name__)
+    heal = SelfHeal(
+        resolvers=[AliasMappingResolver({"old": "new"})],
+        metrics=Metrics(annotate_g=True),
+    )
+
+    with app.test_request_context("/old"):
+        assert heal.resolve("old") == "new"
+        assert [(m["resolver"], m["hit"]) for m in g.selfheal_metrics] == [
+            ("AliasMappingResolver", True)
+        ]
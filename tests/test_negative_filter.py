@@ -0,0 +1,62 @@
+from flask import Flask
+from flask_selfheal import BaseResolver, NegativeFilter, SelfHeal
+from flask_selfheal.bloom import BloomFilter
+
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"path-{i}")
+    assert all(f"path-{i}" in bloom for i in range(10_000))
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 200
+    assert len(bloom._bits) < 13_000
+
+
+def test_negative_filter_rotates_when_full():
+    negative_filter = NegativeFilter(capacity=2, max_age=None)
+    for path in ["a", "b", "c"]:
+        negative_filter.add(path)
+    assert "a" in negative_filter and "c" in negative_filter
+
+    negative_filter.add("d")
+    negative_filter.add("e")
+    assert "a" not in negative_filter
+    assert "e" in negative_filter
+    assert negative_filter.stats["rotations"] == 2
+
+
+def test_negative_filter_rotates_with_age(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("flask_selfheal.bloom.monotonic", lambda: now[0])
+    negative_filter = NegativeFilter(max_age=60)
+    negative_filter.add("old")
+
+    now[0] = 90
+    assert "old" in negative_filter  # Still in the previous generation
+    now[0] = 200
+    assert "old" not in negative_filter
+
+
+def test_selfheal_skips_remembered_paths():
+    calls = []
+
+    class MissingResolver(BaseResolver):
+        def resolve(self, path):
+            calls.append(path)
+            return "new" if path == "old" else None
+
+    app = Flask(__name__)
+    negative_filter = NegativeFilter()
+    SelfHeal(app, resolvers=[MissingResolver()], negative_filter=negative_filter)
+    client = app.test_client()
+
+    assert [client.get("/garbage").status_code for _ in range(3)] == [404] * 3
+    assert [client.get("/old").status_code for _ in range(2)] == [301] * 2
+    assert calls == ["garbage", "old", "old"]
+    assert negative_filter.stats["hits"] == 2
+
+    negative_filter.clear()
+    client.get("/garbage")
+    assert calls[-1] == "garbage"
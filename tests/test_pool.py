@@ -0,0 +1,50 @@
+import threading
+import time
+
+from flask_selfheal.pool import ResolverPool
+from flask_selfheal.resolvers import FuzzyMappingResolver
+
+
+class SleepyResolver:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def resolve(self, path):
+        time.sleep(self.delay)
+        return path.upper()
+
+
+def test_fuzzy_resolver_in_processes():
+    candidates = ["hello-world", "flask-basics", "cool-product-SKU1234567"]
+    local = FuzzyMappingResolver(candidates)
+    pooled = FuzzyMappingResolver(candidates, processes=1)
+    try:
+        assert pooled.index is None  # indexes only live in the workers
+        for path in ["flask-basic", "hello-wrld", "cool-prodcut", "not-found"]:
+            assert pooled.resolve(path) == local.resolve(path)
+        assert pooled.pool.stats["submitted"] == 4
+    finally:
+        pooled.pool.close()
+
+
+def test_resolver_pool_rejects_when_saturated():
+    pool = ResolverPool(SleepyResolver, (0.5,), processes=1, max_pending=1)
+    try:
+        assert pool.resolve("warm-up") == "WARM-UP"
+        busy = threading.Thread(target=pool.resolve, args=("slow",))
+        busy.start()
+        time.sleep(0.1)
+        assert pool.resolve("rejected") is None
+        busy.join()
+        assert pool.stats == {"submitted": 2, "rejected": 1, "timeouts": 0}
+    finally:
+        pool.close()
+
+
+def test_resolver_pool_timeout():
+    pool = ResolverPool(SleepyResolver, (0.5,), processes=1, timeout=0.05)
+    try:
+        assert pool.resolve("too-slow") is None
+        assert pool.stats["timeouts"] == 1
+    finally:
+        pool.close()
@@ -1,5 +1,17 @@
+import threading
+import time
+
+import pytest
+
 from flask import Flask, abort
-from flask_selfheal import SelfHeal, AliasMappingResolver
+from flask_selfheal import (
+    SelfHeal,
+    AliasMappingResolver,
+    BaseResolver,
+    FuzzyMappingResolver,
+    ResolutionCache,
+    Section,
+)
 
 
 def test_selfheal_client_redirect():
@@ -26,3 +38,238 @@ def test_selfheal_client_redirect():
     final = client.get("/old", follow_redirects=True)
     assert final.status_code == 200
     assert b"Slug: new" in final.data
+
+
+class SlowResolver(BaseResolver):
+    def __init__(self, delay, target=None):
+        self.delay = delay
+        self.target = target
+
+    def resolve(self, path):
+        time.sleep(self.delay)
+        return self.target
+
+
+class BlockingResolver(BaseResolver):
+    def __init__(self, release):
+        self.release = release
+        self.started = 0
+
+    def resolve(self, path):
+        self.started += 1
+        self.release.wait(5)
+
+
+def test_selfheal_parallel_keeps_chain_priority():
+    app = Flask(__name__)
+    SelfHeal(
+        app,
+        resolvers=[
+            SlowResolver(0.2, target="first"),
+            AliasMappingResolver({"old": "second"}),
+        ],
+        parallel=True,
+    )
+    response = app.test_client().get("/old")
+    assert response.headers["Location"].endswith("/first")
+
+
+def test_selfheal_parallel_deadline():
+    app = Flask(__name__)
+    cache = ResolutionCache()
+    SelfHeal(
+        app,
+        resolvers=[
+            SlowResolver(0.05),
+            AliasMappingResolver({"old": "new"}),
+            SlowResolver(2, target="too-late"),
+        ],
+        parallel=True,
+        deadline=0.5,
+        cache=cache,
+    )
+    client = app.test_client()
+
+    # Resolver 1 misses quickly, so resolver 2 wins without waiting for 3
+    start = time.monotonic()
+    assert client.get("/old").headers["Location"].endswith("/new")
+    assert time.monotonic() - start < 0.5
+
+    # Resolver 3 is still running at the deadline: plain 404, nothing cached
+    start = time.monotonic()
+    assert client.get("/missing").status_code == 404
+    assert time.monotonic() - start < 1
+    assert len(cache) == 1
+
+
+def test_selfheal_parallel_does_not_queue_behind_stragglers():
+    app = Flask(__name__)
+    release = threading.Event()
+    slow = BlockingResolver(release)
+    SelfHeal(
+        app,
+        resolvers=[AliasMappingResolver({"old": "new"}), slow],
+        parallel=True,
+        deadline=0.2,
+        max_workers=4,
+    )
+    client = app.test_client()
+    try:
+        # The slow resolver keeps running past the deadline, but only ever
+        # holds its share of the workers
+        for _ in range(4):
+            assert client.get("/missing").status_code == 404
+        assert slow.started == 2
+        for _ in range(8):
+            assert client.get("/old").headers["Location"].endswith("/new")
+        assert slow.started == 2
+    finally:
+        release.set()
+
+
+def test_selfheal_resolve_many():
+    app = Flask(__name__)
+    selfheal = SelfHeal(
+        app,
+        resolvers=[
+            AliasMappingResolver({"old": "new"}),
+            FuzzyMappingResolver(["hello-world", "new"]),
+        ],
+    )
+    assert selfheal.resolve_many(["old", "hello-wrld", "zzzz", "old"]) == [
+        "new",
+        "hello-world",
+        None,
+        "new",
+    ]
+
+
+def test_resolve_file_command(tmp_path):
+    app = Flask(__name__)
+    SelfHeal(app, resolvers=[FuzzyMappingResolver(["hello-world", "flask-basics"])])
+    source = tmp_path / "paths.log"
+    source.write_text(
+        "/hello-wrld\nhttps://example.com/falsk-basics?ref=1\n\n/zzzz\n/hello-wrld\n"
+    )
+    output = tmp_path / "healed.csv"
+
+    result = app.test_cli_runner().invoke(
+        args=[
+            "selfheal",
+            "resolve-file",
+            str(source),
+            str(output),
+            "--batch-size",
+            "2",
+            "--unresolved",
+        ]
+    )
+    assert result.exit_code == 0, result.output
+    assert output.read_text().splitlines() == [
+        "hello-wrld,hello-world",
+        "falsk-basics,flask-basics",
+        "zzzz,",
+        "hello-wrld,hello-world",
+    ]
+
+
+def test_resolve_file_command_decodes_paths(tmp_path):
+    app = Flask(__name__)
+    SelfHeal(app, resolvers=[AliasMappingResolver({"café": "coffee"})])
+    source = tmp_path / "paths.log"
+    source.write_text("/caf%C3%A9\n")
+    output = tmp_path / "healed.csv"
+
+    result = app.test_cli_runner().invoke(
+        args=["selfheal", "resolve-file", str(source), str(output)]
+    )
+    assert result.exit_code == 0, result.output
+    assert output.read_text(encoding="utf-8").splitlines() == ["café,coffee"]
+    # Same as the live 404
+    assert app.test_client().get("/caf%C3%A9").location == "/coffee"
+
+
+class RecordingResolver(AliasMappingResolver):
+    def __init__(self, mapping):
+        super().__init__(mapping)
+        self.calls = []
+
+    def resolve(self, path):
+        self.calls.append(path)
+        return super().resolve(path)
+
+
+def test_selfheal_sections():
+    app = Flask(__name__)
+
+    @app.route("/product/<slug>")
+    def product(slug):
+        if slug != "super-phone":
+            abort(404)
+        return slug
+
+    products = RecordingResolver({"phone": "super-phone"})
+    reviews = RecordingResolver({"phone": "super-phone"})
+    articles = RecordingResolver({"flask": "flask-basics"})
+    fallback = RecordingResolver({"old": "new"})
+
+    selfheal = SelfHeal(
+        app,
+        resolvers=[fallback],
+        sections=[
+            Section("/product/<slug>", [products], endpoint="product"),
+            Section("/shop/<int:id>/reviews", [reviews]),
+            Section("/blog/", [articles]),
+        ],
+    )
+    client = app.test_client()
+
+    assert client.get("/product/phone").headers["Location"] == "/product/super-phone"
+    assert client.get("/blog/flask").headers["Location"] == "/blog/flask-basics"
+    assert client.get("/shop/phone/reviews").headers["Location"] == (
+        "/shop/super-phone/reviews"
+    )
+    assert client.get("/old").headers["Location"] == "/new"
+    assert client.get("/blog/old").status_code == 404
+
+    # Each path only went through its own section's chain
+    assert products.calls == ["phone"]
+    assert reviews.calls == ["phone"]
+    assert articles.calls == ["flask", "old"]
+    assert fallback.calls == ["old"]
+
+    assert selfheal.resolve_many(["blog/flask", "product/phone", "old", "x"]) == [
+        "flask-basics",
+        "super-phone",
+        "new",
+        None,
+    ]
+
+
+def test_section_patterns():
+    assert Section("/product/<slug>", []).redirect_pattern == "/product/{slug}"
+    assert Section("product/", []).redirect_pattern == "/product/{slug}"
+    section = Section("/shop/<int:id>/reviews/", [])
+    assert section.prefix == "shop/"
+    assert section.argument == "id"
+    assert section.slug_of("shop/12/reviews") == "12"
+    assert section.redirect_pattern == "/shop/{slug}/reviews/"
+    assert section.matches("shop/12/reviews")
+    assert not section.matches("shop/12/photos")  # suffix required
+    assert not section.matches("shop/1/2/reviews")  # one segment only
+    assert Section("/docs/<path:page>", []).matches("docs/a/b")
+    assert Section("/product", []).redirect_pattern == "/product/{slug}"
+    assert not Section("/product", []).matches("products-list")
+    with pytest.raises(ValueError):
+        Section("/<a>/<b>", [])
+    with pytest.raises(ValueError):
+        SelfHeal(sections=[Section("/a/<x>", []), Section("a/", [])])
+
+
+def test_section_for_falls_back_to_shorter_prefix():
+    docs, api = Section("/docs/", []), Section("/docs/api/<name>/methods", [])
+    selfheal = SelfHeal(sections=[docs, api])
+    assert selfheal.section_for("docs/api/client/methods") is api
+    assert selfheal.section_for("docs/api/client") is docs
+    assert selfheal.section_for("documents/x") is None
+    assert selfheal.section_for("docs/") is None
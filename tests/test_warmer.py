@@ -0,0 +1,81 @@
+import threading
+
+from flask import Flask
+from flask_selfheal import (
+    AliasMappingResolver,
+    FlaskRoutesResolver,
+    ResolutionCache,
+    Section,
+    SelfHeal,
+    Warmer,
+)
+
+
+class WarmingResolver(AliasMappingResolver):
+    def __init__(self, alias_map, fail=False):
+        super().__init__(alias_map)
+        self.fail = fail
+        self.warmed = threading.Event()
+        self.calls = []
+
+    def warm(self):
+        self.warmed.set()
+        if self.fail:
+            raise RuntimeError("index unavailable")
+
+    def resolve(self, path):
+        self.calls.append(path)
+        return super().resolve(path)
+
+
+def test_warmer_runs_in_background():
+    app = Flask(__name__)
+    app.add_url_rule("/about-us", "about", lambda: "about")
+    routes = FlaskRoutesResolver()
+    section = WarmingResolver({"flask": "flask-basics"})
+    broken = WarmingResolver({}, fail=True)
+    warmer = Warmer(interval=None)
+
+    SelfHeal(
+        app,
+        resolvers=[broken, routes],
+        sections=[Section("/blog/", [section])],
+        warmer=warmer,
+    )
+    warmer._thread.join(5)
+
+    assert section.warmed.is_set() and broken.warmed.is_set()
+    assert app in routes._tries
+    assert warmer.stats == {"runs": 1, "errors": 1, "preloaded": 0}
+
+
+def test_warmer_preloads_cache():
+    app = Flask(__name__)
+    resolver = WarmingResolver({"old": "new", "older": "new"})
+    warmer = Warmer(
+        interval=None, preload=lambda: ["old", "older", "x"], preload_limit=2
+    )
+    selfheal = SelfHeal(
+        app, resolvers=[resolver], cache=ResolutionCache(), warmer=warmer
+    )
+    warmer._thread.join(5)
+    assert resolver.calls == ["old", "older"]
+
+    assert app.test_client().get("/old").headers["Location"] == "/new"
+    assert resolver.calls == ["old", "older"]
+    assert selfheal.cache.stats["hits"] == 1
+    assert warmer.stats["preloaded"] == 2
+
+
+def test_warmer_repeats_until_stopped():
+    app = Flask(__name__)
+    resolver = WarmingResolver({})
+    warmer = Warmer(interval=0.01)
+    SelfHeal(app, resolvers=[resolver], warmer=warmer)
+
+    resolver.warmed.wait(5)
+    resolver.warmed.clear()
+    resolver.warmed.wait(5)
+    warmer.stop(5)
+    assert not warmer._thread.is_alive()
+    assert warmer.stats["runs"] >= 2